@@ -6,6 +6,7 @@ import { FiFile, FiRefreshCw, FiTrash2, FiDownload } from 'react-icons/fi';
 import * as ExcelJS from 'exceljs';
 
 interface DashboardRecord {
+  id: number;
   propertyName: string;
   operator: string;
   entity: string;
@@ -85,23 +86,32 @@ export default function Dashboard() {
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [searchTerm, setSearchTerm] = useState('');
+  // searchTerm once typing pauses; the server searches every record, not just this page
+  const [searchQuery, setSearchQuery] = useState('');
   const [editingNotes, setEditingNotes] = useState<{ [key: number]: string }>({});
   const [editingStatus, setEditingStatus] = useState<{ [key: number]: string }>({});
   const [deleteConfirmIndex, setDeleteConfirmIndex] = useState<number | null>(null);
   const [currentPage, setCurrentPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
   const [totalRecords, setTotalRecords] = useState(0);
+  // pageCursors[i] is the cursor of page i + 1 (null for the first page)
+  const [pageCursors, setPageCursors] = useState<(string | null)[]>([null]);
   const router = useRouter();
 
   // Status options
   const statusOptions = ['Executed', 'Curative', 'Title issue', 'Pending Review'];
 
+  const PAGE_SIZE = 150;
+
   const fetchDashboardData = async (page: number = 1) => {
     setIsLoading(true);
     setError(null);
     try {
       console.log('Fetching dashboard data...');
-      const response = await fetch(`http://localhost:8000/api/dashboard?page=${page}&page_size=150`);
+      const cursor = page > 1 ? pageCursors[page - 1] : null;
+      const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+      const searchParam = searchQuery ? `&search=${encodeURIComponent(searchQuery)}` : '';
+      const response = await fetch(`http://localhost:8000/api/dashboard?limit=${PAGE_SIZE}${cursorParam}${searchParam}`);
       console.log('Response status:', response.status);
       
       const data = await response.json();
@@ -116,9 +126,14 @@ export default function Dashboard() {
       }
       
       setRecords(data.records);
-      setTotalPages(data.total_pages);
+      setTotalPages(Math.max(1, Math.ceil(data.total / PAGE_SIZE)));
       setTotalRecords(data.total);
-      setCurrentPage(data.page);
+      setCurrentPage(page);
+      setPageCursors(prev => {
+        const cursors = prev.slice(0, page);
+        cursors[page] = data.next_cursor;
+        return cursors;
+      });
     } catch (err) {
       console.error('Error fetching dashboard data:', err);
       setError(err instanceof Error ? err.message : 'An error occurred');
@@ -129,7 +144,20 @@ export default function Dashboard() {
 
   useEffect(() => {
     fetchDashboardData(currentPage);
-  }, [currentPage]);
+  }, [currentPage, searchQuery]);
+
+  // A changed search starts again from its first page
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      const query = searchTerm.trim();
+      if (query !== searchQuery) {
+        setPageCursors([null]);
+        setCurrentPage(1);
+        setSearchQuery(query);
+      }
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
   const handleNotesChange = (index: number, value: string) => {
     setEditingNotes(prev => ({
@@ -156,7 +184,7 @@ export default function Dashboard() {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
-          index,
+          id: records[index].id,
           notes: editingNotes[index] || ''
         }),
       });
@@ -181,7 +209,7 @@ export default function Dashboard() {
       });
 
       // Refresh the records
-      fetchDashboardData();
+      fetchDashboardData(currentPage);
     } catch (error) {
       console.error('Error updating notes:', error);
       setError(error instanceof Error ? error.message : 'An error occurred while updating notes');
@@ -199,7 +227,7 @@ export default function Dashboard() {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
-          index,
+          id: records[index].id,
           status: editingStatus[index] || ''
         }),
       });
@@ -224,7 +252,7 @@ export default function Dashboard() {
       });
 
       // Refresh the records
-      fetchDashboardData();
+      fetchDashboardData(currentPage);
     } catch (error) {
       console.error('Error updating status:', error);
       setError(error instanceof Error ? error.message : 'An error occurred while updating status');
@@ -234,83 +262,25 @@ export default function Dashboard() {
   const handleDelete = async (index: number) => {
     try {
       console.log('Delete called with index:', index);
-      console.log('Filtered records length:', filteredRecords.length);
-      console.log('Original records length:', records.length);
+      console.log('Records length:', records.length);
       
       // Validate the index
-      if (index < 0 || index >= filteredRecords.length) {
-        throw new Error(`Invalid index: ${index}. Filtered records length: ${filteredRecords.length}`);
+      if (index < 0 || index >= records.length) {
+        throw new Error(`Invalid index: ${index}. Records length: ${records.length}`);
       }
 
-      // Get the record from the filtered array
-      const recordToDelete = filteredRecords[index];
+      // Get the record from the current page
+      const recordToDelete = records[index];
       
       if (!recordToDelete) {
         console.error('Record to delete is undefined. Index:', index);
-        console.error('Filtered records:', filteredRecords);
-        throw new Error('Record not found in filtered results');
+        console.error('Records:', records);
+        throw new Error('Record not found on this page');
       }
 
       console.log('Record to delete:', recordToDelete);
 
-      // Find the actual index in the original records array
-      // Use a more flexible matching approach
-      const actualIndex = records.findIndex(record => {
-        // Match on multiple fields to ensure we find the right record
-        const matchesProperty = record.propertyName === recordToDelete.propertyName;
-        const matchesOperator = record.operator === recordToDelete.operator;
-        const matchesEntity = record.entity === recordToDelete.entity;
-        const matchesEffectiveDate = record.effectiveDate === recordToDelete.effectiveDate;
-        const matchesCounty = record.county === recordToDelete.county;
-        
-        // Return true if most fields match (allowing for some minor differences)
-        return matchesProperty && matchesOperator && matchesEntity && 
-               matchesEffectiveDate && matchesCounty;
-      });
-
-      console.log('Actual index found:', actualIndex);
-      console.log('Total records:', records.length);
-      console.log('Records array:', records);
-
-      if (actualIndex === -1) {
-        // Fallback: try to find by just the most unique fields
-        const fallbackIndex = records.findIndex(record => 
-          record.propertyName === recordToDelete.propertyName &&
-          record.effectiveDate === recordToDelete.effectiveDate &&
-          record.entity === recordToDelete.entity
-        );
-        
-        console.log('Fallback index found:', fallbackIndex);
-        
-        if (fallbackIndex === -1) {
-          console.error('Could not find record in original records array');
-          console.error('Looking for record:', recordToDelete);
-          console.error('Available records:', records);
-          throw new Error('Record not found in original records');
-        }
-        
-        console.log('Using fallback index:', fallbackIndex);
-        const response = await fetch(`http://localhost:8000/api/dashboard/delete?index=${fallbackIndex}`, {
-          method: 'DELETE',
-        });
-
-        console.log('Fallback delete API response status:', response.status);
-        console.log('Fallback delete API response ok:', response.ok);
-
-        if (!response.ok) {
-          const errorText = await response.text();
-          console.error('Fallback delete API error response:', errorText);
-          throw new Error(`Failed to delete record: ${response.status} - ${errorText}`);
-        }
-
-        // Remove the record from the local state
-        setRecords(prevRecords => prevRecords.filter((_, i) => i !== fallbackIndex));
-        setDeleteConfirmIndex(null);
-        return;
-      }
-
-      console.log('Sending delete request with actual index:', actualIndex);
-      const response = await fetch(`http://localhost:8000/api/dashboard/delete?index=${actualIndex}`, {
+      const response = await fetch(`http://localhost:8000/api/dashboard/delete?id=${recordToDelete.id}`, {
         method: 'DELETE',
       });
 
@@ -324,7 +294,7 @@ export default function Dashboard() {
       }
 
       // Remove the record from the local state
-      setRecords(prevRecords => prevRecords.filter((_, i) => i !== actualIndex));
+      setRecords(prevRecords => prevRecords.filter(record => record.id !== recordToDelete.id));
       setDeleteConfirmIndex(null);
     } catch (error) {
       console.error('Error deleting record:', error);
@@ -389,8 +359,22 @@ export default function Dashboard() {
         fgColor: { argb: 'FFE0E0E0' }
       };
       
+      // Fetch every page, not just the one on screen
+      const allRecords: DashboardRecord[] = [];
+      let cursor: string | null = null;
+      do {
+        const cursorParam: string = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+        const response = await fetch(`http://localhost:8000/api/dashboard?limit=1000${cursorParam}`);
+        const data = await response.json();
+        if (!response.ok || !data.records) {
+          throw new Error(data.detail || data.error || 'Failed to fetch dashboard data');
+        }
+        allRecords.push(...data.records);
+        cursor = data.next_cursor;
+      } while (cursor);
+
       // Add all records to the worksheet
-      records.forEach(record => {
+      allRecords.forEach(record => {
         worksheet.addRow({
           status: record.status || '',
           propertyName: record.propertyName || '',
@@ -429,39 +413,13 @@ export default function Dashboard() {
       window.URL.revokeObjectURL(url);
       
       // Show success message
-      setError(`Success: Excel file exported with ${records.length} records.`);
+      setError(`Success: Excel file exported with ${allRecords.length} records.`);
     } catch (error) {
       console.error('Error exporting to Excel:', error);
       setError(error instanceof Error ? error.message : 'An error occurred while exporting to Excel');
     }
   };
 
-  // Filter records based on search term
-  const filteredRecords = records.filter(record => {
-    if (!searchTerm) return true;
-    
-    // Split search term into words
-    const searchWords = searchTerm.toLowerCase().split(/\s+/);
-    
-    // Check if all search words are found in any of the relevant fields
-    return searchWords.every(word => {
-      const searchableFields = [
-        record.propertyName?.toLowerCase() || '',
-        record.operator?.toLowerCase() || '',
-        record.entity?.toLowerCase() || '',
-        record.state?.toLowerCase() || '',
-        record.county?.toLowerCase() || '',
-        record.propertyDescription?.toLowerCase() || '',
-        record.decimalInterest?.toLowerCase() || '',
-        record.effectiveDate?.toLowerCase() || '',
-        record.status?.toLowerCase() || '',
-        record.notes?.toLowerCase() || ''
-      ];
-      
-      return searchableFields.some(field => field.includes(word));
-    });
-  });
-
   return (
     <div className="min-h-screen bg-gradient-to-br from-gray-50 to-gray-100">
       <div className="max-w-[98vw] mx-auto px-4 py-6">
@@ -547,7 +505,7 @@ export default function Dashboard() {
                   </tr>
                 </thead>
                 <tbody className="bg-white divide-y divide-gray-200">
-                  {filteredRecords.map((record, index) => (
+                  {records.map((record, index) => (
                     <tr key={index} className="hover:bg-gray-50 transition-colors duration-150">
                       <td className="px-3 py-2 whitespace-nowrap">
                         {editingStatus[index] !== undefined ? (
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Division Order Backfill
+Pushes a directory of historical division orders through extraction using
+the Message Batches API and deploys the extracted wells to the dashboard.
+
+Text extraction (native text, OCR, the extraction cache and the local layout
+parser) is the same as for /api/upload. Documents that still need Claude are
+submitted as Message Batches instead of synchronous requests: batches cost
+half as much and don't compete with interactive uploads for the rate limit.
+
+Progress is kept in a SQLite state file, so the command can be stopped at any
+point and run again with the same arguments to continue: extracted documents
+are not read again, submitted batches are polled rather than resubmitted, and
+deployed documents are skipped. Documents are marked as being submitted
+before a batch is created; if the run stopped before the batch was recorded,
+a later run finds it with batches.list(), and adopts it once its results
+show the same documents, instead of paying for it twice.
+
+    python backfill.py <pdf_dir> [--state PATH] [--batch-size N] [--poll-seconds S] [--no-wait] [--retry-failed]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import pathlib
+import sqlite3
+import time
+
+import main
+
+DEFAULT_STATE_PATH = pathlib.Path(__file__).parent / "cache" / "backfill_state.db"
+
+# Requests per Message Batch (the API allows up to 100,000 and 256 MB)
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_POLL_SECONDS = 60
+
+# Allowed difference between this machine's clock and the API's batch created_at (seconds)
+SUBMIT_CLOCK_SKEW = 300
+
+# Document statuses
+PENDING = "pending"        # Text extracted, needs Claude
+SUBMITTING = "submitting"  # Batch being created (not yet recorded)
+SUBMITTED = "submitted"    # In a Message Batch
+PARSED = "parsed"          # Extracted data ready to deploy
+DEPLOYED = "deployed"
+FAILED = "failed"
+
+
+class BackfillState:
+    """SQLite record of every document's progress and of the submitted batches."""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    sha256 TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    cache_key TEXT,
+                    is_scanned INTEGER,
+                    text TEXT,
+                    data TEXT,
+                    extractor TEXT,
+                    batch_id TEXT,
+                    error TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_status ON documents (status)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS batches (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    requests INTEGER NOT NULL,
+                    submitted_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def known(self, sha256: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM documents WHERE sha256 = ?", (sha256,)).fetchone() is not None
+
+    def add(self, sha256: str, path: str, status: str, cache_key: str = None, is_scanned: bool = None,
+            text: str = None, data: dict = None, extractor: str = None, error: str = None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO documents "
+                "(sha256, path, status, cache_key, is_scanned, text, data, extractor, error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sha256, path, status, cache_key, None if is_scanned is None else int(is_scanned), text,
+                 None if data is None else json.dumps(data), extractor, error, time.time()),
+            )
+
+    def documents(self, status: str, limit: int = None) -> list:
+        query = "SELECT sha256, path, cache_key, is_scanned, text, data, batch_id FROM documents WHERE status = ? ORDER BY path"
+        params = (status,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            {"sha256": row[0], "path": row[1], "cache_key": row[2], "is_scanned": bool(row[3]),
+             "text": row[4], "data": json.loads(row[5]) if row[5] else None, "batch_id": row[6]}
+            for row in rows
+        ]
+
+    def mark_submitting(self, sha256s: list):
+        """Record that a batch is about to be created for these documents."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE documents SET status = ?, updated_at = ? WHERE sha256 = ?",
+                [(SUBMITTING, now, sha256) for sha256 in sha256s],
+            )
+
+    def submitting(self) -> tuple:
+        """(sha256s, time marked) of documents whose batch creation was interrupted; ([], None) if none."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT sha256, updated_at FROM documents WHERE status = ?", (SUBMITTING,)).fetchall()
+        return [row[0] for row in rows], min((row[1] for row in rows), default=None)
+
+    def known_batches(self) -> set:
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT id FROM batches")}
+
+    def mark_submitted(self, batch_id: str, sha256s: list):
+        """Record a created batch and move its documents to SUBMITTED in one transaction."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO batches (id, status, requests, submitted_at) VALUES (?, ?, ?, ?)",
+                (batch_id, "in_progress", len(sha256s), now),
+            )
+            conn.executemany(
+                "UPDATE documents SET status = ?, batch_id = ?, updated_at = ? WHERE sha256 = ?",
+                [(SUBMITTED, batch_id, now, sha256) for sha256 in sha256s],
+            )
+
+    def open_batches(self) -> list:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT id FROM batches WHERE status != 'ended' ORDER BY submitted_at")]
+
+    def finish_batch(self, batch_id: str, outcomes: dict):
+        """Store the outcome of every document in an ended batch: {sha256: (data, error)}."""
+        now = time.time()
+        with self._connect() as conn:
+            for sha256, (data, error) in outcomes.items():
+                conn.execute(
+                    "UPDATE documents SET status = ?, data = ?, extractor = 'claude_batch', error = ?, updated_at = ? "
+                    "WHERE sha256 = ? AND batch_id = ?",
+                    (FAILED if error else PARSED, None if data is None else json.dumps(data), error, now,
+                     sha256, batch_id),
+                )
+            conn.execute("UPDATE batches SET status = 'ended' WHERE id = ?", (batch_id,))
+
+    def set_status(self, sha256: str, status: str, error: str = None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE documents SET status = ?, error = ?, updated_at = ? WHERE sha256 = ?",
+                (status, error, time.time(), sha256),
+            )
+
+    def retry_failed(self) -> int:
+        """Queue failed documents for another batch, or for extraction again if their text wasn't extracted."""
+        with self._connect() as conn:
+            queued = conn.execute(
+                "UPDATE documents SET status = ?, batch_id = NULL, error = NULL, updated_at = ? "
+                "WHERE status = ? AND text IS NOT NULL",
+                (PENDING, time.time(), FAILED),
+            ).rowcount
+            return queued + conn.execute("DELETE FROM documents WHERE status = ?", (FAILED,)).rowcount
+
+    def summary(self) -> dict:
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM documents GROUP BY status").fetchall())
+
+
+async def extract_documents(state: BackfillState, pdf_dir: pathlib.Path):
+    """Extract the text of every PDF not seen before; recognized layouts are parsed right away."""
+    paths = sorted(pdf_dir.rglob("*.pdf"))
+    print(f"Found {len(paths)} PDFs in {pdf_dir}")
+    for number, path in enumerate(paths, 1):
+        content = path.read_bytes()
+        sha256 = hashlib.sha256(content).hexdigest()
+        if state.known(sha256):
+            continue
+        print(f"[{number}/{len(paths)}] Extracting {path.name}")
+        cache_key = main.extraction_cache_key(content)
+        try:
+            cached = await main.get_cached_extraction(cache_key)
+            if cached:
+                state.add(sha256, str(path), PARSED, cache_key, cached["is_scanned"], cached["text"],
+                          cached["data"], "cache")
+                continue
+            extraction_stats = {}
+            is_scanned, text = await asyncio.to_thread(main.scan_and_extract_text, content, extraction_stats)
+            parsed_data = await asyncio.to_thread(main.local_extraction, text, extraction_stats)
+            if parsed_data is not None:
+                await main.store_cached_extraction(cache_key, text, parsed_data, is_scanned)
+                state.add(sha256, str(path), PARSED, cache_key, is_scanned, text, parsed_data, "local")
+            else:
+                state.add(sha256, str(path), PENDING, cache_key, is_scanned, text)
+        except Exception as e:
+            print(f"Error extracting {path.name}: {str(e)}")
+            state.add(sha256, str(path), FAILED, cache_key, error=f"Error extracting text: {str(e)}")
+
+
+def batch_request(document: dict) -> dict:
+    """One Message Batch request: the same prompt as a synchronous extraction."""
+    content = main.extraction_message(main.claude_client.prepare_text(document["text"]))
+    return {"custom_id": document["sha256"], "params": main.claude_client.request_arguments(content)}
+
+
+async def reconcile_submission(state: BackfillState, client):
+    """Settle documents left SUBMITTING by an interrupted run.
+
+    Their batch, if it was created, was created after they were marked, isn't
+    recorded yet and has as many requests. A batch's custom_ids can only be
+    read from its results once it has ended: a candidate whose results are
+    exactly these documents is adopted, and while a candidate is still
+    running they stay SUBMITTING for a later run. Without any candidate the
+    batch was never created and they go back to PENDING.
+    """
+    sha256s, marked_at = state.submitting()
+    if not sha256s:
+        return
+    known = state.known_batches()
+    unverified = []
+    async for batch in client.messages.batches.list(limit=100):
+        if batch.created_at.timestamp() < marked_at - SUBMIT_CLOCK_SKEW:
+            break  # Newest first: older batches can't be this submission
+        counts = batch.request_counts
+        requests = counts.processing + counts.succeeded + counts.errored + counts.canceled + counts.expired
+        if batch.id in known or requests != len(sha256s):
+            continue
+        if batch.processing_status != "ended":
+            unverified.append(batch.id)
+            continue
+        custom_ids = {entry.custom_id async for entry in await client.messages.batches.results(batch.id)}
+        if custom_ids == set(sha256s):
+            state.mark_submitted(batch.id, sha256s)
+            print(f"Found batch {batch.id} of an interrupted submission ({len(sha256s)} documents)")
+            return
+    if unverified:
+        print(f"Interrupted submission of {len(sha256s)} documents may be batch {', '.join(unverified)}; "
+              f"they stay {SUBMITTING} until it has ended and its requests can be checked")
+        return
+    for sha256 in sha256s:
+        state.set_status(sha256, PENDING)
+    print(f"Interrupted submission of {len(sha256s)} documents has no batch, submitting them again")
+
+
+async def submit_batches(state: BackfillState, client, batch_size: int):
+    await reconcile_submission(state, client)
+    while True:
+        documents = state.documents(PENDING, limit=batch_size)
+        if not documents:
+            return
+        sha256s = [document["sha256"] for document in documents]
+        state.mark_submitting(sha256s)
+        batch = await client.messages.batches.create(requests=[batch_request(document) for document in documents])
+        state.mark_submitted(batch.id, sha256s)
+        print(f"Submitted batch {batch.id} with {len(documents)} documents")
+
+
+async def collect_results(state: BackfillState, client, batch_id: str):
+    """Parse the results of an ended batch and record every document's outcome."""
+    documents = {document["sha256"]: document for document in state.documents(SUBMITTED) if document["batch_id"] == batch_id}
+    outcomes = {}
+    usage = {"input_tokens": 0, "output_tokens": 0, "cache_read_input_tokens": 0}
+    async for entry in await client.messages.batches.results(batch_id):
+        document = documents.get(entry.custom_id)
+        if document is None:
+            continue
+        if entry.result.type != "succeeded":
+            error = getattr(entry.result, "error", None)
+            outcomes[entry.custom_id] = (None, f"Batch request {entry.result.type}: {error}")
+            continue
+        message = entry.result.message
+        for field in usage:
+            usage[field] += getattr(message.usage, field, None) or 0
+        try:
+            parsed_data = main.parse_claude_response(message.content[0].text)
+        except Exception as e:
+            outcomes[entry.custom_id] = (None, f"Error parsing Claude response: {str(e)}")
+            continue
+        if "recovery" in parsed_data:
+            # Partial wells of a truncated response: kept for review, not cached or deployed,
+            # and submitted again with --retry-failed
+            recovery = parsed_data["recovery"]
+            outcomes[entry.custom_id] = (parsed_data, f"Claude response was truncated "
+                                                      f"({recovery['wells_recovered']} complete wells recovered)")
+            continue
+        await main.store_cached_extraction(document["cache_key"], document["text"], parsed_data, document["is_scanned"])
+        outcomes[entry.custom_id] = (parsed_data, None)
+    for sha256 in documents.keys() - outcomes.keys():
+        outcomes[sha256] = (None, "No result returned for this document")
+    state.finish_batch(batch_id, outcomes)
+    failed = sum(1 for _, error in outcomes.values() if error)
+    print(f"Batch {batch_id}: {len(outcomes) - failed} parsed, {failed} failed "
+          f"({usage['input_tokens']} input, {usage['output_tokens']} output, "
+          f"{usage['cache_read_input_tokens']} cache read tokens)")
+
+
+async def poll_batches(state: BackfillState, client, poll_seconds: float, wait: bool):
+    """Collect ended batches; with wait, keep polling until no batch is in progress."""
+    while True:
+        for batch_id in state.open_batches():
+            batch = await client.messages.batches.retrieve(batch_id)
+            counts = batch.request_counts
+            print(f"Batch {batch_id}: {batch.processing_status} "
+                  f"({counts.processing} processing, {counts.succeeded} succeeded, {counts.errored} errored)")
+            if batch.processing_status == "ended":
+                await collect_results(state, client, batch_id)
+        if not state.open_batches() or not wait:
+            return
+        await asyncio.sleep(poll_seconds)
+
+
+def dashboard_records(data: dict) -> list:
+    """Flatten an extraction into dashboard records, the same way the upload page deploys them."""
+    return [
+        {
+            "propertyName": well.get("propertyName") or "",
+            "operator": data.get("operator") or "",
+            "entity": data.get("entity") or "",
+            "propertyDescription": well.get("propertyDescription") or "",
+            "decimalInterest": well.get("decimalInterest") or "",
+            "county": well.get("county") or "",
+            "state": data.get("state") or "",
+            "effectiveDate": data.get("effectiveDate") or "",
+            "status": "",
+            "notes": "",
+        }
+        for well in data.get("wells") or []
+    ]
+
+
+async def deploy_documents(state: BackfillState):
+    """Deploy parsed documents one at a time (deploy skips duplicates, so a retried document is harmless)."""
+    for document in state.documents(PARSED):
+        records = dashboard_records(document["data"])
+        if records:
+            result = await main.deploy_to_dashboard({"records": records})
+            if "error" in result:
+                print(f"Error deploying {document['path']}: {result['error']}")
+                continue
+            print(f"Deployed {pathlib.Path(document['path']).name}: {result.get('new_records_added')} new records")
+        state.set_status(document["sha256"], DEPLOYED)
+
+
+async def run_backfill(pdf_dir, state_path=DEFAULT_STATE_PATH, batch_size: int = DEFAULT_BATCH_SIZE,
+                       poll_seconds: float = DEFAULT_POLL_SECONDS, wait: bool = True,
+                       retry_failed: bool = False) -> dict:
+    """Run every stage that has work; returns the document count per status."""
+    state = BackfillState(state_path)
+    client = main.claude  # The SDK's own retries are enough for the few batch API calls
+    if retry_failed:
+        print(f"Retrying {state.retry_failed()} failed documents")
+    await extract_documents(state, pathlib.Path(pdf_dir))
+    await submit_batches(state, client, batch_size)
+    await poll_batches(state, client, poll_seconds, wait)
+    await deploy_documents(state)
+    summary = state.summary()
+    print(f"Backfill status: {json.dumps(summary)}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill division orders through the Message Batches API")
+    parser.add_argument("pdf_dir", help="Directory of PDFs (searched recursively)")
+    parser.add_argument("--state", default=str(DEFAULT_STATE_PATH), help="Progress file for resuming")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--poll-seconds", type=float, default=DEFAULT_POLL_SECONDS)
+    parser.add_argument("--no-wait", action="store_true", help="Submit and collect ended batches, then exit")
+    parser.add_argument("--retry-failed", action="store_true", help="Resubmit documents whose batch request failed")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_backfill(args.pdf_dir, args.state, args.batch_size, args.poll_seconds,
+                                 not args.no_wait, args.retry_failed))
+    finally:
+        main.shutdown_ocr_pool()
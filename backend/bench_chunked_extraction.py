@@ -0,0 +1,66 @@
+"""
+Compare single-request and chunked Claude extraction on a long document.
+
+Runs against fake_anthropic.py, whose response time grows with the number of
+wells it returns (like real generation), so no API key is needed. Usage:
+
+    python bench_chunked_extraction.py [pdf_path] [max_chars] [concurrency]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import fitz
+from anthropic import AsyncAnthropic
+
+from chunked_extraction import extract_in_chunks, split_text
+from fake_anthropic import start_fake_anthropic, fake_base_url
+
+
+def pdf_text(path: Path) -> str:
+    with fitz.open(path) as doc:
+        return "\n".join(f"--- Page {i + 1} ---\n{page.get_text()}" for i, page in enumerate(doc))
+
+
+async def run(text: str, max_chars: int, concurrency: int, base_url: str):
+    client = AsyncAnthropic(api_key="bench", base_url=base_url)
+
+    async def send_message(content: str) -> str:
+        message = await client.messages.create(
+            model="bench", max_tokens=15000, temperature=0,
+            messages=[{"role": "user", "content": content}],
+        )
+        return message.content[0].text
+
+    start = time.perf_counter()
+    single = json.loads(await send_message(text))
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, chunked = await extract_in_chunks(text, send_message, json.loads, max_chars, concurrency)
+    chunked_seconds = time.perf_counter() - start
+
+    parts = len(split_text(text, max_chars))
+    print(f"Single request: {len(single['wells'])} wells in {single_seconds:.2f}s")
+    print(f"Chunked ({parts} parts, concurrency {concurrency}): "
+          f"{len(chunked['wells'])} wells in {chunked_seconds:.2f}s")
+    single_interests = [well["decimalInterest"] for well in single["wells"]]
+    chunked_interests = [well["decimalInterest"] for well in chunked["wells"]]
+    assert chunked_interests == single_interests, "Chunked extraction returned different wells"
+
+
+if __name__ == "__main__":
+    pdf_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent / "test.pdf"
+    max_chars = int(sys.argv[2]) if len(sys.argv) > 2 else 15000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    server = start_fake_anthropic()
+    text = pdf_text(pdf_path)
+    print(f"{pdf_path.name}: {len(text)} characters")
+    try:
+        asyncio.run(run(text, max_chars, concurrency, fake_base_url(server)))
+    finally:
+        server.shutdown()
@@ -0,0 +1,88 @@
+"""
+Time the first dashboard screen at 100k records: whole JSON file vs one page.
+
+Writes a JSON dashboard file and a temporary SQLite dashboard with the same
+records, then compares what GET /api/dashboard used to do (load the file,
+sort every record, serialize them all) with dashboard_store.page_records for
+the first page, a page deep into the list, and a filtered page.
+
+    python bench_dashboard_pages.py [records] [page_size]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+work_dir = tempfile.mkdtemp(prefix="dashboard_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{work_dir}/dashboard.db"
+
+import dashboard_store
+
+DATES = ["February 28, 2025", "3/1/25", "4/1/2025", "12/01/2024", "FIRST SALES", "Next Settlement", "05/01/2024"]
+STATUSES = ["", "Executed", "Curative", "Title issue", "Pending Review"]
+
+
+def build_records(count: int) -> list:
+    return [
+        {
+            "propertyName": f"FISCHER-COULSON W10A {i}H",
+            "operator": f"OPERATOR {i % 40}",
+            "entity": f"ENTITY {i % 7}",
+            "propertyDescription": "SHL: 2102' FSL 1026' FWL SEC 10, BLK 36, T2S, T&P RR CO SVY A-1096",
+            "decimalInterest": f"0.{i:08d}",
+            "county": ["Midland", "Reeves", "Loving", "Upton"][i % 4],
+            "state": "TX",
+            "effectiveDate": DATES[i % len(DATES)],
+            "status": STATUSES[i % len(STATUSES)],
+            "notes": "",
+        }
+        for i in range(count)
+    ]
+
+
+def timed(label: str, function):
+    start = time.perf_counter()
+    body = function()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{label:<38} {elapsed:8.1f} ms  {len(body) / 1024:9.1f} KB")
+    return body
+
+
+def old_get(path: str) -> str:
+    with open(path) as f:
+        records = json.load(f)
+    records.sort(key=lambda x: x.get('effectiveDate', ''), reverse=True)
+    return json.dumps({"records": records})
+
+
+def page(limit: int, cursor: str = None, **options) -> str:
+    return json.dumps(dashboard_store.page_records(limit, cursor, **options))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    records = build_records(count)
+    json_path = os.path.join(work_dir, "dashboard_data.json")
+    with open(json_path, "w") as f:
+        json.dump(records, f, indent=2)
+    dashboard_store.init_store()
+    start = time.perf_counter()
+    dashboard_store.deploy_records(records)
+    print(f"{count} records (deployed in {time.perf_counter() - start:.1f}s), pages of {page_size}\n")
+
+    timed("Old GET (whole file)", lambda: old_get(json_path))
+    first = timed("First page", lambda: page(page_size))
+
+    # Follow the cursors half way down the list, then time the next page
+    cursor = json.loads(first)["next_cursor"]
+    for _ in range(count // page_size // 2):
+        cursor = dashboard_store.page_records(page_size, cursor)["next_cursor"]
+    timed(f"Page {count // page_size // 2 + 2} (by cursor)", lambda: page(page_size, cursor))
+
+    timed("Filtered page (operator and status)",
+          lambda: page(page_size, filters={"operator": "OPERATOR 3", "status": "Title issue"}))
+    timed("Sorted by property name", lambda: page(page_size, sort="propertyName", descending=False))
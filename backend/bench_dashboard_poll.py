@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Dashboard Polling Benchmark
+Times GET /api/dashboard polls of an unchanged dashboard: the first request
+for a page (query and serialization), repeated requests (cached page) and
+conditional requests with the page's ETag (304).
+
+Start the backend (import some records first, e.g. with
+import_dashboard_json.py), then run:
+    python bench_dashboard_poll.py [polls] [limit]
+"""
+
+import sys
+import time
+
+import requests
+
+BASE_URL = "http://localhost:8000"
+
+
+def poll(session, url, polls, headers=None):
+    start = time.perf_counter()
+    received = 0
+    statuses = set()
+    for _ in range(polls):
+        response = session.get(url, headers=headers)
+        received += len(response.content)
+        statuses.add(response.status_code)
+    elapsed = (time.perf_counter() - start) / polls * 1000
+    return elapsed, received / polls, statuses
+
+
+if __name__ == "__main__":
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    session = requests.Session()
+    url = f"{BASE_URL}/api/dashboard?limit={limit}&sort=operator&order=asc"
+    start = time.perf_counter()
+    first = session.get(url)
+    first.raise_for_status()
+    print(f"First request:       {(time.perf_counter() - start) * 1000:7.2f} ms  {len(first.content) / 1024:8.1f} KB")
+
+    elapsed, size, statuses = poll(session, url, polls)
+    print(f"Cached page:         {elapsed:7.2f} ms  {size / 1024:8.1f} KB  {sorted(statuses)}")
+
+    elapsed, size, statuses = poll(session, url, polls, {"If-None-Match": first.headers["ETag"]})
+    print(f"If-None-Match (304): {elapsed:7.2f} ms  {size / 1024:8.1f} KB  {sorted(statuses)}")
+
+    print(session.get(f"{BASE_URL}/api/dashboard/metrics").json())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+OCR Rendering Benchmark
+Compares the fixed 4x RGB render (converted to grayscale in PIL) with the
+adaptive grayscale render, per page of the PDFs in test_pdfs/: render time,
+image buffer memory and, with --ocr, Tesseract time and mean confidence.
+
+Usage: python bench_ocr_render.py [--ocr]
+"""
+
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+import ocr
+
+
+def render_fixed(page):
+    pix = page.get_pixmap(matrix=fitz.Matrix(ocr.RENDER_ZOOM, ocr.RENDER_ZOOM))
+    rgb = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    img = rgb.convert('L')
+    # Pixmap samples + RGB image + grayscale copy
+    buffer_bytes = len(pix.samples) + pix.width * pix.height * 3 + pix.width * pix.height
+    return img, buffer_bytes
+
+
+def render_adaptive(page):
+    dpi = ocr.choose_render_dpi(page)
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    img = Image.frombytes("L", [pix.width, pix.height], pix.samples)
+    # Pixmap samples + grayscale image
+    buffer_bytes = len(pix.samples) + pix.width * pix.height
+    return img, buffer_bytes, dpi
+
+
+def ocr_image(img):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        _, confidence = ocr.recognize(img, ocr.OCR_CONFIGS[0], ocr.OCR_PAGE_TIMEOUT)
+    return (time.perf_counter() - start) * 1000, confidence
+
+
+def run_benchmark(run_ocr=False):
+    pdf_paths = sorted((Path(__file__).parent / "test_pdfs").glob("*.pdf"))
+    if not pdf_paths:
+        print("No PDFs found in test_pdfs/")
+        return
+
+    header = f"{'file':<24}{'page':>5}{'fixed ms':>10}{'fixed MB':>10}{'adapt ms':>10}{'adapt MB':>10}{'dpi':>5}"
+    if run_ocr:
+        header += f"{'fixed ocr ms':>14}{'conf':>6}{'adapt ocr ms':>14}{'conf':>6}"
+    print(header)
+
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for path in pdf_paths:
+        with fitz.open(path) as doc:
+            for page in doc:
+                start = time.perf_counter()
+                fixed_img, fixed_bytes = render_fixed(page)
+                fixed_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                adaptive_img, adaptive_bytes, dpi = render_adaptive(page)
+                adaptive_ms = (time.perf_counter() - start) * 1000
+
+                totals[0] += fixed_ms
+                totals[1] += fixed_bytes
+                totals[2] += adaptive_ms
+                totals[3] += adaptive_bytes
+
+                line = (f"{path.name:<24}{page.number + 1:>5}{fixed_ms:>10.1f}{fixed_bytes / 1e6:>10.1f}"
+                        f"{adaptive_ms:>10.1f}{adaptive_bytes / 1e6:>10.1f}{dpi:>5}")
+                if run_ocr:
+                    fixed_ocr_ms, fixed_conf = ocr_image(fixed_img)
+                    adaptive_ocr_ms, adaptive_conf = ocr_image(adaptive_img)
+                    line += f"{fixed_ocr_ms:>14.0f}{fixed_conf:>6.0f}{adaptive_ocr_ms:>14.0f}{adaptive_conf:>6.0f}"
+                print(line)
+
+    print(f"{'total':<24}{'':>5}{totals[0]:>10.1f}{totals[1] / 1e6:>10.1f}{totals[2]:>10.1f}{totals[3] / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    if "--ocr" in sys.argv:
+        try:
+            pytesseract.get_tesseract_version()
+        except Exception as e:
+            print(f"Tesseract not available, skipping OCR timings: {e}")
+            sys.argv.remove("--ocr")
+    run_benchmark("--ocr" in sys.argv)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+OCR Scoring Benchmark
+Compares the old score_ocr_text (a lowercase copy of the page per garbage
+pattern and per legal term) against the single-pass scorer in ocr_scoring,
+on the extracted texts stored in debug/. Also checks both give the same score.
+
+Usage: python bench_ocr_scoring.py [repeats]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from ocr_scoring import LEGAL_TERMS, score_ocr_text
+
+GARBAGE_PATTERNS = [letter * 10 for letter in 'qwertyuiopasdfghjklzxcvbnm']
+
+
+def old_score_ocr_text(page_text: str) -> int:
+    words = page_text.split()
+    score = len(words) * 10
+
+    if len(page_text) > 100:
+        score += 100
+    if len(page_text) > 500:
+        score += 200
+    if len(page_text) > 1000:
+        score += 300
+
+    for pattern in GARBAGE_PATTERNS:
+        if pattern in page_text.lower():
+            score -= 500
+
+    for term in LEGAL_TERMS:
+        if term.lower() in page_text.lower():
+            score += 50
+
+    return score
+
+
+def time_it(func, texts, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start) / (repeats * len(texts)) * 1e6
+
+
+def run_benchmark(repeats=200):
+    debug_dir = Path(__file__).parent / "debug"
+    paths = sorted(debug_dir.glob("*.txt"))
+    texts = [path.read_text(encoding="utf-8", errors="replace") for path in paths]
+    # Synthetic noisy page so the garbage-run path is exercised too
+    texts.append("Operator: Test Oil\n" + "l" * 40 + " iiiiiiiiiiii well " + "x" * 12)
+    if not paths:
+        print(f"No texts found in {debug_dir}")
+        sys.exit(1)
+
+    mismatches = [
+        path.name for path, text in zip(paths, texts)
+        if old_score_ocr_text(text) != score_ocr_text(text)
+    ]
+    if old_score_ocr_text(texts[-1]) != score_ocr_text(texts[-1]):
+        mismatches.append("<synthetic>")
+
+    total_chars = sum(len(text) for text in texts)
+    print(f"{len(texts)} texts, {total_chars / len(texts):.0f} chars on average")
+    old_us = time_it(old_score_ocr_text, texts, repeats)
+    new_us = time_it(score_ocr_text, texts, repeats)
+    print(f"old score_ocr_text: {old_us:8.1f} us/text")
+    print(f"ocr_scoring:        {new_us:8.1f} us/text ({old_us / new_us:.1f}x)")
+    if mismatches:
+        print(f"Score mismatches: {', '.join(mismatches)}")
+    else:
+        print("Scores match on every text")
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    run_benchmark(repeats)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+PDF Parsing Benchmark
+Compares the old upload path (PyPDF2 for the scan check, PyPDF2 again for
+direct text, then PyMuPDF for OCR rendering) against a single PDFDocument
+parse with PyMuPDF, on the files in test_pdfs/ (plus test.pdf if present).
+
+Usage: python bench_pdf_parsing.py [repeats]
+"""
+
+import io
+import sys
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+from PyPDF2 import PdfReader
+
+from pdf_document import PDFDocument
+
+
+def old_pipeline(pdf_content: bytes):
+    # is_scanned_pdf: first PyPDF2 parse
+    reader = PdfReader(io.BytesIO(pdf_content))
+    first_page = reader.pages[0]
+    first_page.extract_text()
+    if '/XObject' in first_page['/Resources']:
+        first_page['/Resources']['/XObject'].get_object()
+
+    # extract_text_from_pdf: second PyPDF2 parse for direct text
+    reader = PdfReader(io.BytesIO(pdf_content))
+    direct_text = ""
+    for page in reader.pages:
+        page_text = page.extract_text()
+        if page_text:
+            direct_text += page_text + "\n"
+
+    # OCR stage: third parse with PyMuPDF
+    doc = fitz.open(stream=io.BytesIO(pdf_content), filetype="pdf")
+    len(doc)
+    doc.close()
+    return direct_text
+
+
+def new_pipeline(pdf_content: bytes):
+    with PDFDocument(pdf_content) as pdf:
+        pdf.is_scanned()
+        return pdf.native_text()
+
+
+def time_it(func, pdf_content, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(pdf_content)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def run_benchmark(repeats=5):
+    base_dir = Path(__file__).parent
+    pdf_paths = sorted((base_dir / "test_pdfs").glob("*.pdf"))
+    if (base_dir / "test.pdf").exists():
+        pdf_paths.append(base_dir / "test.pdf")
+    if not pdf_paths:
+        print("No PDFs found in test_pdfs/")
+        return
+
+    print(f"{'file':<28}{'pages':>6}{'old ms':>10}{'new ms':>10}{'speedup':>9}")
+    total_old = total_new = 0
+    for path in pdf_paths:
+        content = path.read_bytes()
+        with fitz.open(stream=content, filetype="pdf") as doc:
+            pages = len(doc)
+        # Silence the pipelines' progress prints while timing
+        stdout, sys.stdout = sys.stdout, io.StringIO()
+        try:
+            old_ms = time_it(old_pipeline, content, repeats)
+            new_ms = time_it(new_pipeline, content, repeats)
+        finally:
+            sys.stdout = stdout
+        total_old += old_ms
+        total_new += new_ms
+        print(f"{path.name:<28}{pages:>6}{old_ms:>10.1f}{new_ms:>10.1f}{old_ms / new_ms:>8.1f}x")
+
+    print(f"{'total':<28}{'':>6}{total_old:>10.1f}{total_new:>10.1f}{total_old / total_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,75 @@
+"""
+Compare the old greedy-regex response parsing with response_parser on long responses.
+
+Builds Claude-style responses (prose, a fenced JSON block, a closing note)
+with many wells, then times both parsers on the complete response and checks
+what each gets out of the same response cut off part way through a well.
+
+    python bench_response_parser.py [wells] [rounds]
+"""
+
+import json
+import re
+import sys
+import time
+
+from response_parser import parse_extraction_response
+
+
+def old_parse(response_text: str) -> dict:
+    json_match = re.search(r'\{[\s\S]*\}', response_text)
+    if not json_match:
+        raise ValueError("No JSON object found in Claude's response")
+    return json.loads(json_match[0])
+
+
+def build_response(wells: int) -> str:
+    data = {
+        "operator": "PIONEER NATURAL RESOURCES USA, INC.",
+        "entity": "BLUE SKY MINERALS LP",
+        "state": "Texas",
+        "effectiveDate": "February 28, 2025",
+        "wells": [
+            {
+                "propertyName": f"FISCHER-COULSON W10A {i}H",
+                "propertyDescription": "SHL: 2102' FSL 1026' FWL SEC 10, BLK 36, T2S, T&P RR CO SVY A-1096",
+                "decimalInterest": f"0.{i:08d}",
+                "county": "Midland",
+            }
+            for i in range(1, wells + 1)
+        ],
+    }
+    return (
+        "Here is the information extracted from the division order:\n\n```json\n"
+        + json.dumps(data, indent=4)
+        + "\n```\n\nAll wells listed in the exhibit are included."
+    )
+
+
+def time_parser(parse, text: str, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        parse(text)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+if __name__ == "__main__":
+    wells = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    response = build_response(wells)
+    print(f"Response: {len(response)} characters, {wells} wells")
+    print(f"Old parser: {time_parser(old_parse, response, rounds):.2f} ms")
+    print(f"New parser: {time_parser(lambda text: parse_extraction_response(text), response, rounds):.2f} ms")
+    assert old_parse(response) == parse_extraction_response(response)[0]
+
+    # Cut off in the middle of a well, as when max_tokens is reached
+    truncated = response[:int(len(response) * 0.9)]
+    try:
+        old_parse(truncated)
+        print("Old parser on truncated response: parsed")
+    except (ValueError, json.JSONDecodeError) as e:
+        print(f"Old parser on truncated response: failed ({type(e).__name__})")
+    data, report = parse_extraction_response(truncated)
+    print(f"New parser on truncated response: recovered {report['wells_recovered']} of {wells} wells, "
+          f"header fields {report['header_fields']}")
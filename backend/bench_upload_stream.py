@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Streamed Upload Benchmark
+Compares time to the first well and to the complete result for
+/api/upload/stream against the total time of /api/upload.
+
+Start fake_anthropic.py (or use a real API key) and the backend, then run:
+    python bench_upload_stream.py [pdf_path]
+
+Pass a PDF that goes to Claude (a scan, or start the backend with
+LOCAL_EXTRACTION=0); uploads are sent with no_cache=true.
+"""
+
+import json
+import sys
+import time
+
+import requests
+
+BASE_URL = "http://localhost:8000"
+
+
+def plain_upload(pdf_path):
+    start = time.perf_counter()
+    with open(pdf_path, "rb") as f:
+        response = requests.post(f"{BASE_URL}/api/upload", params={"no_cache": "true"},
+                                 files={"file": (pdf_path, f, "application/pdf")})
+    response.raise_for_status()
+    return time.perf_counter() - start, len(response.json()["data"]["wells"])
+
+
+def streamed_upload(pdf_path):
+    start = time.perf_counter()
+    first_well = None
+    wells = 0
+    result = None
+    with open(pdf_path, "rb") as f:
+        response = requests.post(f"{BASE_URL}/api/upload/stream", params={"no_cache": "true"},
+                                 files={"file": (pdf_path, f, "application/pdf")}, stream=True)
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["event"] == "well":
+                wells += 1
+                if first_well is None:
+                    first_well = time.perf_counter() - start
+            elif event["event"] == "error":
+                raise RuntimeError(event["detail"])
+            elif event["event"] == "result":
+                result = event
+    total = time.perf_counter() - start
+    return first_well, total, wells, len(result["data"]["wells"])
+
+
+if __name__ == "__main__":
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else "test.pdf"
+
+    seconds, wells = plain_upload(pdf_path)
+    print(f"/api/upload:        {wells} wells after {seconds:.2f}s")
+
+    first_well, total, streamed, result_wells = streamed_upload(pdf_path)
+    print(f"/api/upload/stream: first well after {first_well:.2f}s, "
+          f"{streamed} wells streamed, result ({result_wells} wells) after {total:.2f}s")
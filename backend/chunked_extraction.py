@@ -0,0 +1,113 @@
+"""
+Chunked Claude extraction for long division orders.
+
+A document with hundreds of wells does not fit comfortably in one response:
+generation is slow and the output gets cut off at max_tokens. Instead the
+extracted text is split into parts at well boundaries, every part is sent
+concurrently together with the start of the document (where operator,
+entity, state and effective date live), and the `wells` arrays of the
+responses are concatenated in document order.
+"""
+
+import asyncio
+import re
+
+# Lines ending a well row: the row carries the decimal interest
+_WELL_ROW_END = re.compile(r'(?<![\d.])(0?\.\d{4,}|1\.0{4,})(?![\d.])')
+
+# Characters from the start of the document sent with every part as shared context
+HEADER_CHARS = 3000
+
+CHUNK_INSTRUCTIONS = """This is part {index} of {total} of a long division order, sent separately because of its length.
+DOCUMENT HEADER is the beginning of the document, for operator, entity, state and effective date only.
+Extract the header fields from the DOCUMENT HEADER, and include in "wells" ONLY the wells that appear in DOCUMENT PART {index} OF {total}; wells that appear only in the header belong to another part.
+Respond with the same JSON structure as usual."""
+
+
+def split_text(text: str, max_chars: int) -> list:
+    """Split text into parts of at most ~max_chars, cutting after a well row where possible.
+
+    A part ends after the last line in range that carries a decimal interest,
+    so a well's name, description and interest stay together; if there is
+    none the part ends at the last line break (or at max_chars for a single
+    very long line).
+    """
+    if len(text) <= max_chars:
+        return [text]
+    parts = []
+    start = 0
+    while len(text) - start > max_chars:
+        window = text[start:start + max_chars]
+        cut = None
+        offset = 0
+        for line in window.split('\n')[:-1]:
+            offset += len(line) + 1
+            if _WELL_ROW_END.search(line):
+                cut = offset
+        if cut is None or cut < max_chars // 4:
+            newline = window.rfind('\n')
+            cut = newline + 1 if newline > 0 else max_chars
+        parts.append(text[start:start + cut])
+        start += cut
+    parts.append(text[start:])
+    return [part for part in parts if part.strip()]
+
+
+def chunk_message(header: str, part: str, index: int, total: int) -> str:
+    """User message for one part of a chunked extraction."""
+    return (
+        CHUNK_INSTRUCTIONS.format(index=index, total=total)
+        + f"\n\n=== DOCUMENT HEADER ===\n{header}\n=== END DOCUMENT HEADER ===\n\n"
+        + f"=== DOCUMENT PART {index} OF {total} ===\n{part}\n=== END DOCUMENT PART ==="
+    )
+
+
+def merge_results(results: list) -> dict:
+    """Merge the parsed part responses: header fields from the first part that has them, wells in order.
+
+    Recovery reports of truncated parts are kept under "recovery", with their part numbers.
+    """
+    merged = {"operator": "", "entity": "", "state": "", "effectiveDate": "", "wells": []}
+    recovered_parts = []
+    for index, result in enumerate(results, 1):
+        for field in ("operator", "entity", "state", "effectiveDate"):
+            if not merged[field] and result.get(field):
+                merged[field] = result[field]
+        merged["wells"].extend(result.get("wells") or [])
+        if result.get("recovery"):
+            recovered_parts.append({"part": index, **result["recovery"]})
+    if recovered_parts:
+        merged["recovery"] = {
+            "truncated": True,
+            "wells_recovered": sum(part["wells_recovered"] for part in recovered_parts),
+            "parts": recovered_parts,
+        }
+    return merged
+
+
+async def extract_in_chunks(text: str, send_message, parse_response, max_chars: int,
+                            concurrency: int) -> tuple:
+    """Extract a long document part by part; return (combined response text, merged data).
+
+    `send_message(content)` is an async callable returning Claude's response
+    text for a user message and `parse_response(text)` turns it into a dict.
+    At most `concurrency` parts are in flight at once. A part that fails
+    fails the whole extraction, like a single-request failure would.
+    """
+    parts = split_text(text, max_chars)
+    header = text[:HEADER_CHARS]
+    semaphore = asyncio.Semaphore(concurrency)
+    print(f"Chunked extraction: {len(text)} characters in {len(parts)} parts")
+
+    async def run_part(index: int, part: str):
+        async with semaphore:
+            response_text = await send_message(chunk_message(header, part, index, len(parts)))
+        parsed = parse_response(response_text)
+        print(f"Part {index}/{len(parts)}: {len(parsed.get('wells') or [])} wells")
+        return response_text, parsed
+
+    outcomes = await asyncio.gather(*(run_part(index, part) for index, part in enumerate(parts, 1)))
+    response_text = "\n\n".join(
+        f"=== PART {index} ===\n{response}" for index, (response, _) in enumerate(outcomes, 1)
+    )
+    return response_text, merge_results([parsed for _, parsed in outcomes])
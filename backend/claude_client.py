@@ -0,0 +1,393 @@
+"""
+Claude extraction client.
+
+Wraps the AsyncAnthropic client used for division order extractions:
+
+- the system prompt is sent as a cacheable block (prompt caching), so uploads
+  after the first read it from Anthropic's cache instead of having it
+  processed again;
+- standard division order boilerplate (the statutory payment, indemnity and
+  notice provisions printed on every form, repeated exhibit page headers) is
+  removed from the document text before it is sent;
+- input, output, cache write and cache read token counts and the latency of
+  every request are recorded, for /api/claude/metrics;
+- requests are limited to CLAUDE_MAX_CONCURRENT_REQUESTS at a time across
+  all uploads, rate limit (429), overload (529) and other transient errors
+  are retried with exponential backoff within a per-request deadline, and a
+  circuit breaker fails requests fast while the API keeps failing, instead of
+  every file of a batch waiting through its own retries.
+"""
+
+import asyncio
+import os
+import random
+import re
+import time
+from collections import deque
+
+import anthropic
+
+from well_parser import DECIMAL_PATTERN, FIELD_LABELS, PAGE_FURNITURE
+
+# Set CLAUDE_PROMPT_CACHE=0 to send the system prompt without cache_control
+PROMPT_CACHE = os.getenv("CLAUDE_PROMPT_CACHE", "1") != "0"
+
+# Set STRIP_BOILERPLATE=0 to send the document text unchanged
+STRIP_BOILERPLATE = os.getenv("STRIP_BOILERPLATE", "1") != "0"
+
+# Bump when the boilerplate rules change (part of the extraction cache key)
+BOILERPLATE_VERSION = "2"
+
+# Lines starting a boilerplate paragraph: the standard division order
+# provisions and the statutory sentences printed around them
+BOILERPLATE_START = re.compile(
+    r'^\s*('
+    r'(terms of sales?|payment|indemnity|dispute; withholding of funds|termination|notices|'
+    r'warranty of title|withholding of funds)\s*:'
+    r'|this division order (is )?prepared in compliance'
+    r'|this agreement does not amend'
+    r'|the following provisions apply to each interest owner'
+    r'|no change of interest is binding'
+    r'|any change of interest shall be made effective'
+    r'|any correspondence regarding this agreement'
+    r'|in addition to the legal rights provided'
+    r'|failure to furnish your (social security|taxpayer identification)'
+    r')',
+    re.IGNORECASE
+)
+
+# Lines starting with a field label ("Property Name", "Owner Name:", "County and State", ...)
+FIELD_LINE = re.compile(
+    r'^\s*(' + '|'.join(
+        re.escape(label).replace(r'\ ', r'\s*') for label in sorted(FIELD_LABELS, key=len, reverse=True)
+    ) + r'|property|owner|effective)\b',
+    re.IGNORECASE
+)
+
+# Lines of a boilerplate paragraph at most, when no line ends its sentence
+MAX_BOILERPLATE_LINES = 6
+
+# Page numbers of exhibits ("Page 3 of 7")
+PAGE_NUMBER = re.compile(r'^\s*page\s+\d+\s+of\s+\d+\s*$', re.IGNORECASE)
+
+# Requests kept for the per-request metrics
+RECENT_REQUESTS = 50
+
+# Requests in flight at once, across all uploads (size it to the account's rate limit)
+MAX_CONCURRENT_REQUESTS = int(os.getenv("CLAUDE_MAX_CONCURRENT_REQUESTS", "8"))
+
+# Timeout of one HTTP attempt, and total time one request may take including retries
+REQUEST_TIMEOUT = float(os.getenv("CLAUDE_REQUEST_TIMEOUT", "300"))
+REQUEST_DEADLINE = float(os.getenv("CLAUDE_REQUEST_DEADLINE", "600"))
+
+# Retries of transient failures, with exponential backoff between BACKOFF_BASE and BACKOFF_MAX seconds
+MAX_RETRIES = int(os.getenv("CLAUDE_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("CLAUDE_BACKOFF_BASE", "1"))
+BACKOFF_MAX = float(os.getenv("CLAUDE_BACKOFF_MAX", "30"))
+
+# Consecutive failed attempts that open the circuit breaker, and how long it stays open
+BREAKER_THRESHOLD = int(os.getenv("CLAUDE_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("CLAUDE_BREAKER_COOLDOWN", "60"))
+
+# HTTP statuses worth retrying: timeout, conflict, rate limit, server errors and 529 overloaded
+RETRYABLE_STATUSES = {408, 409, 429}
+
+
+class ClaudeUnavailableError(Exception):
+    """Raised without calling the API while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Claude API unavailable after repeated failures, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, anthropic.APIConnectionError):  # Includes APITimeoutError
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUSES or error.status_code >= 500
+    return False
+
+
+def backoff_delay(attempt: int, error: Exception) -> float:
+    """Seconds to wait before retry `attempt`: jittered exponential backoff, at least the server's retry-after."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            delay = max(delay, float(response.headers.get("retry-after", 0)))
+        except ValueError:
+            pass
+    return delay
+
+
+class CircuitBreaker:
+    """Opens after BREAKER_THRESHOLD consecutive failures; after the cooldown one trial request is let through.
+
+    A trial that hasn't finished within another cooldown (or was cancelled)
+    doesn't keep the breaker open: the next request becomes the new trial.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.trial_started is not None or time.monotonic() >= self.opened_at + self.cooldown:
+            return "half_open"
+        return "open"
+
+    def check(self):
+        """Raise ClaudeUnavailableError while open; after the cooldown, let a single trial request through."""
+        if self.opened_at is None:
+            return
+        now = time.monotonic()
+        remaining = self.opened_at + self.cooldown - now
+        trial_running = self.trial_started is not None and now - self.trial_started < self.cooldown
+        if remaining > 0 or trial_running:
+            raise ClaudeUnavailableError(max(remaining, 1))
+        self.trial_started = now
+
+    def success(self):
+        if self.opened_at is not None:
+            print("Claude circuit breaker closed")
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started = None
+
+    def failure(self):
+        self.failures += 1
+        if self.trial_started is not None or (self.opened_at is None and self.failures >= self.threshold):
+            print(f"Claude circuit breaker open for {self.cooldown:.0f}s after {self.failures} failures")
+            self.opened_at = time.monotonic()
+            self.trial_started = None
+
+
+def strip_boilerplate(text: str) -> str:
+    """Remove standard provision paragraphs and repeated exhibit page headers from document text.
+
+    A boilerplate paragraph runs from its first line to the first line ending
+    a sentence, for at most MAX_BOILERPLATE_LINES lines. It stops early at a
+    blank line, a line carrying a decimal interest or a line starting with a
+    field label, so an OCR'd provision missing its final period doesn't take
+    the fields after it along. Exhibit headers ("Exhibit
+    'A'", "Attached and made a part of ...") are kept the first time they
+    appear; "Page N of M" lines are dropped.
+    """
+    kept = []
+    seen_furniture = set()
+    in_boilerplate = False
+    boilerplate_lines = 0
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if in_boilerplate:
+            if (not stripped or DECIMAL_PATTERN.search(stripped) or FIELD_LINE.match(stripped)
+                    or boilerplate_lines >= MAX_BOILERPLATE_LINES):
+                in_boilerplate = False
+            else:
+                in_boilerplate = not stripped.endswith('.')
+                boilerplate_lines += 1
+                continue
+        if BOILERPLATE_START.match(stripped):
+            in_boilerplate = not stripped.endswith('.')
+            boilerplate_lines = 1
+            continue
+        if PAGE_NUMBER.match(stripped):
+            continue
+        if PAGE_FURNITURE.match(stripped):
+            if stripped in seen_furniture:
+                continue
+            seen_furniture.add(stripped)
+        kept.append(line)
+    return '\n'.join(kept)
+
+
+class ExtractionClient:
+    """Sends extraction requests to Claude and records their token usage."""
+
+    def __init__(self, client, model: str, system_prompt: str, max_tokens: int = 15000):
+        # Same connection pool as `client`; retries are done here, around the breaker and deadline
+        self.client = client.with_options(max_retries=0, timeout=REQUEST_TIMEOUT)
+        self.model = model
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.breaker = CircuitBreaker()
+        self.recent = deque(maxlen=RECENT_REQUESTS)
+        self.totals = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "seconds": 0.0,
+        }
+
+    def signature(self) -> str:
+        """Settings that change what is sent for a document (for the extraction cache key)."""
+        return f"boilerplate={BOILERPLATE_VERSION}" if STRIP_BOILERPLATE else "boilerplate=off"
+
+    def prepare_text(self, text: str) -> str:
+        """Document text as it is sent to Claude."""
+        if not STRIP_BOILERPLATE:
+            return text
+        stripped = strip_boilerplate(text)
+        print(f"Stripped {len(text) - len(stripped)} of {len(text)} characters of boilerplate")
+        return stripped
+
+    def request_arguments(self, content: str) -> dict:
+        """Arguments of an extraction request for one user message."""
+        system = self.system_prompt
+        if PROMPT_CACHE:
+            system = [{"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}]
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": 0,
+            "system": system,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ]
+        }
+
+    async def send(self, content: str) -> str:
+        """Send one user message and return the response text."""
+        start = time.perf_counter()
+        deadline = time.monotonic() + REQUEST_DEADLINE
+        arguments = self.request_arguments(content)
+        attempt = 0
+        while True:
+            self.breaker.check()
+            try:
+                async with self.semaphore:
+                    message = await asyncio.wait_for(
+                        self.client.messages.create(**arguments), self._remaining(deadline)
+                    )
+            except Exception as e:
+                attempt += 1
+                await self._retry_or_raise(e, attempt, deadline)
+                continue
+            self.breaker.success()
+            self._record(message.usage, time.perf_counter() - start, first_token_seconds=None)
+            return message.content[0].text
+
+    async def stream(self, content: str):
+        """Send one user message as a streaming request, yielding the response text as it arrives.
+
+        Failures before the first text arrives are retried like send(); once
+        text has been passed on, a failure is raised to the caller.
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + REQUEST_DEADLINE
+        arguments = self.request_arguments(content)
+        attempt = 0
+        while True:
+            self.breaker.check()
+            first_token_seconds = None
+            try:
+                async with self.semaphore:
+                    # The deadline bounds the wait for the response to start and for every event after it
+                    stream_manager = self.client.messages.stream(**arguments)
+                    stream = await asyncio.wait_for(stream_manager.__aenter__(), self._remaining(deadline))
+                    try:
+                        deltas = stream.text_stream.__aiter__()
+                        while True:
+                            try:
+                                delta = await asyncio.wait_for(deltas.__anext__(), self._remaining(deadline))
+                            except StopAsyncIteration:
+                                break
+                            if first_token_seconds is None:
+                                first_token_seconds = time.perf_counter() - start
+                            yield delta
+                        message = await asyncio.wait_for(stream.get_final_message(), self._remaining(deadline))
+                    finally:
+                        await stream_manager.__aexit__(None, None, None)
+            except Exception as e:
+                if first_token_seconds is not None:
+                    # Part of the response was already passed on, so it can't be retried
+                    self.totals["failures"] += 1
+                    if is_retryable(e):
+                        self.breaker.failure()
+                    raise
+                attempt += 1
+                await self._retry_or_raise(e, attempt, deadline)
+                continue
+            self.breaker.success()
+            self._record(message.usage, time.perf_counter() - start, first_token_seconds)
+            return
+
+    def _remaining(self, deadline: float) -> float:
+        """Seconds left before the request deadline; raises TimeoutError once it has passed."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        return remaining
+
+    async def _retry_or_raise(self, error: Exception, attempt: int, deadline: float):
+        """Re-raise a failed attempt's error, or wait out the backoff before retrying it."""
+        if isinstance(error, asyncio.TimeoutError):
+            self.totals["failures"] += 1
+            self.breaker.failure()
+            raise TimeoutError(f"Claude request exceeded its {REQUEST_DEADLINE:.0f}s deadline") from error
+        if not is_retryable(error):
+            # The API answered (e.g. 400 for a bad request), so it counts as reachable
+            self.totals["failures"] += 1
+            if isinstance(error, anthropic.APIStatusError):
+                self.breaker.success()
+            raise error
+        self.breaker.failure()
+        if self.breaker.state == "open":
+            # This failure opened the breaker: give up now rather than after the backoff
+            self.totals["failures"] += 1
+            raise ClaudeUnavailableError(self.breaker.cooldown) from error
+        delay = backoff_delay(attempt, error)
+        if attempt > MAX_RETRIES or time.monotonic() + delay >= deadline:
+            self.totals["failures"] += 1
+            raise error
+        self.totals["retries"] += 1
+        print(f"Claude request failed ({type(error).__name__}: {str(error)[:200]}), "
+              f"retry {attempt}/{MAX_RETRIES} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    def _record(self, usage, seconds: float, first_token_seconds):
+        entry = {
+            "time": time.time(),
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+            "seconds": round(seconds, 3),
+            "first_token_seconds": round(first_token_seconds, 3) if first_token_seconds is not None else None,
+        }
+        self.recent.append(entry)
+        self.totals["requests"] += 1
+        for field in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"):
+            self.totals[field] += entry[field]
+        self.totals["seconds"] += seconds
+        print(
+            f"Claude usage: {entry['input_tokens']} input, {entry['output_tokens']} output, "
+            f"{entry['cache_read_input_tokens']} cache read, {entry['cache_creation_input_tokens']} cache write "
+            f"tokens in {seconds:.2f}s"
+        )
+
+    def metrics(self) -> dict:
+        """Token totals since startup and the most recent requests."""
+        return {
+            "prompt_cache": PROMPT_CACHE,
+            "strip_boilerplate": STRIP_BOILERPLATE,
+            "max_concurrent_requests": MAX_CONCURRENT_REQUESTS,
+            "circuit_breaker": self.breaker.state,
+            "totals": {**self.totals, "seconds": round(self.totals["seconds"], 3)},
+            "recent": list(self.recent),
+        }
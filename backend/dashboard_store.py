@@ -0,0 +1,323 @@
+"""
+Dashboard records stored in the database (database.DashboardRecord).
+
+The dashboard used to be the newest JSON file in dashboard_data/, loaded and
+rewritten in full for every deploy, edit and delete. Records are now rows of
+dashboard_records: a deploy inserts only the new records and an edit touches
+a single row. DATABASE_URL selects the database (Postgres in production),
+otherwise a local SQLite file is used. import_dashboard_json.py loads the
+existing JSON files once.
+
+Records are addressed by their id, the primary key assigned when they are
+deployed, so edits don't depend on where a record sits in anyone's list.
+
+page_records serves the dashboard a page at a time: keyset pagination over
+the (sort column, id) indexes, so a page costs the same at any depth and
+never skips or repeats records that were added or deleted in between.
+
+Every deploy, edit and delete is one transaction. On SQLite the database's
+write-ahead log is the journal: a commit appends only the changed pages to
+dashboard.db-wal and a crash mid-write leaves the last committed state,
+which SQLite replays from the log on the next open. checkpoint() compacts
+the log into the database file and truncates it; it runs after every
+CHECKPOINT_ROWS written rows and at shutdown, so the log doesn't grow
+without bound while the dashboard is being polled.
+
+Every transaction that changes records also increments the version in
+dashboard_state, so any process can tell with one primary key read whether
+the dashboard changed (dashboard_view.py serves pages cached per version).
+
+The functions are blocking; the endpoints run them with asyncio.to_thread.
+"""
+
+import base64
+import json
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from database import DashboardRecord, DashboardState, SessionLocal, create_tables, engine
+
+# Rows written between checkpoints of the SQLite write-ahead log
+CHECKPOINT_ROWS = int(os.getenv("DASHBOARD_CHECKPOINT_ROWS", "5000"))
+
+# API field -> DashboardRecord column
+FIELDS = {
+    "propertyName": "property_name",
+    "operator": "operator",
+    "entity": "entity",
+    "propertyDescription": "property_description",
+    "decimalInterest": "decimal_interest",
+    "county": "county",
+    "state": "state",
+    "effectiveDate": "effective_date",
+    "status": "status",
+    "notes": "notes",
+}
+
+# Fields that identify a record for duplicate detection
+KEY_FIELDS = ("propertyName", "operator", "entity", "effectiveDate")
+
+# Sort keys of the dashboard list; each has an index on (column, id)
+SORT_COLUMNS = {
+    "effectiveDate": DashboardRecord.effective_date_key,
+    "propertyName": DashboardRecord.property_name,
+    "operator": DashboardRecord.operator,
+    "entity": DashboardRecord.entity,
+}
+
+# Fields the dashboard list can be filtered on (exact match)
+FILTER_FIELDS = ("operator", "entity", "state", "county", "status")
+
+# Fields the dashboard search looks in (every word of the search must be in one of them)
+SEARCH_FIELDS = tuple(FIELDS)
+
+# Order of the dashboard list (newest effective date first, then newest deployed)
+DISPLAY_ORDER = (DashboardRecord.effective_date_key.desc(), DashboardRecord.id.desc())
+
+# Effective date formats found on division orders ("3/1/25", "February 28, 2025", "01072025")
+EFFECTIVE_DATE_FORMATS = ("%m/%d/%y", "%m/%d/%Y", "%B %d, %Y", "%b %d, %Y", "%Y-%m-%d", "%m%d%Y")
+
+_rows_since_checkpoint = 0
+_checkpoint_lock = threading.Lock()
+
+
+def record_key(record: dict) -> str:
+    """Duplicate key of an API record: property, operator, entity and effective date, ignoring case."""
+    return "\x1f".join(str(record.get(field) or "").strip().lower() for field in KEY_FIELDS)
+
+
+def effective_date_key(value) -> str:
+    """Sortable YYYY-MM-DD form of an effective date, or "" for "FIRST SALES" and the like."""
+    value = str(value or "").strip()
+    for date_format in EFFECTIVE_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return ""
+
+
+def to_api(row: DashboardRecord) -> dict:
+    record = {"id": row.id}
+    record.update((field, getattr(row, column) or "") for field, column in FIELDS.items())
+    return record
+
+
+def _column_value(value):
+    return "" if value is None else value
+
+
+def _row_values(record: dict) -> dict:
+    values = {column: _column_value(record.get(field)) for field, column in FIELDS.items()}
+    values["dedupe_key"] = record_key(record)
+    values["effective_date_key"] = effective_date_key(record.get("effectiveDate"))
+    return values
+
+
+def init_store():
+    """Create the dashboard tables if they don't exist."""
+    create_tables(engine)
+    with SessionLocal() as session:
+        if session.get(DashboardState, 1) is None:
+            session.add(DashboardState(id=1, version=0))
+            session.commit()
+
+
+def current_version() -> int:
+    """Version of the dashboard; changes whenever a record is added, changed or deleted."""
+    with SessionLocal() as session:
+        return session.scalar(select(DashboardState.version).where(DashboardState.id == 1))
+
+
+def _bump_version(session):
+    """Increment the version as part of the session's transaction."""
+    session.execute(update(DashboardState).where(DashboardState.id == 1).values(version=DashboardState.version + 1))
+
+
+def checkpoint():
+    """Copy the SQLite write-ahead log into the database file and truncate it (no-op on Postgres)."""
+    global _rows_since_checkpoint
+    if engine.dialect.name != "sqlite":
+        return
+    with _checkpoint_lock:
+        _rows_since_checkpoint = 0
+    with engine.connect() as connection:
+        busy, log_pages, checkpointed = connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one()
+    if busy:
+        print(f"Dashboard checkpoint incomplete: {checkpointed} of {log_pages} log pages copied, readers still active")
+
+
+def _rows_written(count: int):
+    global _rows_since_checkpoint
+    with _checkpoint_lock:
+        _rows_since_checkpoint += count
+        due = _rows_since_checkpoint >= CHECKPOINT_ROWS
+    if due:
+        checkpoint()
+
+
+def _insert_new():
+    """INSERT that skips rows whose dedupe_key is already on the dashboard (unique index)."""
+    dialect_insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+    return dialect_insert(DashboardRecord).on_conflict_do_nothing(index_elements=["dedupe_key"])
+
+
+def deploy_records(records: list) -> dict:
+    """Insert the records that aren't already on the dashboard; duplicates are skipped.
+
+    Every new record gets its ID here; the IDs are returned in deploy order.
+    The unique index on dedupe_key makes the duplicate check part of the
+    INSERT, so concurrent deploys of the same records add them once.
+    """
+    keys = [record_key(record) for record in records]
+    new_rows = []
+    seen = set()
+    for record, key in zip(records, keys):
+        if key not in seen:
+            seen.add(key)
+            new_rows.append(_row_values(record))
+    with SessionLocal() as session:
+        inserted = {}
+        if new_rows:
+            returned = session.execute(
+                _insert_new().returning(DashboardRecord.dedupe_key, DashboardRecord.id), new_rows
+            )
+            inserted = dict(returned.all())
+            if inserted:
+                _bump_version(session)
+        session.commit()
+        total = session.scalar(select(func.count()).select_from(DashboardRecord))
+    record_ids = [inserted[row["dedupe_key"]] for row in new_rows if row["dedupe_key"] in inserted]
+    added = set()
+    for record, key in zip(records, keys):
+        if key in inserted and key not in added:
+            added.add(key)
+        else:
+            print(f"Duplicate found and skipped: {record.get('propertyName', 'Unknown')}")
+    _rows_written(len(record_ids))
+    return {
+        "records_count": total,
+        "duplicates_skipped": len(records) - len(record_ids),
+        "new_records_added": len(record_ids),
+        "record_ids": record_ids,
+    }
+
+
+def list_records() -> list:
+    """Every dashboard record, newest effective date first."""
+    with SessionLocal() as session:
+        return [to_api(row) for row in session.scalars(select(DashboardRecord).order_by(*DISPLAY_ORDER))]
+
+
+def encode_cursor(sort: str, descending: bool, row: DashboardRecord) -> str:
+    position = [sort, descending, getattr(row, SORT_COLUMNS[sort].key), row.id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool):
+    """(sort value, id) of the last record before the page; ValueError for a cursor of another listing."""
+    try:
+        cursor_sort, cursor_descending, value, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if (cursor_sort, cursor_descending) != (sort, descending):
+        raise ValueError("Cursor belongs to a different sort order")
+    return value, record_id
+
+
+def search_conditions(search: str) -> list:
+    """One condition per word of `search`: the word is in one of SEARCH_FIELDS, ignoring case."""
+    return [
+        or_(*(getattr(DashboardRecord, FIELDS[field]).icontains(word, autoescape=True) for field in SEARCH_FIELDS))
+        for word in (search or "").split()
+    ]
+
+
+def page_records(limit: int, cursor: str = None, sort: str = "effectiveDate", descending: bool = True,
+                 filters: dict = None, search: str = None) -> dict:
+    """One page of the dashboard list and the cursor of the next page (None after the last one).
+
+    `filters` maps FILTER_FIELDS to the exact value wanted and every word of
+    `search` must appear in one of the SEARCH_FIELDS; `total` counts every
+    matching record.
+    """
+    column = SORT_COLUMNS[sort]
+    conditions = [getattr(DashboardRecord, FIELDS[field]) == value for field, value in (filters or {}).items()]
+    conditions += search_conditions(search)
+    with SessionLocal() as session:
+        total = session.scalar(select(func.count()).select_from(DashboardRecord).where(*conditions))
+        query = select(DashboardRecord).where(*conditions)
+        if cursor:
+            value, record_id = decode_cursor(cursor, sort, descending)
+            if descending:
+                query = query.where(or_(column < value, and_(column == value, DashboardRecord.id < record_id)))
+            else:
+                query = query.where(or_(column > value, and_(column == value, DashboardRecord.id > record_id)))
+        if descending:
+            query = query.order_by(column.desc(), DashboardRecord.id.desc())
+        else:
+            query = query.order_by(column, DashboardRecord.id)
+        rows = list(session.scalars(query.limit(limit + 1)))
+        next_cursor = encode_cursor(sort, descending, rows[limit - 1]) if len(rows) > limit else None
+        return {"records": [to_api(row) for row in rows[:limit]], "next_cursor": next_cursor, "total": total}
+
+
+def update_record(record_id: int, changes: dict):
+    """Set the given API fields on one record; returns it updated, or None if there is no such record.
+
+    Raises ValueError when the change would make it a duplicate of another record.
+    """
+    with SessionLocal() as session:
+        row = session.get(DashboardRecord, record_id)
+        if row is None:
+            return None
+        for field, value in changes.items():
+            setattr(row, FIELDS[field], _column_value(value))
+        if any(field in KEY_FIELDS for field in changes):
+            row.dedupe_key = record_key(to_api(row))
+        if "effectiveDate" in changes:
+            row.effective_date_key = effective_date_key(row.effective_date)
+        _bump_version(session)
+        try:
+            session.commit()
+        except IntegrityError:
+            raise ValueError("Another record has the same property name, operator, entity and effective date")
+        record = to_api(row)
+    _rows_written(1)
+    return record
+
+
+def delete_record(record_id: int):
+    """Delete one record; returns it, or None if there is no such record."""
+    with SessionLocal() as session:
+        row = session.get(DashboardRecord, record_id)
+        if row is None:
+            return None
+        record = to_api(row)
+        session.delete(row)
+        _bump_version(session)
+        session.commit()
+    _rows_written(1)
+    return record
+
+
+def deduplicate_records() -> dict:
+    """Keep the first deployed record of each duplicate key, delete the rest.
+
+    The unique index on dedupe_key keeps new duplicates out; this cleans up
+    tables created before it.
+    """
+    with SessionLocal() as session:
+        first_ids = select(func.min(DashboardRecord.id)).group_by(DashboardRecord.dedupe_key)
+        removed = session.execute(delete(DashboardRecord).where(DashboardRecord.id.not_in(first_ids))).rowcount
+        if removed:
+            _bump_version(session)
+        session.commit()
+        remaining = session.scalar(select(func.count()).select_from(DashboardRecord))
+    _rows_written(removed)
+    return {"duplicates_removed": removed, "records_remaining": remaining}
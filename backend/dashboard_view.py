@@ -0,0 +1,66 @@
+"""
+In-process view of the dashboard pages served by GET /api/dashboard.
+
+Pages are kept serialized, keyed by their query (limit, cursor, sort, order,
+filters, search), for the current dashboard version (dashboard_store.current_version,
+bumped by every write). A poll costs one version read: if the version is
+unchanged the cached page bytes are sent as they are, and a client that
+sends back the page's ETag gets 304 without the page being built at all.
+Any write, from this process or another, changes the version and drops
+every cached page.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Serialized pages kept per process (least recently used dropped first)
+VIEW_MAX_PAGES = int(os.getenv("DASHBOARD_VIEW_PAGES", "256"))
+
+
+def page_etag(version: int, query: tuple) -> str:
+    digest = hashlib.sha1(json.dumps(query).encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+class DashboardView:
+    """Serialized dashboard pages of one dashboard version."""
+
+    def __init__(self, max_pages: int = VIEW_MAX_PAGES):
+        self.max_pages = max_pages
+        self.version = None
+        self._pages = OrderedDict()  # query -> serialized page
+        self._lock = threading.Lock()
+        self.totals = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def get(self, version: int, query: tuple):
+        """The cached page for `query` at `version`, or None."""
+        with self._lock:
+            if version != self.version:
+                self._pages.clear()
+                self.version = version
+            body = self._pages.get(query)
+            if body is None:
+                self.totals["misses"] += 1
+                return None
+            self._pages.move_to_end(query)
+            self.totals["hits"] += 1
+            return body
+
+    def put(self, version: int, query: tuple, body: bytes):
+        with self._lock:
+            if version != self.version:
+                return  # The dashboard changed while the page was being built
+            self._pages[query] = body
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def not_modified(self):
+        with self._lock:
+            self.totals["not_modified"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"version": self.version, "pages_cached": len(self._pages), **self.totals}
@@ -1,20 +1,36 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, ForeignKey, Text
+from sqlalchemy import create_engine, event, Index, Column, Integer, String, DateTime, ForeignKey, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 import os
+import pathlib
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Get database URL from environment
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL not set in environment!")
+# Get database URL from environment (Postgres in production); a local SQLite file otherwise
+DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{pathlib.Path(__file__).parent / 'dashboard.db'}"
 
 # Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+def make_engine(url: str):
+    """Engine for a database URL; SQLite files get the dashboard's pragmas."""
+    if not url.startswith("sqlite"):
+        return create_engine(url)
+    # Sessions are used from worker threads (asyncio.to_thread)
+    sqlite_engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        # Commits are appended to the write-ahead log (dashboard.db-wal) and
+        # replayed from it on the next open after a crash; readers don't block the writer
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+        # Sync the log on every commit, so a committed deploy or edit survives a power loss
+        dbapi_connection.execute("PRAGMA synchronous=FULL")
+
+    return sqlite_engine
+
+engine = make_engine(DATABASE_URL)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -36,23 +52,44 @@ class Entity(Base):
 # Dashboard record model
 class DashboardRecord(Base):
     __tablename__ = "dashboard_records"
+    # Dashboard sort orders (id breaks ties), also used for filters on their first column
+    __table_args__ = (
+        Index("ix_dashboard_records_effective_date_key_id", "effective_date_key", "id"),
+        Index("ix_dashboard_records_property_name_id", "property_name", "id"),
+        Index("ix_dashboard_records_operator_id", "operator", "id"),
+        Index("ix_dashboard_records_entity_id", "entity", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     operator = Column(String)
     entity = Column(String)
-    state = Column(String)
-    effective_date = Column(DateTime)
+    state = Column(String, index=True)
+    # As written on the division order ("3/1/25", "FIRST SALES"), so kept as text
+    effective_date = Column(String)
+    # effective_date as YYYY-MM-DD for sorting, "" when it isn't a date
+    effective_date_key = Column(String, default="")
     property_name = Column(String)
     property_description = Column(Text)
-    decimal_interest = Column(Float)
-    county = Column(String)
+    # Text so values like "0.01900000" come back exactly as deployed
+    decimal_interest = Column(String)
+    county = Column(String, index=True)
+    status = Column(String, default="", index=True)
     notes = Column(Text, nullable=True)
+    # Lowercased property name, operator, entity and effective date: one record per key
+    dedupe_key = Column(String, index=True, unique=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+# Dashboard version: one row, incremented by every transaction that changes dashboard_records
+class DashboardState(Base):
+    __tablename__ = "dashboard_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 # Create all tables
-def create_tables():
-    Base.metadata.create_all(bind=engine)
+def create_tables(bind=engine):
+    Base.metadata.create_all(bind=bind)
 
 # Get database session
 def get_db():
@@ -0,0 +1,169 @@
+"""
+Content-addressed caches for division order extractions.
+
+ExtractionCache entries are keyed by the SHA-256 of the uploaded PDF bytes
+combined with the OCR configuration and system prompt version, and hold both
+the extracted text and Claude's parsed JSON. PageTextCache holds OCR text per
+page, keyed by a hash of the page content, so amended documents only re-OCR
+the pages that changed. Both live in one SQLite file and evict the least
+recently used entries once they grow past their size limits.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import time
+
+CACHE_DIR = pathlib.Path(__file__).parent / "cache"
+CACHE_DB_PATH = pathlib.Path(os.getenv("EXTRACTION_CACHE_PATH", str(CACHE_DIR / "extraction_cache.db")))
+
+# Total size of cached text + JSON before least recently used entries are evicted
+CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+
+# Set EXTRACTION_CACHE=0 to disable the cache entirely
+CACHE_ENABLED = os.getenv("EXTRACTION_CACHE", "1") != "0"
+
+
+def make_cache_key(pdf_content: bytes, *versions: str) -> str:
+    """Build a cache key from the PDF bytes and the versions that affect the result."""
+    digest = hashlib.sha256(pdf_content)
+    for version in versions:
+        digest.update(b"\0")
+        digest.update(version.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _SQLiteLRUCache:
+    """Shared SQLite plumbing and size-bounded LRU eviction for one cache table."""
+
+    table = None
+    schema = None
+
+    def __init__(self, db_path=CACHE_DB_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.db_path = pathlib.Path(db_path)
+        self.max_bytes = max_bytes
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(self.schema)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_used ON {self.table} (last_used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _evict(self, conn):
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_used ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        print(f"Cache {self.table} evicted {evicted} entries ({total} bytes remaining)")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries, total = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        return {"entries": entries, "bytes": total, "max_bytes": self.max_bytes}
+
+
+class ExtractionCache(_SQLiteLRUCache):
+    """SQLite-backed LRU cache of extracted text and parsed Claude output."""
+
+    table = "extractions"
+    schema = """
+        CREATE TABLE IF NOT EXISTS extractions (
+            key TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            data TEXT NOT NULL,
+            is_scanned INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """
+
+    def get(self, key: str):
+        """Return {"text", "data", "is_scanned"} for a cached extraction, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text, data, is_scanned FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE extractions SET last_used = ? WHERE key = ?", (time.time(), key))
+        return {
+            "text": row[0],
+            "data": json.loads(row[1]),
+            "is_scanned": bool(row[2]),
+        }
+
+    def put(self, key: str, text: str, data: dict, is_scanned: bool):
+        """Store an extraction and evict old entries if the cache is over its limit."""
+        data_json = json.dumps(data)
+        size = len(text.encode("utf-8")) + len(data_json.encode("utf-8"))
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, text, data, is_scanned, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, text, data_json, int(is_scanned), size, now, now),
+            )
+            self._evict(conn)
+
+
+class PageTextCache(_SQLiteLRUCache):
+    """SQLite-backed LRU cache of OCR text for individual pages."""
+
+    table = "page_texts"
+    schema = """
+        CREATE TABLE IF NOT EXISTS page_texts (
+            key TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """
+
+    def __init__(self, db_path=CACHE_DB_PATH, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        super().__init__(db_path, max_bytes)
+
+    def get_many(self, keys: list) -> dict:
+        """Return {key: text} for every key that is cached."""
+        if not keys:
+            return {}
+        found = {}
+        with self._connect() as conn:
+            for key in set(keys):
+                row = conn.execute("SELECT text FROM page_texts WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    found[key] = row[0]
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE page_texts SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+        return found
+
+    def put_many(self, entries: dict):
+        """Store {key: text} page entries and evict old entries if over the limit."""
+        if not entries:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO page_texts (key, text, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(key, text, len(text.encode("utf-8")), now, now) for key, text in entries.items()],
+            )
+            self._evict(conn)
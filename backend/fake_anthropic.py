@@ -0,0 +1,259 @@
+"""
+Local stand-in for the Anthropic Messages API, for benchmarks and manual tests.
+
+Answers POST /v1/messages (plain and "stream": true) with one well per
+decimal interest found in the document it was sent (or in the DOCUMENT PART
+section of a chunked request). Response time grows with the number of wells,
+like real generation, and a system prompt marked cache_control is reported as
+a cache write the first time and a cache read afterwards.
+
+Statuses put in server.fail_next (e.g. 529 overloaded, 429 rate limited) are
+returned for the next message requests instead, server.first_byte_delay
+holds back the start of every message response (a stalled request), and
+server.max_in_flight records the most concurrent requests seen.
+
+Message Batches (POST and GET /v1/messages/batches, GET .../{id} and
+.../{id}/results) are answered the same way; a batch ends batch_seconds
+after it was created. Requests containing ERROR_MARKER come back errored,
+and those containing TRUNCATE_MARKER stop at max_tokens partway through
+their wells.
+Run it on its own and point the backend at it:
+
+    python fake_anthropic.py [port] [seconds_per_well]
+    ANTHROPIC_BASE_URL=http://127.0.0.1:9100 ANTHROPIC_API_KEY=test python main.py
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DECIMAL = re.compile(r'(?<![\d.])(0?\.\d{4,}|1\.0{4,})(?![\d.])')
+PART = re.compile(r'=== DOCUMENT PART \d+ OF \d+ ===\n(.*)\n=== END DOCUMENT PART ===', re.S)
+
+# Characters per streamed text delta
+STREAM_DELTA_CHARS = 40
+
+# Batch requests whose message contains this marker come back errored
+ERROR_MARKER = "FAKE_API_ERROR"
+
+# Batch requests whose message contains this marker stop at max_tokens, partway through the wells
+TRUNCATE_MARKER = "FAKE_MAX_TOKENS"
+
+
+def extraction_result(content: str) -> dict:
+    """The extraction JSON for a user message: one well per decimal interest."""
+    match = PART.search(content)
+    document = match.group(1) if match else content
+    wells = [
+        {"propertyName": f"WELL {i} ({value})", "propertyDescription": "", "decimalInterest": value, "county": ""}
+        for i, value in enumerate(DECIMAL.findall(document), 1)
+    ]
+    return {"operator": "OPERATOR", "entity": "ENTITY", "state": "Texas",
+            "effectiveDate": "01/01/2025", "wells": wells}
+
+
+class FakeAnthropicHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))))
+        if self.path.startswith("/v1/messages/batches"):
+            self._create_batch(body)
+            return
+        with self.server.lock:
+            self.server.requests += 1
+            status = self.server.fail_next.pop(0) if self.server.fail_next else None
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        try:
+            time.sleep(self.server.first_byte_delay)
+            if status is not None:
+                self._send_error(status)
+                return
+            message, text = self._message(body)
+            delay = self.server.seconds_per_well * len(json.loads(text)["wells"])
+            if body.get("stream"):
+                self._stream(message, text, delay)
+                return
+            time.sleep(delay)
+            message.update(content=[{"type": "text", "text": text}], stop_reason="end_turn")
+            self._send_json(message)
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/v1/messages/batches":
+            with self.server.lock:
+                batches = sorted(self.server.batches.values(), key=lambda batch: batch["created"], reverse=True)
+            data = [self._batch_object(batch) for batch in batches]
+            self._send_json({"data": data, "has_more": False,
+                             "first_id": data[0]["id"] if data else None, "last_id": data[-1]["id"] if data else None})
+            return
+        match = re.fullmatch(r'/v1/messages/batches/([\w-]+)(/results)?', self.path.split("?")[0])
+        batch = self.server.batches.get(match.group(1)) if match else None
+        if batch is None:
+            self._send_json({"type": "error", "error": {"type": "not_found_error", "message": "Not found"}}, 404)
+        elif match.group(2):
+            self._send_results(batch)
+        else:
+            self._send_json(self._batch_object(batch))
+
+    def _message(self, body: dict) -> tuple:
+        """(message object without content, response text) for a Messages API request body."""
+        content = body["messages"][0]["content"]
+        text = json.dumps(extraction_result(content), indent=2)
+        usage = {"input_tokens": len(content) // 4, "output_tokens": len(text) // 4}
+        usage.update(self._cache_usage(body.get("system")))
+        message = {
+            "id": "msg_fake", "type": "message", "role": "assistant", "model": body["model"],
+            "content": [], "stop_reason": None, "stop_sequence": None, "usage": usage,
+        }
+        return message, text
+
+    def _create_batch(self, body: dict):
+        with self.server.lock:
+            batch_id = f"msgbatch_fake{len(self.server.batches) + 1}"
+            self.server.batches[batch_id] = {
+                "id": batch_id, "requests": body["requests"], "created": time.time(),
+            }
+        self._send_json(self._batch_object(self.server.batches[batch_id]))
+
+    def _batch_object(self, batch: dict) -> dict:
+        """Message Batch object; a batch ends batch_seconds after it was created."""
+        ended = time.time() - batch["created"] >= self.server.batch_seconds
+        total = len(batch["requests"])
+        errored = sum(1 for request in batch["requests"] if ERROR_MARKER in request["params"]["messages"][0]["content"])
+        created = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(batch["created"]))
+        return {
+            "id": batch["id"], "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else total,
+                "succeeded": total - errored if ended else 0,
+                "errored": errored if ended else 0,
+                "canceled": 0, "expired": 0,
+            },
+            "created_at": created, "expires_at": created, "ended_at": created if ended else None,
+            "archived_at": None, "cancel_initiated_at": None,
+            "results_url": f"http://{self.headers['host']}/v1/messages/batches/{batch['id']}/results" if ended else None,
+        }
+
+    def _send_results(self, batch: dict):
+        lines = []
+        for request in batch["requests"]:
+            params = request["params"]
+            if ERROR_MARKER in params["messages"][0]["content"]:
+                result = {"type": "errored", "error": {"type": "error", "error": {
+                    "type": "invalid_request_error", "message": "Fake error"}}}
+            else:
+                message, text = self._message(params)
+                stop_reason = "end_turn"
+                if TRUNCATE_MARKER in params["messages"][0]["content"]:
+                    text, stop_reason = text[:len(text) * 3 // 4], "max_tokens"
+                message.update(content=[{"type": "text", "text": text}], stop_reason=stop_reason)
+                result = {"type": "succeeded", "message": message}
+            lines.append(json.dumps({"custom_id": request["custom_id"], "result": result}))
+        payload = ("\n".join(lines) + "\n").encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/binary")
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _cache_usage(self, system) -> dict:
+        """Prompt cache tokens: a cacheable system prompt is written on first use and read afterwards."""
+        if not isinstance(system, list):
+            return {}
+        cached = "".join(block["text"] for block in system if block.get("cache_control"))
+        if not cached:
+            return {}
+        tokens = len(cached) // 4
+        with self.server.lock:
+            hit = cached in self.server.prompt_cache
+            self.server.prompt_cache.add(cached)
+        if hit:
+            return {"cache_creation_input_tokens": 0, "cache_read_input_tokens": tokens}
+        return {"cache_creation_input_tokens": tokens, "cache_read_input_tokens": 0}
+
+    def _send_error(self, status: int):
+        error_type = {429: "rate_limit_error", 529: "overloaded_error"}.get(status, "api_error")
+        self._send_json({"type": "error", "error": {"type": error_type, "message": f"Fake {status}"}}, status)
+
+    def _send_json(self, data: dict, status: int = 200):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, message: dict, text: str, delay: float):
+        """Send the response as server-sent events, spreading the delay over the text deltas."""
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("connection", "close")
+        self.end_headers()
+        deltas = [text[i:i + STREAM_DELTA_CHARS] for i in range(0, len(text), STREAM_DELTA_CHARS)]
+        self._event("message_start", {"type": "message_start", "message": message})
+        self._event("content_block_start", {"type": "content_block_start", "index": 0,
+                                            "content_block": {"type": "text", "text": ""}})
+        for delta in deltas:
+            time.sleep(delay / len(deltas))
+            self._event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                "delta": {"type": "text_delta", "text": delta}})
+        self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._event("message_delta", {"type": "message_delta",
+                                      "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                      "usage": {"output_tokens": message["usage"]["output_tokens"]}})
+        self._event("message_stop", {"type": "message_stop"})
+
+    def _event(self, name: str, data: dict):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeAnthropicServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return  # The client gave up on the request (timeouts, cancelled streams)
+        super().handle_error(request, client_address)
+
+
+def start_fake_anthropic(port: int = 0, seconds_per_well: float = 0.02,
+                         batch_seconds: float = 1.0) -> FakeAnthropicServer:
+    """Serve the fake API from a background thread; its base URL is fake_base_url(server)."""
+    server = FakeAnthropicServer(("127.0.0.1", port), FakeAnthropicHandler)
+    server.seconds_per_well = seconds_per_well
+    server.batch_seconds = batch_seconds
+    server.batches = {}
+    server.fail_next = []  # HTTP statuses to answer the next message requests with
+    server.first_byte_delay = 0  # Seconds before a message response starts
+    server.requests = 0
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.prompt_cache = set()
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fake_base_url(server: FakeAnthropicServer) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 9100
+    seconds_per_well = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    server = start_fake_anthropic(port, seconds_per_well)
+    print(f"Fake Anthropic API on {fake_base_url(server)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,55 @@
+"""
+One-shot import of the JSON dashboard files into the dashboard database.
+
+Imports the newest file in dashboard_data/ (the one the JSON-backed dashboard
+showed) unless files are given. Records already in the database are skipped
+as duplicates, so running it again does not add them twice.
+
+    python import_dashboard_json.py [file.json ...]
+"""
+
+import glob
+import json
+import os
+import pathlib
+import sys
+
+import dashboard_store
+from database import engine
+
+DASHBOARD_DATA_DIR = pathlib.Path(os.getenv("DASHBOARD_DATA_DIR", str(pathlib.Path(__file__).parent / "dashboard_data")))
+
+
+def latest_dashboard_file():
+    json_files = glob.glob(str(DASHBOARD_DATA_DIR / "*.json"))
+    if not json_files:
+        return None
+    return max(json_files, key=os.path.getctime)
+
+
+def import_files(paths: list) -> dict:
+    dashboard_store.init_store()
+    totals = {"new_records_added": 0, "duplicates_skipped": 0}
+    for path in paths:
+        with open(path) as f:
+            data = json.load(f)
+        records = data if isinstance(data, list) else [data]
+        result = dashboard_store.deploy_records(records)
+        print(f"{path}: {len(records)} records, {result['new_records_added']} imported, "
+              f"{result['duplicates_skipped']} duplicates skipped")
+        totals["new_records_added"] += result["new_records_added"]
+        totals["duplicates_skipped"] += result["duplicates_skipped"]
+    return totals
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:]
+    if not paths:
+        latest = latest_dashboard_file()
+        if latest is None:
+            print(f"No JSON files found in {DASHBOARD_DATA_DIR}")
+            sys.exit(1)
+        paths = [latest]
+    print(f"Importing into {engine.url.render_as_string(hide_password=True)}")
+    totals = import_files(paths)
+    print(f"Imported {totals['new_records_added']} records ({totals['duplicates_skipped']} duplicates skipped)")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Upload Load Test
+Measures /api/dashboard latency while PDF uploads are in flight, to check that
+OCR and Claude calls no longer block the event loop.
+
+Start the backend first (python main.py), then run:
+    python load_test_upload.py [pdf_path] [concurrent_uploads] [dashboard_requests]
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = "http://localhost:8000"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def poll_dashboard(count, latencies, stop_event=None):
+    for _ in range(count):
+        if stop_event is not None and stop_event.is_set():
+            break
+        start = time.perf_counter()
+        response = requests.get(f"{BASE_URL}/api/dashboard")
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            print(f"Dashboard returned {response.status_code}")
+
+
+def upload(pdf_path):
+    start = time.perf_counter()
+    with open(pdf_path, "rb") as f:
+        response = requests.post(
+            f"{BASE_URL}/api/upload",
+            files={"file": (pdf_path, f, "application/pdf")},
+        )
+    return response.status_code, time.perf_counter() - start
+
+
+def report(label, latencies):
+    print(f"{label}: n={len(latencies)} "
+          f"p50={percentile(latencies, 50):.1f}ms "
+          f"p95={percentile(latencies, 95):.1f}ms "
+          f"p99={percentile(latencies, 99):.1f}ms "
+          f"max={max(latencies, default=0):.1f}ms")
+
+
+def run_load_test(pdf_path="test.pdf", concurrent_uploads=4, dashboard_requests=200):
+    try:
+        requests.get(f"{BASE_URL}/api/dashboard")
+    except requests.exceptions.ConnectionError:
+        print("Could not connect to server. Make sure it's running on port 8000.")
+        sys.exit(1)
+
+    # Baseline: dashboard reads with no uploads running
+    idle_latencies = []
+    poll_dashboard(dashboard_requests, idle_latencies)
+    report("Dashboard (idle)", idle_latencies)
+
+    # Dashboard reads while uploads are in flight
+    busy_latencies = []
+    stop_event = threading.Event()
+    poller = threading.Thread(
+        target=poll_dashboard, args=(dashboard_requests * 10, busy_latencies, stop_event)
+    )
+    with ThreadPoolExecutor(max_workers=concurrent_uploads) as executor:
+        futures = [executor.submit(upload, pdf_path) for _ in range(concurrent_uploads)]
+        poller.start()
+        for future in futures:
+            status, elapsed = future.result()
+            print(f"Upload finished: status={status} time={elapsed:.1f}s")
+    stop_event.set()
+    poller.join()
+    report(f"Dashboard ({concurrent_uploads} uploads in flight)", busy_latencies)
+
+
+if __name__ == "__main__":
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else "test.pdf"
+    concurrent_uploads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    dashboard_requests = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    run_load_test(pdf_path, concurrent_uploads, dashboard_requests)
@@ -1,25 +1,30 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from PyPDF2 import PdfReader
+from fastapi.responses import StreamingResponse
 import pytesseract
-from PIL import Image
-import io
 import anthropic
+import asyncio
 import os
 from dotenv import load_dotenv
 import tempfile
-import fitz  # PyMuPDF
 import json
-from datetime import datetime
 import pathlib
-import glob
 from PIL import ImageEnhance
-import re
 from PIL import ImageOps
+from pdf_document import PDFDocument
+from ocr import ocr_pdf_pages, shutdown_ocr_pool, ocr_config_signature, warm_up_ocr, ocr_metrics, OCR_WARMUP
+from extraction_cache import ExtractionCache, PageTextCache, make_cache_key, CACHE_ENABLED
+from well_parser import extract_division_order, normalize_state, LOCAL_PARSER_VERSION
+from chunked_extraction import extract_in_chunks
+from response_parser import WellStreamParser, parse_extraction_response
+from claude_client import ExtractionClient, ClaudeUnavailableError, is_retryable
+import hashlib
+import dashboard_store
+from dashboard_view import DashboardView, page_etag
+from database import engine
 
-# Set Tesseract path
+# Tesseract path is set in ocr.py so OCR worker processes share it
 try:
-    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
     # Verify Tesseract installation
     version = pytesseract.get_tesseract_version()
     print(f"Tesseract version: {version}")
@@ -44,14 +49,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create dashboard_data directory if it doesn't exist
-DASHBOARD_DATA_DIR = pathlib.Path(__file__).parent / "dashboard_data"
-DASHBOARD_DATA_DIR.mkdir(exist_ok=True)
-print(f"Dashboard data directory: {DASHBOARD_DATA_DIR}")
+# Dashboard records live in the database (see dashboard_store.py)
+dashboard_store.init_store()
+print(f"Dashboard database: {engine.url.render_as_string(hide_password=True)}")
 
-# Initialize Claude client
+# Records per page of GET /api/dashboard
+DASHBOARD_PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", "100"))
+DASHBOARD_MAX_PAGE_SIZE = 1000
+
+# Serialized dashboard pages of the current dashboard version
+dashboard_view = DashboardView()
+
+@app.on_event("startup")
+async def start_ocr_workers():
+    # Load the OCR engine in every worker now rather than on the first upload
+    if not OCR_WARMUP:
+        return
+    try:
+        await asyncio.to_thread(warm_up_ocr)
+    except Exception as e:
+        print(f"Error warming up OCR engine: {str(e)}")
+
+@app.on_event("shutdown")
+def stop_ocr_workers():
+    shutdown_ocr_pool()
+
+@app.on_event("shutdown")
+def checkpoint_dashboard():
+    # Leave the dashboard database as a single file
+    dashboard_store.checkpoint()
+
+# Initialize Claude client (async so uploads don't block the event loop). One
+# client for the whole app, so its HTTP connections are reused across uploads
 api_key = os.getenv("ANTHROPIC_API_KEY")
-claude = anthropic.Anthropic(api_key=api_key)
+claude = anthropic.AsyncAnthropic(api_key=api_key)
+CLAUDE_MODEL = "claude-3-7-sonnet-20250219"
 
 # Define system prompt for Claude
 system_prompt = """You are a specialized assistant for extracting information from division orders. Your task is to analyze the provided text and extract specific information into a JSON object.
@@ -126,208 +158,137 @@ Create TWO separate entries:
 
 Remember: Your primary goal is to extract EVERY well from the document, no matter how many there are or how they are formatted."""
 
-# US state name to abbreviation mapping
-STATE_ABBREVIATIONS = {
-    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
-    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'florida': 'FL', 'georgia': 'GA',
-    'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA',
-    'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD',
-    'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO',
-    'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ',
-    'new mexico': 'NM', 'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH',
-    'oklahoma': 'OK', 'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC',
-    'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT',
-    'virginia': 'VA', 'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
-    'district of columbia': 'DC', 'dc': 'DC',
-}
-for abbr in list(STATE_ABBREVIATIONS.values()):
-    STATE_ABBREVIATIONS[abbr.lower()] = abbr
+# Changes whenever the prompt or model changes, so cached extractions are not reused across them
+SYSTEM_PROMPT_VERSION = hashlib.sha256(f"{CLAUDE_MODEL}\n{system_prompt}".encode("utf-8")).hexdigest()[:12]
 
-def normalize_state(state):
-    if not state:
-        return state
-    s = str(state).strip().lower()
-    return STATE_ABBREVIATIONS.get(s, state)
+# Prompt caching for the system prompt, boilerplate stripping and token usage per request
+claude_client = ExtractionClient(claude, CLAUDE_MODEL, system_prompt)
 
-def is_scanned_pdf(pdf_content: bytes) -> bool:
-    """Check if the PDF is scanned (image-based) or text-based."""
+# Cache of extracted text + parsed data keyed by PDF hash (EXTRACTION_CACHE=0 disables)
+extraction_cache = ExtractionCache() if CACHE_ENABLED else None
+# Cache of OCR text per page, so amended documents only re-OCR changed pages
+page_text_cache = PageTextCache() if CACHE_ENABLED else None
+
+def is_scanned_pdf(pdf) -> bool:
+    """Check if the PDF (a PDFDocument or raw bytes) is scanned (image-based) or text-based."""
     try:
-        pdf_file = io.BytesIO(pdf_content)
-        reader = PdfReader(pdf_file)
-        
-        # Try to extract text from first page
-        first_page = reader.pages[0]
-        text = first_page.extract_text()
-        print(f"Initial text extraction length: {len(text.strip())} characters")
-        
-        # If we get very little text, it's likely scanned
-        if len(text.strip()) < 100:
-            print("PDF appears to be scanned (little text extracted)")
-            return True
-            
-        # Additional check: look for images in the PDF
-        if '/XObject' in first_page['/Resources']:
-            x_objects = first_page['/Resources']['/XObject'].get_object()
-            for obj in x_objects:
-                if x_objects[obj]['/Subtype'] == '/Image':
-                    print("PDF contains images, likely scanned")
-                    return True
-        
-        print("PDF appears to be text-based")
-        return False
+        if isinstance(pdf, bytes):
+            with PDFDocument(pdf) as document:
+                return document.is_scanned()
+        return pdf.is_scanned()
     except Exception as e:
         print(f"Error in is_scanned_pdf: {str(e)}")
         print("Assuming PDF is scanned due to error")
         return True
 
-def extract_text_from_pdf(pdf_content: bytes) -> str:
-    """Extract text from PDF, handling both scanned and text-based PDFs."""
-    try:
-        # First try direct text extraction
-        pdf_file = io.BytesIO(pdf_content)
-        reader = PdfReader(pdf_file)
-        direct_text = ""
-        for page in reader.pages:
-            try:
-                page_text = page.extract_text()
-                if page_text:
-                    direct_text += page_text + "\n"
-            except Exception as e:
-                print(f"Error in direct text extraction: {str(e)}")
-                continue
-        
-        # If we got substantial text directly, use it
-        if len(direct_text.strip()) > 100:
-            print("Successfully extracted text directly from PDF")
-            return direct_text
+# Pages with at least this much native text are used as-is; the rest are OCR'd
+NATIVE_TEXT_MIN_CHARS = int(os.getenv("NATIVE_TEXT_MIN_CHARS", "100"))
+
+# Keywords that mark a line as a possible part of a well entry
+WELL_LINE_KEYWORDS = ['well', 'property', 'interest', 'decimal', 'section', 'township', 'range', 'lease', 'unit']
+
+def group_well_lines(text: str) -> tuple:
+    """Post-process OCR text to better handle tables and lists.
+
+    Returns (processed_text, well_count).
+    """
+    lines = text.split('\n')
+    processed_lines = []
+    current_well = []
+    well_count = 0
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
             
-        print("Direct text extraction yielded little text, trying OCR...")
-        
-        # If direct extraction didn't work well, try OCR
-        doc = fitz.open(stream=pdf_file, filetype="pdf")
-        text = ""
-        total_pages = len(doc)
-        print(f"Total pages in PDF: {total_pages}")
-        
-        # Use single, optimized OCR configuration for consistent results
-        configs = [
-            '--oem 3 --psm 12',  # Default engine, sparse text with OSD
+        # Check if line might be part of a well entry
+        if any(keyword in line.lower() for keyword in WELL_LINE_KEYWORDS):
+            if current_well:
+                processed_lines.append(' '.join(current_well))
+                well_count += 1
+                current_well = []
+            current_well.append(line)
+        else:
+            if current_well:
+                processed_lines.append(' '.join(current_well))
+                well_count += 1
+                current_well = []
+            processed_lines.append(line)
+    
+    if current_well:
+        processed_lines.append(' '.join(current_well))
+        well_count += 1
+    
+    return '\n'.join(processed_lines), well_count
+
+def extract_text_from_pdf(pdf, stats: dict = None) -> str:
+    """Extract text from PDF (a PDFDocument or raw bytes), handling both scanned and text-based PDFs.
+
+    Each page uses its native text when it has some and is OCR'd when it is an
+    image (a short page without images keeps its native text), so mixed
+    documents (typed cover letter + scanned exhibit) keep both parts.
+    If `stats` is given, native/OCR page counts and page text cache hit/miss
+    counts are recorded in it.
+    """
+    if isinstance(pdf, bytes):
+        with PDFDocument(pdf) as document:
+            return extract_text_from_pdf(document, stats)
+    try:
+        # Native text for every page (already parsed once by PyMuPDF)
+        native_texts = pdf.page_texts()
+        # Short pages without images (blank, signature, "Page N of M") keep their native text
+        ocr_page_nums = [
+            page_num for page_num, page_text in enumerate(native_texts)
+            if len(page_text.strip()) < NATIVE_TEXT_MIN_CHARS and pdf.page_has_images(page_num)
         ]
+        native_page_count = len(native_texts) - len(ocr_page_nums)
+        print(f"{native_page_count} pages have native text, {len(ocr_page_nums)} pages need OCR")
+        if stats is not None:
+            stats["native_pages"] = native_page_count
+            stats["ocr_pages"] = len(ocr_page_nums)
+            stats["ocr_text_pages"] = 0
+        
+        # If every page has substantial text, use it directly
+        if not ocr_page_nums:
+            print("Successfully extracted text directly from PDF")
+            return pdf.native_text()
         
-        for page_num, page in enumerate(doc):
-            print(f"\nProcessing page {page_num + 1} of {total_pages}")
-            try:
-                # Get page as image with higher resolution
-                pix = page.get_pixmap(matrix=fitz.Matrix(4, 4))  # Increased resolution
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                print(f"Image size: {img.size}")
-                
-                # Enhanced image preprocessing
-                img = img.convert('L')  # Convert to grayscale
-                
-                # Use single, optimized OCR configuration for consistent results
-                configs = [
-                    '--oem 3 --psm 12',  # Default engine, sparse text with OSD
-                ]
-                
-                best_text = ""
-                best_score = 0
-                
-                # Try the single OCR configuration
-                for config in configs:
-                    try:
-                        page_text = pytesseract.image_to_string(img, config=config)
-                        
-                        # Score the text quality
-                        words = page_text.split()
-                        score = len(words) * 10  # Base score from word count
-                        
-                        # Bonus for longer text
-                        if len(page_text) > 100:
-                            score += 100
-                        if len(page_text) > 500:
-                            score += 200
-                        if len(page_text) > 1000:
-                            score += 300
-                        
-                        # Penalty for garbage patterns
-                        garbage_patterns = [
-                            'qqqqqqqqqq', 'wwwwwwwwww', 'eeeeeeeeee', 'rrrrrrrrrr',
-                            'tttttttttt', 'yyyyyyyyyy', 'uuuuuuuuuu', 'iiiiiiiiii',
-                            'oooooooooo', 'pppppppppp', 'aaaaaaaaaa', 'ssssssssss',
-                            'dddddddddd', 'ffffffffff', 'gggggggggg', 'hhhhhhhhhh',
-                            'jjjjjjjjjj', 'kkkkkkkkkk', 'llllllllll', 'zzzzzzzzzz',
-                            'xxxxxxxxxx', 'cccccccccc', 'vvvvvvvvvv', 'bbbbbbbbbb',
-                            'nnnnnnnnnn', 'mmmmmmmmmm'
-                        ]
-                        
-                        for pattern in garbage_patterns:
-                            if pattern in page_text.lower():
-                                score -= 500
-                        
-                        # Bonus for common legal/division order terms
-                        legal_terms = ['operator', 'entity', 'well', 'interest', 'county', 'state', 'effective', 'date']
-                        for term in legal_terms:
-                            if term.lower() in page_text.lower():
-                                score += 50
-                        
-                        if score > best_score:
-                            best_text = page_text
-                            best_score = score
-                            print(f"Page {page_num + 1}, Config: {config} - Score: {score}, Words: {len(words)}")
-                            
-                    except Exception as e:
-                        print(f"Error with config {config}: {e}")
-                        continue
-                
-                if best_text.strip():
-                    print(f"Successfully extracted text from page {page_num + 1} (score: {best_score})")
-                    print(f"Text length: {len(best_text)} characters")
-                    text += best_text + "\n"
-                else:
-                    print(f"Warning: No readable text extracted from page {page_num + 1}")
-                
-            except Exception as e:
-                print(f"Error processing page {page_num + 1}: {str(e)}")
-                print("Full traceback:")
-                import traceback
-                print(traceback.format_exc())
-                continue
-        
-        if not text.strip():
-            raise Exception("No text could be extracted from the PDF using either method")
+        # OCR only the image-only pages (fanned out across worker processes)
+        ocr_texts = dict(zip(
+            ocr_page_nums,
+            ocr_pdf_pages(pdf, ocr_page_nums, page_cache=page_text_cache, stats=stats)
+        ))
         
-        # Post-process the text to better handle tables and lists
-        lines = text.split('\n')
-        processed_lines = []
-        current_well = []
+        page_texts = []
         well_count = 0
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
+        ocr_text_pages = 0
+        for page_num, native_text in enumerate(native_texts):
+            if page_num not in ocr_texts:
+                page_texts.append(native_text)
                 continue
-                
-            # Check if line might be part of a well entry
-            if any(keyword in line.lower() for keyword in ['well', 'property', 'interest', 'decimal', 'section', 'township', 'range', 'lease', 'unit']):
-                if current_well:
-                    processed_lines.append(' '.join(current_well))
-                    well_count += 1
-                    current_well = []
-                current_well.append(line)
+            
+            page_text = ocr_texts[page_num]
+            if page_text.strip():
+                print(f"Successfully extracted text from page {page_num + 1}")
+                print(f"Text length: {len(page_text)} characters")
+                processed_text, page_well_count = group_well_lines(page_text)
+                page_texts.append(processed_text)
+                well_count += page_well_count
+                ocr_text_pages += 1
             else:
-                if current_well:
-                    processed_lines.append(' '.join(current_well))
-                    well_count += 1
-                    current_well = []
-                processed_lines.append(line)
+                print(f"Warning: No readable text extracted from page {page_num + 1}")
+                # Keep whatever little native text the page had
+                page_texts.append(native_text)
         
-        if current_well:
-            processed_lines.append(' '.join(current_well))
-            well_count += 1
+        text = '\n'.join(page_text.strip('\n') for page_text in page_texts if page_text.strip())
+        if not text.strip():
+            raise Exception("No text could be extracted from the PDF using either method")
         
-        print(f"Found {well_count} potential well entries in the text")
-        return '\n'.join(processed_lines)
+        if stats is not None:
+            stats["ocr_text_pages"] = ocr_text_pages
+        print(f"Found {well_count} potential well entries in the OCR text")
+        return text
         
     except Exception as e:
         print(f"Error in extract_text_from_pdf: {str(e)}")
@@ -336,8 +297,153 @@ def extract_text_from_pdf(pdf_content: bytes) -> str:
         print(traceback.format_exc())
         raise
 
+DEBUG_DIR = pathlib.Path(__file__).parent / "debug"
+
+# Concurrency limits for the stages of /api/upload-multiple: text extraction/OCR
+# is CPU-bound, Claude calls are I/O-bound and bounded by the API rate limit
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", "2"))
+CLAUDE_CONCURRENCY = int(os.getenv("CLAUDE_CONCURRENCY", "4"))
+extraction_semaphore = asyncio.Semaphore(EXTRACTION_CONCURRENCY)
+claude_semaphore = asyncio.Semaphore(CLAUDE_CONCURRENCY)
+
+def write_debug_text(path, text: str):
+    """Write a debug text file (run via asyncio.to_thread from request handlers)."""
+    DEBUG_DIR.mkdir(exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def write_debug_json(path, data):
+    """Write a debug JSON file (run via asyncio.to_thread from request handlers)."""
+    DEBUG_DIR.mkdir(exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+# Long documents can be split into parts that are extracted concurrently and
+# merged (CLAUDE_CHUNKING=auto); shorter ones always go in a single request
+CLAUDE_CHUNKING = os.getenv("CLAUDE_CHUNKING", "off")
+CLAUDE_CHUNK_CHARS = int(os.getenv("CLAUDE_CHUNK_CHARS", "15000"))
+CLAUDE_CHUNK_CONCURRENCY = int(os.getenv("CLAUDE_CHUNK_CONCURRENCY", "4"))
+
+async def send_claude_message(content: str) -> str:
+    """Send one user message with the extraction system prompt and return the response text."""
+    return await claude_client.send(content)
+
+def extraction_message(text: str) -> str:
+    return f"Please analyze this division order and extract the information:\n\n{text}"
+
+async def request_claude_extraction(text: str) -> str:
+    """Send extracted division order text to Claude and return the raw response text."""
+    return await send_claude_message(extraction_message(text))
+
+def is_transient_claude_error(error: Exception) -> bool:
+    """Whether a failed Claude extraction is worth resubmitting later (overload, rate limit, outage)."""
+    return isinstance(error, (ClaudeUnavailableError, TimeoutError)) or is_retryable(error)
+
+def use_chunking(text: str) -> bool:
+    return CLAUDE_CHUNKING == "auto" and len(text) > CLAUDE_CHUNK_CHARS
+
+async def run_claude_extraction(text: str) -> tuple:
+    """Extract with Claude, in concurrent parts when chunking applies; return (response_text, parsed_data)."""
+    text = claude_client.prepare_text(text)
+    if use_chunking(text):
+        return await extract_in_chunks(
+            text, send_claude_message, parse_claude_response, CLAUDE_CHUNK_CHARS, CLAUDE_CHUNK_CONCURRENCY
+        )
+    response_text = await request_claude_extraction(text)
+    return response_text, parse_claude_response(response_text)
+
+async def stream_claude_extraction(text: str):
+    """Stream Claude's extraction, yielding ("well", well) as each well is completed and finally ("response", text)."""
+    parser = WellStreamParser()
+    async for delta in claude_client.stream(extraction_message(claude_client.prepare_text(text))):
+        for well in parser.feed(delta):
+            yield "well", well
+    yield "response", parser.text
+
+# Text-based PDFs in a layout well_parser recognizes are extracted by rules and
+# only sent to Claude when the parse confidence is below the minimum
+# (LOCAL_EXTRACTION=0 sends every document to Claude)
+LOCAL_EXTRACTION = os.getenv("LOCAL_EXTRACTION", "1") != "0"
+LOCAL_EXTRACTION_MIN_CONFIDENCE = float(os.getenv("LOCAL_EXTRACTION_MIN_CONFIDENCE", "0.95"))
+
+def local_extraction(text: str, extraction_stats: dict):
+    """Parse a PDF's text with the layout rules; None means it needs Claude.
+
+    Only text that is all native is parsed: OCR'd pages (an image page that
+    produced text) go to Claude.
+    """
+    if not LOCAL_EXTRACTION or extraction_stats.get("ocr_text_pages", 0):
+        return None
+    try:
+        parsed_data, confidence = extract_division_order(text)
+    except Exception as e:
+        print(f"Error in local extraction: {str(e)}")
+        return None
+    print(f"Local extraction confidence: {confidence:.2f} ({len(parsed_data['wells'])} wells)")
+    if confidence < LOCAL_EXTRACTION_MIN_CONFIDENCE:
+        print("Local extraction confidence too low, falling back to Claude")
+        return None
+    return parsed_data
+
+def extraction_cache_key(content: bytes) -> str:
+    local_version = (
+        f"local={LOCAL_PARSER_VERSION}@{LOCAL_EXTRACTION_MIN_CONFIDENCE}" if LOCAL_EXTRACTION else "local=off"
+    )
+    chunking = f"chunks={CLAUDE_CHUNK_CHARS}" if CLAUDE_CHUNKING == "auto" else "chunks=off"
+    return make_cache_key(
+        content, ocr_config_signature(), f"native_min={NATIVE_TEXT_MIN_CHARS}", SYSTEM_PROMPT_VERSION,
+        local_version, chunking, claude_client.signature()
+    )
+
+async def get_cached_extraction(cache_key: str, no_cache: bool = False):
+    """Look up a previous extraction of the same PDF, unless the cache is bypassed."""
+    if extraction_cache is None or no_cache:
+        return None
+    try:
+        cached = await asyncio.to_thread(extraction_cache.get, cache_key)
+        if cached:
+            print(f"Extraction cache hit: {cache_key[:16]}")
+        return cached
+    except Exception as e:
+        print(f"Error reading extraction cache: {str(e)}")
+        return None
+
+async def store_cached_extraction(cache_key: str, text: str, parsed_data: dict, is_scanned: bool):
+    # Partial extractions recovered from a truncated response are not cached, so a re-upload tries again
+    if extraction_cache is None or "recovery" in parsed_data:
+        return
+    try:
+        await asyncio.to_thread(extraction_cache.put, cache_key, text, parsed_data, is_scanned)
+    except Exception as e:
+        print(f"Error writing extraction cache: {str(e)}")
+
+def page_cache_summary(extraction_stats: dict) -> dict:
+    """Page text cache hits/misses for one upload (both 0 when no page needed OCR)."""
+    return {
+        "hits": extraction_stats.get("page_cache_hits", 0),
+        "misses": extraction_stats.get("page_cache_misses", 0)
+    }
+
+def parse_claude_response(response_text: str) -> dict:
+    """Extract the JSON object from Claude's response.
+
+    A truncated response keeps its complete wells; data["recovery"] then
+    reports what was recovered.
+    """
+    parsed_data, recovery = parse_extraction_response(response_text)
+    if recovery is not None:
+        print(f"Claude response was truncated, recovered {recovery['wells_recovered']} complete wells")
+        parsed_data["recovery"] = recovery
+    return parsed_data
+
+def scan_and_extract_text(pdf_content: bytes, stats: dict = None) -> tuple:
+    """Parse the PDF once and return (is_scanned, extracted_text)."""
+    with PDFDocument(pdf_content) as pdf:
+        is_scanned = is_scanned_pdf(pdf)
+        return is_scanned, extract_text_from_pdf(pdf, stats)
+
 @app.post("/api/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), no_cache: bool = False):
     try:
         print(f"\n=== Processing PDF Upload ===")
         print(f"Received file: {file.filename}")
@@ -346,67 +452,74 @@ async def upload_file(file: UploadFile = File(...)):
         content = await file.read()
         print(f"File size: {len(content)} bytes")
         
-        # Check if it's a scanned PDF
-        is_scanned = is_scanned_pdf(content)
-        print(f"PDF is {'scanned' if is_scanned else 'text-based'}")
+        # Re-uploads of the same PDF skip OCR and Claude (pass no_cache=true to bypass)
+        cache_key = extraction_cache_key(content)
+        cached = await get_cached_extraction(cache_key, no_cache)
+        if cached:
+            return {
+                "success": True,
+                "data": cached["data"],
+                "is_scanned": cached["is_scanned"],
+                "cached": True
+            }
         
         # Extract text
         try:
-            text = extract_text_from_pdf(content)
+            # Scan check and text extraction share one parse of the PDF and
+            # run off the event loop (OCR fans out to worker processes)
+            extraction_stats = {}
+            is_scanned, text = await asyncio.to_thread(scan_and_extract_text, content, extraction_stats)
+            print(f"PDF is {'scanned' if is_scanned else 'text-based'}")
             print(f"Extracted text length: {len(text)} characters")
             
             # Save extracted text for debugging
-            debug_dir = pathlib.Path(__file__).parent / "debug"
-            debug_dir.mkdir(exist_ok=True)
-            debug_path = debug_dir / "extracted_text.txt"
-            with open(debug_path, "w", encoding="utf-8") as f:
-                f.write(text)
+            debug_path = DEBUG_DIR / "extracted_text.txt"
+            await asyncio.to_thread(write_debug_text, debug_path, text)
             print(f"Saved extracted text to: {debug_path}")
             
+            # Recognized layouts of text-based PDFs don't need Claude
+            parsed_data = await asyncio.to_thread(local_extraction, text, extraction_stats)
+            if parsed_data is not None:
+                parsed_debug_path = DEBUG_DIR / "parsed_data.json"
+                await asyncio.to_thread(write_debug_json, parsed_debug_path, parsed_data)
+                print(f"Saved parsed data to: {parsed_debug_path}")
+                await store_cached_extraction(cache_key, text, parsed_data, is_scanned)
+                return {
+                    "success": True,
+                    "data": parsed_data,
+                    "is_scanned": is_scanned,
+                    "cached": False,
+                    "extractor": "local",
+                    "page_cache": page_cache_summary(extraction_stats)
+                }
+            
             # Process with Claude
             print("Sending text to Claude for processing...")
             try:
-                message = claude.messages.create(
-                    model="claude-3-7-sonnet-20250219",
-                    max_tokens=15000,  # Increased from 4000 to handle large documents
-                    temperature=0,
-                    system=system_prompt,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"Please analyze this division order and extract the information:\n\n{text}"
-                        }
-                    ]
-                )
-                
-                # Parse Claude's response
-                response_text = message.content[0].text
+                response_text, parsed_data = await run_claude_extraction(text)
                 print("Claude response received, length:", len(response_text))
                 
                 # Save Claude's response for debugging
-                claude_debug_path = debug_dir / "claude_response.txt"
-                with open(claude_debug_path, "w", encoding="utf-8") as f:
-                    f.write(response_text)
+                claude_debug_path = DEBUG_DIR / "claude_response.txt"
+                await asyncio.to_thread(write_debug_text, claude_debug_path, response_text)
                 print(f"Saved Claude response to: {claude_debug_path}")
                 
-                # Extract JSON from response
-                json_match = re.search(r'\{[\s\S]*\}', response_text)
-                if not json_match:
-                    raise ValueError("No JSON object found in Claude's response")
-                
-                parsed_data = json.loads(json_match[0])
                 print(f"Parsed data: {json.dumps(parsed_data, indent=2)}")
                 
                 # Save parsed data for debugging
-                parsed_debug_path = debug_dir / "parsed_data.json"
-                with open(parsed_debug_path, "w", encoding="utf-8") as f:
-                    json.dump(parsed_data, f, indent=2)
+                parsed_debug_path = DEBUG_DIR / "parsed_data.json"
+                await asyncio.to_thread(write_debug_json, parsed_debug_path, parsed_data)
                 print(f"Saved parsed data to: {parsed_debug_path}")
                 
+                await store_cached_extraction(cache_key, text, parsed_data, is_scanned)
+                
                 return {
                     "success": True,
                     "data": parsed_data,
-                    "is_scanned": is_scanned
+                    "is_scanned": is_scanned,
+                    "cached": False,
+                    "extractor": "claude",
+                    "page_cache": page_cache_summary(extraction_stats)
                 }
                 
             except Exception as claude_error:
@@ -414,11 +527,20 @@ async def upload_file(file: UploadFile = File(...)):
                 print("Full traceback:")
                 import traceback
                 print(traceback.format_exc())
+                if isinstance(claude_error, ClaudeUnavailableError):
+                    # The API keeps failing; tell the client when to try again
+                    raise HTTPException(
+                        status_code=503,
+                        detail=f"Error processing with Claude: {str(claude_error)}",
+                        headers={"Retry-After": str(int(claude_error.retry_after))}
+                    )
                 raise HTTPException(
                     status_code=500,
                     detail=f"Error processing with Claude: {str(claude_error)}"
                 )
                 
+        except HTTPException:
+            raise
         except Exception as text_error:
             print(f"Error in text extraction: {str(text_error)}")
             print("Full traceback:")
@@ -429,6 +551,8 @@ async def upload_file(file: UploadFile = File(...)):
                 detail=f"Error extracting text: {str(text_error)}"
             )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error processing file: {str(e)}")
         print("Full traceback:")
@@ -439,111 +563,198 @@ async def upload_file(file: UploadFile = File(...)):
             detail=f"Error processing file: {str(e)}"
         )
 
-@app.post("/api/upload-multiple")
-async def upload_multiple_files(files: list[UploadFile] = File(...)):
+def ndjson_event(event: str, **fields) -> str:
+    return json.dumps({"event": event, **fields}) + "\n"
+
+async def upload_events(filename: str, content: bytes, no_cache: bool):
+    """NDJSON events of one streamed upload: status updates, each well as it is extracted, then the result.
+
+    The final "result" event carries the same fields as the /api/upload
+    response; failures end the stream with an "error" event instead of an
+    HTTP error, since the response status has already been sent.
+    """
+    wells_sent = 0
     try:
-        print(f"\n=== Processing Multiple PDF Upload ===")
-        print(f"Received {len(files)} files")
+        print("\n=== Processing Streamed PDF Upload ===")
+        print(f"Received file: {filename} ({len(content)} bytes)")
+        
+        cache_key = extraction_cache_key(content)
+        cached = await get_cached_extraction(cache_key, no_cache)
+        if cached:
+            for index, well in enumerate(cached["data"].get("wells") or []):
+                yield ndjson_event("well", index=index, well=well)
+            yield ndjson_event("result", success=True, data=cached["data"], is_scanned=cached["is_scanned"], cached=True)
+            return
+        
+        yield ndjson_event("status", stage="extracting_text")
+        extraction_stats = {}
+        is_scanned, text = await asyncio.to_thread(scan_and_extract_text, content, extraction_stats)
+        print(f"PDF is {'scanned' if is_scanned else 'text-based'}, {len(text)} characters")
+        await asyncio.to_thread(write_debug_text, DEBUG_DIR / "extracted_text.txt", text)
+        
+        parsed_data = await asyncio.to_thread(local_extraction, text, extraction_stats)
+        extractor = "local"
+        if parsed_data is None:
+            extractor = "claude"
+            yield ndjson_event("status", stage="claude")
+            if use_chunking(text):
+                # Parts finish out of order, so their wells are sent once merged
+                response_text, parsed_data = await run_claude_extraction(text)
+            else:
+                async for kind, value in stream_claude_extraction(text):
+                    if kind == "well":
+                        yield ndjson_event("well", index=wells_sent, well=value)
+                        wells_sent += 1
+                    else:
+                        response_text = value
+                parsed_data = parse_claude_response(response_text)
+            print(f"Claude response received, length: {len(response_text)}, {wells_sent} wells streamed")
+            await asyncio.to_thread(write_debug_text, DEBUG_DIR / "claude_response.txt", response_text)
+        await asyncio.to_thread(write_debug_json, DEBUG_DIR / "parsed_data.json", parsed_data)
+        await store_cached_extraction(cache_key, text, parsed_data, is_scanned)
+        
+        # Wells the incremental parser did not hand out (local and chunked extractions)
+        for index, well in enumerate((parsed_data.get("wells") or [])[wells_sent:], wells_sent):
+            yield ndjson_event("well", index=index, well=well)
+        yield ndjson_event(
+            "result", success=True, data=parsed_data, is_scanned=is_scanned, cached=False,
+            extractor=extractor, page_cache=page_cache_summary(extraction_stats)
+        )
+        
+    except Exception as e:
+        print(f"Error processing streamed file: {str(e)}")
+        print("Full traceback:")
+        import traceback
+        print(traceback.format_exc())
+        yield ndjson_event(
+            "error", success=False, detail=f"Error processing file: {str(e)}", retryable=is_transient_claude_error(e)
+        )
+
+@app.post("/api/upload/stream")
+async def upload_file_stream(file: UploadFile = File(...), no_cache: bool = False):
+    """Like /api/upload, but streams NDJSON so wells can be shown while Claude is still writing."""
+    content = await file.read()
+    return StreamingResponse(upload_events(file.filename, content, no_cache), media_type="application/x-ndjson")
+
+async def process_batch_file(i: int, file: UploadFile, total: int, no_cache: bool = False) -> dict:
+    """Run one file of a multi-upload through extraction and Claude, returning its result entry."""
+    try:
+        print(f"\n--- Processing file {i + 1}/{total}: {file.filename} ---")
         
-        results = []
+        # Read file content
+        content = await file.read()
+        print(f"File size: {len(content)} bytes")
+        
+        cache_key = extraction_cache_key(content)
+        cached = await get_cached_extraction(cache_key, no_cache)
+        if cached:
+            return {
+                "fileName": file.filename,
+                "success": True,
+                "data": cached["data"],
+                "is_scanned": cached["is_scanned"],
+                "cached": True
+            }
         
-        for i, file in enumerate(files):
+        # Extract text (CPU-bound stage, limited separately from the Claude stage)
+        try:
+            async with extraction_semaphore:
+                extraction_stats = {}
+                is_scanned, text = await asyncio.to_thread(scan_and_extract_text, content, extraction_stats)
+            print(f"{file.filename}: PDF is {'scanned' if is_scanned else 'text-based'}")
+            print(f"{file.filename}: Extracted text length: {len(text)} characters")
+            
+            # Save extracted text for debugging
+            debug_path = DEBUG_DIR / f"extracted_text_{i}_{file.filename}.txt"
+            await asyncio.to_thread(write_debug_text, debug_path, text)
+            print(f"Saved extracted text to: {debug_path}")
+            
+            # Recognized layouts of text-based PDFs don't need Claude
+            parsed_data = await asyncio.to_thread(local_extraction, text, extraction_stats)
+            if parsed_data is not None:
+                parsed_debug_path = DEBUG_DIR / f"parsed_data_{i}_{file.filename}.json"
+                await asyncio.to_thread(write_debug_json, parsed_debug_path, parsed_data)
+                await store_cached_extraction(cache_key, text, parsed_data, is_scanned)
+                print(f"Successfully processed {file.filename} without Claude")
+                return {
+                    "fileName": file.filename,
+                    "success": True,
+                    "data": parsed_data,
+                    "is_scanned": is_scanned,
+                    "cached": False,
+                    "extractor": "local",
+                    "page_cache": page_cache_summary(extraction_stats)
+                }
+            
+            # Process with Claude
             try:
-                print(f"\n--- Processing file {i + 1}/{len(files)}: {file.filename} ---")
+                async with claude_semaphore:
+                    print(f"Sending text for {file.filename} to Claude for processing...")
+                    response_text, parsed_data = await run_claude_extraction(text)
+                print(f"{file.filename}: Claude response received, length:", len(response_text))
+                
+                # Save Claude's response for debugging
+                claude_debug_path = DEBUG_DIR / f"claude_response_{i}_{file.filename}.txt"
+                await asyncio.to_thread(write_debug_text, claude_debug_path, response_text)
+                print(f"Saved Claude response to: {claude_debug_path}")
+                
+                print(f"Parsed data: {json.dumps(parsed_data, indent=2)}")
+                
+                # Save parsed data for debugging
+                parsed_debug_path = DEBUG_DIR / f"parsed_data_{i}_{file.filename}.json"
+                await asyncio.to_thread(write_debug_json, parsed_debug_path, parsed_data)
+                print(f"Saved parsed data to: {parsed_debug_path}")
                 
-                # Read file content
-                content = await file.read()
-                print(f"File size: {len(content)} bytes")
+                await store_cached_extraction(cache_key, text, parsed_data, is_scanned)
                 
-                # Check if it's a scanned PDF
-                is_scanned = is_scanned_pdf(content)
-                print(f"PDF is {'scanned' if is_scanned else 'text-based'}")
+                print(f"Successfully processed {file.filename}")
+                return {
+                    "fileName": file.filename,
+                    "success": True,
+                    "data": parsed_data,
+                    "is_scanned": is_scanned,
+                    "cached": False,
+                    "extractor": "claude",
+                    "page_cache": page_cache_summary(extraction_stats)
+                }
                 
-                # Extract text
-                try:
-                    text = extract_text_from_pdf(content)
-                    print(f"Extracted text length: {len(text)} characters")
-                    
-                    # Save extracted text for debugging
-                    debug_dir = pathlib.Path(__file__).parent / "debug"
-                    debug_dir.mkdir(exist_ok=True)
-                    debug_path = debug_dir / f"extracted_text_{i}_{file.filename}.txt"
-                    with open(debug_path, "w", encoding="utf-8") as f:
-                        f.write(text)
-                    print(f"Saved extracted text to: {debug_path}")
-                    
-                    # Process with Claude
-                    print("Sending text to Claude for processing...")
-                    try:
-                        message = claude.messages.create(
-                            model="claude-3-7-sonnet-20250219",
-                            max_tokens=15000,
-                            temperature=0,
-                            system=system_prompt,
-                            messages=[
-                                {
-                                    "role": "user",
-                                    "content": f"Please analyze this division order and extract the information:\n\n{text}"
-                                }
-                            ]
-                        )
-                        
-                        # Parse Claude's response
-                        response_text = message.content[0].text
-                        print("Claude response received, length:", len(response_text))
-                        
-                        # Save Claude's response for debugging
-                        claude_debug_path = debug_dir / f"claude_response_{i}_{file.filename}.txt"
-                        with open(claude_debug_path, "w", encoding="utf-8") as f:
-                            f.write(response_text)
-                        print(f"Saved Claude response to: {claude_debug_path}")
-                        
-                        # Extract JSON from response
-                        json_match = re.search(r'\{[\s\S]*\}', response_text)
-                        if not json_match:
-                            raise ValueError("No JSON object found in Claude's response")
-                        
-                        parsed_data = json.loads(json_match[0])
-                        print(f"Parsed data: {json.dumps(parsed_data, indent=2)}")
-                        
-                        # Save parsed data for debugging
-                        parsed_debug_path = debug_dir / f"parsed_data_{i}_{file.filename}.json"
-                        with open(parsed_debug_path, "w") as f:
-                            json.dump(parsed_data, f, indent=2)
-                        print(f"Saved parsed data to: {parsed_debug_path}")
-                        
-                        results.append({
-                            "fileName": file.filename,
-                            "success": True,
-                            "data": parsed_data,
-                            "is_scanned": is_scanned
-                        })
-                        
-                        print(f"Successfully processed {file.filename}")
-                        
-                    except Exception as claude_error:
-                        print(f"Error in Claude processing for {file.filename}: {str(claude_error)}")
-                        results.append({
-                            "fileName": file.filename,
-                            "success": False,
-                            "error": f"Error processing with Claude: {str(claude_error)}"
-                        })
-                        
-                except Exception as text_error:
-                    print(f"Error in text extraction for {file.filename}: {str(text_error)}")
-                    results.append({
-                        "fileName": file.filename,
-                        "success": False,
-                        "error": f"Error extracting text: {str(text_error)}"
-                    })
-                    
-            except Exception as file_error:
-                print(f"Error processing file {file.filename}: {str(file_error)}")
-                results.append({
+            except Exception as claude_error:
+                print(f"Error in Claude processing for {file.filename}: {str(claude_error)}")
+                return {
                     "fileName": file.filename,
                     "success": False,
-                    "error": f"Error processing file: {str(file_error)}"
-                })
+                    "error": f"Error processing with Claude: {str(claude_error)}",
+                    "retryable": is_transient_claude_error(claude_error)
+                }
+                
+        except Exception as text_error:
+            print(f"Error in text extraction for {file.filename}: {str(text_error)}")
+            return {
+                "fileName": file.filename,
+                "success": False,
+                "error": f"Error extracting text: {str(text_error)}"
+            }
+            
+    except Exception as file_error:
+        print(f"Error processing file {file.filename}: {str(file_error)}")
+        return {
+            "fileName": file.filename,
+            "success": False,
+            "error": f"Error processing file: {str(file_error)}"
+        }
+
+@app.post("/api/upload-multiple")
+async def upload_multiple_files(files: list[UploadFile] = File(...), no_cache: bool = False):
+    try:
+        print(f"\n=== Processing Multiple PDF Upload ===")
+        print(f"Received {len(files)} files")
+        print(f"Extraction concurrency: {EXTRACTION_CONCURRENCY}, Claude concurrency: {CLAUDE_CONCURRENCY}")
+        
+        # Files overlap across stages: one file's Claude call runs while
+        # another is still being OCR'd. Results keep the upload order.
+        results = list(await asyncio.gather(
+            *(process_batch_file(i, file, len(files), no_cache) for i, file in enumerate(files))
+        ))
         
         successful_results = [r for r in results if r["success"]]
         failed_results = [r for r in results if not r["success"]]
@@ -585,6 +796,21 @@ def clean_decimal_interest(value):
     
     return value
 
+def clean_record_fields(record: dict):
+    """Clean the decimal interest and normalize the state of a dashboard record, in place."""
+    if 'decimalInterest' in record:
+        original_value = record['decimalInterest']
+        cleaned_value = clean_decimal_interest(original_value)
+        if original_value != cleaned_value:
+            print(f"Cleaned decimal interest: '{original_value}' -> '{cleaned_value}'")
+        record['decimalInterest'] = cleaned_value
+    if 'state' in record:
+        orig_state = record['state']
+        abbr = normalize_state(orig_state)
+        if abbr != orig_state:
+            print(f"Normalized state: '{orig_state}' -> '{abbr}'")
+        record['state'] = abbr
+
 @app.post("/api/deploy")
 async def deploy_to_dashboard(data: dict):
     try:
@@ -600,117 +826,15 @@ async def deploy_to_dashboard(data: dict):
         
         # Clean decimal interests and normalize state in new records
         for record in new_records:
-            if 'decimalInterest' in record:
-                original_value = record['decimalInterest']
-                cleaned_value = clean_decimal_interest(original_value)
-                if original_value != cleaned_value:
-                    print(f"Cleaned decimal interest: '{original_value}' -> '{cleaned_value}'")
-                record['decimalInterest'] = cleaned_value
-            if 'state' in record:
-                orig_state = record['state']
-                abbr = normalize_state(orig_state)
-                if abbr != orig_state:
-                    print(f"Normalized state: '{orig_state}' -> '{abbr}'")
-                record['state'] = abbr
-        
-        # Ensure the dashboard data directory exists
-        if not DASHBOARD_DATA_DIR.exists():
-            print(f"Creating dashboard data directory: {DASHBOARD_DATA_DIR}")
-            DASHBOARD_DATA_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # Find the most recent file or create a new one
-        json_files = glob.glob(str(DASHBOARD_DATA_DIR / "*.json"))
-        existing_records = []
-        
-        if json_files:
-            # Use the most recent file
-            latest_file = max(json_files, key=lambda x: os.path.getctime(x))
-            print(f"Using existing file: {latest_file}")
-            try:
-                with open(latest_file, 'r') as f:
-                    file_data = json.load(f)
-                    if isinstance(file_data, list):
-                        existing_records = file_data
-                    else:
-                        existing_records = [file_data]
-                    print(f"Loaded {len(existing_records)} existing records from {latest_file}")
-            except Exception as e:
-                print(f"Error reading existing file {latest_file}: {str(e)}")
-                existing_records = []
-        else:
-            print("No existing dashboard files found, will create new one")
+            clean_record_fields(record)
         
-        # Create a unique key for each record to detect duplicates
-        def get_record_key(record):
-            return (
-                record.get('propertyName', '').strip().lower(),
-                record.get('operator', '').strip().lower(),
-                record.get('entity', '').strip().lower(),
-                record.get('effectiveDate', '').strip().lower()
-            )
-        
-        # Create a set of existing record keys
-        existing_keys = {get_record_key(rec) for rec in existing_records}
-        print(f"Found {len(existing_keys)} unique existing records")
-        
-        # Filter out new records that are duplicates
-        unique_new_records = []
-        duplicates_found = 0
-        
-        for new_record in new_records:
-            new_key = get_record_key(new_record)
-            if new_key in existing_keys:
-                print(f"Duplicate found and skipped: {new_record.get('propertyName', 'Unknown')}")
-                duplicates_found += 1
-            else:
-                unique_new_records.append(new_record)
-                existing_keys.add(new_key)
-        
-        print(f"Found {duplicates_found} duplicates, adding {len(unique_new_records)} unique records")
-        
-        # Combine existing records with unique new records
-        combined_records = existing_records + unique_new_records
-        
-        # Determine the filename
-        if json_files:
-            # Update the existing file
-            filename = latest_file
-            print(f"Updating existing file: {filename}")
-        else:
-            # Create a new file
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = DASHBOARD_DATA_DIR / f"dashboard_data_{timestamp}.json"
-            print(f"Creating new file: {filename}")
-        
-        print(f"\nSaving {len(combined_records)} records to {filename}")
-        print("First record example:", json.dumps(combined_records[0] if combined_records else {}, indent=2))
-        
-        # Save the combined records to the file
-        try:
-            with open(filename, "w") as f:
-                json.dump(combined_records, f, indent=2)
-            print(f"\nSuccessfully saved {len(combined_records)} records to {filename}")
-            
-            # Verify the file was written correctly
-            with open(filename, 'r') as f:
-                saved_data = json.load(f)
-                if len(saved_data) != len(combined_records):
-                    raise Exception(f"Data verification failed: expected {len(combined_records)} records, found {len(saved_data)}")
-                print("Data verification successful")
-            
-            return {
-                "message": f"Successfully deployed to dashboard ({duplicates_found} duplicates skipped)",
-                "records_count": len(combined_records),
-                "duplicates_skipped": duplicates_found,
-                "new_records_added": len(unique_new_records),
-                "filename": str(filename)
-            }
-        except Exception as e:
-            print(f"Error saving to file: {str(e)}")
-            print("Full traceback:")
-            import traceback
-            print(traceback.format_exc())
-            raise
+        result = await asyncio.to_thread(dashboard_store.deploy_records, new_records)
+        print(f"Found {result['duplicates_skipped']} duplicates, added {result['new_records_added']} unique records, "
+              f"{result['records_count']} records on the dashboard")
+        return {
+            "message": f"Successfully deployed to dashboard ({result['duplicates_skipped']} duplicates skipped)",
+            **result,
+        }
         
     except Exception as e:
         error_msg = f"Error deploying to dashboard: {str(e)}"
@@ -720,159 +844,119 @@ async def deploy_to_dashboard(data: dict):
         print(traceback.format_exc())
         return {"error": error_msg}
 
+@app.get("/api/ocr/metrics")
+async def get_ocr_metrics():
+    """OCR engine init time vs recognition time, per worker process."""
+    return ocr_metrics()
+
+@app.get("/api/claude/metrics")
+async def get_claude_metrics():
+    """Token usage (including prompt cache reads and writes) and latency of Claude requests."""
+    return claude_client.metrics()
+
 @app.get("/api/dashboard")
-async def get_dashboard_data():
+async def get_dashboard_data(request: Request, limit: int = DASHBOARD_PAGE_SIZE, cursor: str = None, sort: str = "effectiveDate",
+                             order: str = "desc", operator: str = None, entity: str = None, state: str = None,
+                             county: str = None, status: str = None, search: str = None):
+    """One page of dashboard records; pass the returned next_cursor to get the following page.
+
+    operator, entity, state, county and status match exactly; every word of
+    search must appear in one of the record's fields, ignoring case.
+
+    Pages carry an ETag of the dashboard version; a poll sending it back in
+    If-None-Match gets 304 until the dashboard changes.
+    """
+    if not 1 <= limit <= DASHBOARD_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {DASHBOARD_MAX_PAGE_SIZE}")
+    if sort not in dashboard_store.SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(dashboard_store.SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    filter_values = {"operator": operator, "entity": entity, "state": state, "county": county, "status": status}
+    filters = {field: value for field, value in filter_values.items() if value is not None}
+    search = " ".join((search or "").split()).lower()
+    query = (limit, cursor, sort, order, tuple(sorted(filters.items())), search)
     try:
-        # Get all JSON files in the dashboard_data directory
-        json_files = glob.glob(str(DASHBOARD_DATA_DIR / "*.json"))
-        print(f"Found {len(json_files)} JSON files in {DASHBOARD_DATA_DIR}")
-        
-        if not json_files:
-            return {"records": []}
-        
-        # Read only the most recent file
-        latest_file = max(json_files, key=lambda x: os.path.getctime(x))
-        print(f"Reading from most recent file: {latest_file}")
-        
-        with open(latest_file, 'r') as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                all_records = data
-            else:
-                all_records = [data]
-        
-        print(f"Total records found: {len(all_records)}")
-        
-        # Sort records by effective date (newest first)
-        all_records.sort(key=lambda x: x.get('effectiveDate', ''), reverse=True)
-        
-        return {"records": all_records}
+        version = await asyncio.to_thread(dashboard_store.current_version)
+        etag = page_etag(version, query)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            dashboard_view.not_modified()
+            return Response(status_code=304, headers=headers)
+        body = dashboard_view.get(version, query)
+        if body is None:
+            page = await asyncio.to_thread(
+                dashboard_store.page_records, limit, cursor, sort, order == "desc", filters, search
+            )
+            body = json.dumps({**page, "limit": limit}).encode()
+            dashboard_view.put(version, query, body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         error_msg = f"Error fetching dashboard data: {str(e)}"
         print(error_msg)
         return {"error": error_msg}
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/dashboard/metrics")
+async def get_dashboard_metrics():
+    """Page cache hits and misses and 304 answers of GET /api/dashboard, for this worker."""
+    return dashboard_view.metrics()
+
+VALID_STATUSES = ['Executed', 'Curative', 'Title issue', 'Pending Review']
 
 @app.post("/api/dashboard/update")
 async def update_dashboard_record(data: dict):
     try:
-        index = data.get('index')
-        notes = data.get('notes', '')
+        record_id = data.get('id')
         status = data.get('status', '')
         
         # Validate status if provided
-        valid_statuses = ['Executed', 'Curative', 'Title issue', 'Pending Review']
-        if status and status not in valid_statuses:
-            return {"error": f"Invalid status. Must be one of: {', '.join(valid_statuses)}"}
-        
-        # Get all JSON files in the dashboard data directory
-        json_files = [f for f in os.listdir(DASHBOARD_DATA_DIR) if f.endswith('.json')]
-        if not json_files:
-            return {"error": "No dashboard data found"}
-            
-        # Read the most recent file
-        latest_file = max(json_files, key=lambda x: os.path.getctime(os.path.join(DASHBOARD_DATA_DIR, x)))
-        file_path = os.path.join(DASHBOARD_DATA_DIR, latest_file)
-        
-        with open(file_path, 'r') as f:
-            records = json.load(f)
-            
-        if 0 <= index < len(records):
-            # Update notes if provided
-            if 'notes' in data:
-                records[index]['notes'] = notes
-            
-            # Update status if provided
-            if 'status' in data:
-                records[index]['status'] = status
-            
-            # Save the updated records back to the file
-            with open(file_path, 'w') as f:
-                json.dump(records, f, indent=2)
-                
+        if status and status not in VALID_STATUSES:
+            return {"error": f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}"}
+        if not isinstance(record_id, int):
+            return {"error": "Invalid record id"}
+        
+        # Update notes and status if provided
+        changes = {field: data.get(field) or '' for field in ('notes', 'status') if field in data}
+        if await asyncio.to_thread(dashboard_store.update_record, record_id, changes):
             return {"success": True, "message": "Record updated successfully"}
         else:
-            return {"error": "Invalid record index"}
+            return {"error": f"Record {record_id} not found"}
             
     except Exception as e:
         print(f"Error updating dashboard record: {str(e)}")
         return {"error": str(e)}
 
+@app.patch("/api/dashboard/records/{record_id}")
+async def patch_dashboard_record(record_id: int, data: dict):
+    """Change any fields of one record; returns the updated record."""
+    unknown = sorted(set(data) - set(dashboard_store.FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if data.get('status') and data['status'] not in VALID_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}")
+    try:
+        clean_record_fields(data)
+        record = await asyncio.to_thread(dashboard_store.update_record, record_id, data)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        print(f"Error updating dashboard record {record_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Record {record_id} not found")
+    return {"record": record}
+
 @app.delete("/api/dashboard/delete")
-async def delete_record(index: int):
-    print("=" * 50)
-    print("DELETE REQUEST RECEIVED!")
-    print("=" * 50)
+async def delete_record(id: int):
     try:
-        print(f"Delete request received for index: {index}")
-        print(f"Index type: {type(index)}")
-        
-        # Get all JSON files in the dashboard data directory
-        try:
-            json_files = [f for f in os.listdir(DASHBOARD_DATA_DIR) if f.endswith('.json')]
-            print(f"Found {len(json_files)} JSON files: {json_files}")
-        except Exception as e:
-            print(f"Error listing files in {DASHBOARD_DATA_DIR}: {e}")
-            raise HTTPException(status_code=500, detail=f"Error accessing dashboard data directory: {str(e)}")
-        
-        if not json_files:
-            print("No JSON files found")
-            raise HTTPException(status_code=404, detail="No dashboard data found")
-            
-        # Read the most recent file - use a more robust method
-        try:
-            latest_file = max(json_files, key=lambda x: os.path.getctime(os.path.join(DASHBOARD_DATA_DIR, x)))
-        except Exception as e:
-            print(f"Error finding latest file with getctime: {e}")
-            # Fallback: use the last file alphabetically (should be the most recent timestamp)
-            try:
-                latest_file = sorted(json_files)[-1]
-                print(f"Using fallback method, latest file: {latest_file}")
-            except Exception as e2:
-                print(f"Error with fallback method: {e2}")
-                raise HTTPException(status_code=500, detail=f"Error finding latest file: {str(e2)}")
-        
-        file_path = os.path.join(DASHBOARD_DATA_DIR, latest_file)
-        print(f"Using file: {file_path}")
-        
-        # Check if file exists
-        if not os.path.exists(file_path):
-            print(f"File does not exist: {file_path}")
-            raise HTTPException(status_code=404, detail=f"Dashboard file not found: {latest_file}")
-        
-        # Read the file
-        try:
-            with open(file_path, 'r') as f:
-                records = json.load(f)
-        except Exception as e:
-            print(f"Error reading file {file_path}: {e}")
-            raise HTTPException(status_code=500, detail=f"Error reading dashboard file: {str(e)}")
-            
-        print(f"Loaded {len(records)} records from file")
-        print(f"Attempting to delete record at index {index}")
-        print(f"Records type: {type(records)}")
-        
-        # Validate index
-        if not isinstance(index, int):
-            print(f"Index is not an integer: {index} (type: {type(index)})")
-            raise HTTPException(status_code=400, detail=f"Invalid index type: {type(index)}")
-        
-        if 0 <= index < len(records):
-            try:
-                deleted_record = records.pop(index)
-                print(f"Deleted record: {deleted_record.get('propertyName', 'Unknown')}")
-                
-                # Save the updated records back to the file
-                with open(file_path, 'w') as f:
-                    json.dump(records, f, indent=2)
-                    
-                print(f"Successfully saved {len(records)} records back to file")
-                return {"message": "Record deleted successfully"}
-            except Exception as e:
-                print(f"Error during delete operation: {e}")
-                raise HTTPException(status_code=500, detail=f"Error during delete operation: {str(e)}")
-        else:
-            print(f"Invalid index {index}, records length: {len(records)}")
-            raise HTTPException(status_code=404, detail=f"Record not found at index {index}")
+        print(f"Delete request received for record {id}")
+        deleted_record = await asyncio.to_thread(dashboard_store.delete_record, id)
+        if deleted_record is None:
+            raise HTTPException(status_code=404, detail=f"Record {id} not found")
+        print(f"Deleted record: {deleted_record.get('propertyName', 'Unknown')}")
+        return {"message": "Record deleted successfully"}
             
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -888,56 +972,11 @@ async def delete_record(index: int):
 async def deduplicate_dashboard():
     try:
         print("\n=== Deduplication Request ===")
-        
-        # Get all JSON files in the dashboard data directory
-        json_files = glob.glob(str(DASHBOARD_DATA_DIR / "*.json"))
-        if not json_files:
-            return {"error": "No dashboard data found"}
-        
-        # Use the most recent file
-        latest_file = max(json_files, key=lambda x: os.path.getctime(x))
-        print(f"Deduplicating file: {latest_file}")
-        
-        # Load records
-        with open(latest_file, 'r') as f:
-            records = json.load(f)
-        
-        print(f"Loaded {len(records)} records for deduplication")
-        
-        # Create a unique key for each record to detect duplicates
-        def get_record_key(record):
-            return (
-                record.get('propertyName', '').strip().lower(),
-                record.get('operator', '').strip().lower(),
-                record.get('entity', '').strip().lower(),
-                record.get('effectiveDate', '').strip().lower()
-            )
-        
-        # Deduplicate by keeping the first occurrence of each unique key
-        seen_keys = set()
-        deduped = []
-        duplicates_removed = 0
-        
-        for record in records:
-            key = get_record_key(record)
-            if key in seen_keys:
-                print(f"Removing duplicate: {record.get('propertyName', 'Unknown')} - {record.get('operator', 'Unknown')}")
-                duplicates_removed += 1
-            else:
-                seen_keys.add(key)
-                deduped.append(record)
-        
-        print(f"Removed {duplicates_removed} duplicates, keeping {len(deduped)} unique records")
-        
-        # Save the deduplicated records back to the same file
-        with open(latest_file, 'w') as f:
-            json.dump(deduped, f, indent=2)
-        
+        result = await asyncio.to_thread(dashboard_store.deduplicate_records)
+        print(f"Removed {result['duplicates_removed']} duplicates, keeping {result['records_remaining']} unique records")
         return {
             "message": f"Successfully deduplicated dashboard data",
-            "duplicates_removed": duplicates_removed,
-            "records_remaining": len(deduped),
-            "file": latest_file
+            **result,
         }
     except Exception as e:
         print(f"Error during deduplication: {str(e)}")
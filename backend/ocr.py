@@ -0,0 +1,768 @@
+"""
+OCR helpers for scanned division orders.
+
+Pages are rendered with PyMuPDF and read with Tesseract. Multi-page documents
+are fanned out across a pool of worker processes; each worker opens the PDF
+itself from a temporary file, so only the file path and page number cross the
+process boundary and text comes back in page order. Page text can be cached
+by page content so unchanged pages of amended documents are not OCR'd again.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+try:
+    # Optional: in-process Tesseract bindings (pip install tesserocr)
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+from ocr_layout import detect_regions, ink_mask, is_sideways, orientation_sample, pixmap_to_image
+from ocr_scoring import score_ocr_text
+from pdf_document import PDFDocument, fitz_lock
+
+# Set Tesseract path (module level so worker processes pick it up too)
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+# Tesseract language data for the in-process engine (tesserocr)
+TESSDATA_PATH = os.getenv("TESSDATA_PREFIX") or (
+    os.path.join(os.path.dirname(TESSERACT_CMD), "tessdata")
+    if os.path.isdir(os.path.join(os.path.dirname(TESSERACT_CMD), "tessdata")) else None
+)
+
+# OCR engine: "auto" uses tesserocr when installed, else pytesseract;
+# "tesserocr" or "pytesseract" force one (tesserocr falls back if missing)
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+
+# Use single, optimized OCR configuration for consistent results
+OCR_CONFIGS = [
+    '--oem 3 --psm 12',  # Default engine, sparse text with OSD
+]
+
+# Config selection: "single" runs OCR_CONFIGS on every page; "cascade" runs
+# OCR_CASCADE_CONFIGS in order and stops at the first one whose mean word
+# confidence reaches OCR_CASCADE_CONFIDENCE, keeping the best-scoring text
+OCR_CONFIG_MODE = os.getenv("OCR_CONFIG_MODE", "single")
+
+# Fastest / usually best config first; later ones only run on difficult pages
+OCR_CASCADE_CONFIGS = [
+    '--oem 3 --psm 12',  # Default engine, sparse text with OSD
+    '--oem 3 --psm 6',   # Default engine, single uniform block (tables)
+    '--oem 3 --psm 3',   # Default engine, automatic page segmentation
+]
+OCR_CASCADE_CONFIDENCE = float(os.getenv("OCR_CASCADE_CONFIDENCE", "80"))
+
+# Page layout: "page" OCRs each page as a whole; "regions" first fixes the
+# page orientation and finds its table and text regions (see ocr_layout),
+# then OCRs tables at the page's render DPI with a block PSM so each table
+# row comes out as one line, and the remaining text at OCR_REGION_TEXT_DPI
+OCR_LAYOUT = os.getenv("OCR_LAYOUT", "page")
+OCR_REGION_TEXT_DPI = int(os.getenv("OCR_REGION_TEXT_DPI", "200"))
+OCR_TABLE_CONFIG = '--oem 3 --psm 6'  # Default engine, single uniform block
+
+# Orientation check: accept the page as it is when a sample reads at least this confidently
+ORIENTATION_CONFIDENCE = 80
+
+# Page rendering: "adaptive" renders straight to grayscale at a DPI matched to
+# the page's scanned image and retries at a higher DPI when Tesseract's
+# confidence is low; "fixed" renders RGB at 4x zoom and converts in PIL
+OCR_RENDER_MODE = os.getenv("OCR_RENDER_MODE", "adaptive")
+
+# Render pages at 4x zoom for higher resolution ("fixed" mode)
+RENDER_ZOOM = 4
+
+# DPI bounds for "adaptive" mode; pages without a scanned image use the maximum
+ADAPTIVE_MIN_DPI = int(os.getenv("OCR_MIN_DPI", "200"))
+ADAPTIVE_MAX_DPI = int(os.getenv("OCR_MAX_DPI", "300"))
+# Re-render at this DPI when mean word confidence falls below OCR_RETRY_CONFIDENCE
+OCR_RETRY_DPI = int(os.getenv("OCR_RETRY_DPI", "400"))
+OCR_RETRY_CONFIDENCE = float(os.getenv("OCR_RETRY_CONFIDENCE", "70"))
+
+# Only images covering at least this fraction of the page count as the page scan
+SCAN_IMAGE_MIN_COVERAGE = 0.25
+
+# Number of OCR worker processes (1 = OCR pages in the calling process)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+
+# Seconds allowed for OCR of a single page before it is skipped
+OCR_PAGE_TIMEOUT = float(os.getenv("OCR_PAGE_TIMEOUT", "120"))
+
+# Set OCR_WARMUP=0 to skip loading the OCR engine in every worker at server start
+OCR_WARMUP = os.getenv("OCR_WARMUP", "1") != "0"
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# Latest engine metrics reported by each worker process, keyed by pid
+_worker_metrics = {}
+
+
+def active_ocr_configs() -> list:
+    """The Tesseract configs pages may be run through in the current mode."""
+    if OCR_CONFIG_MODE == "cascade" and OCR_RENDER_MODE != "fixed":
+        return OCR_CASCADE_CONFIGS
+    return OCR_CONFIGS
+
+
+def _engine_configs() -> list:
+    """Every config the current settings may run (loaded up front at warm-up)."""
+    configs = list(active_ocr_configs())
+    if OCR_LAYOUT == "regions" and OCR_TABLE_CONFIG not in configs:
+        configs.append(OCR_TABLE_CONFIG)
+    return configs
+
+
+def ocr_config_signature() -> str:
+    """Describe the OCR settings that affect extracted text (used in cache keys)."""
+    if OCR_RENDER_MODE == "fixed":
+        return f"configs={OCR_CONFIGS};zoom={RENDER_ZOOM}"
+    configs = active_ocr_configs()
+    if configs is OCR_CASCADE_CONFIGS:
+        configs = f"cascade{OCR_CASCADE_CONFIGS}@{OCR_CASCADE_CONFIDENCE}"
+    signature = (f"configs={configs};adaptive={ADAPTIVE_MIN_DPI}-{ADAPTIVE_MAX_DPI};"
+                 f"retry={OCR_RETRY_DPI}@{OCR_RETRY_CONFIDENCE}")
+    if OCR_LAYOUT == "regions":
+        signature += f";regions={OCR_TABLE_CONFIG}@text{OCR_REGION_TEXT_DPI}"
+    return signature
+
+
+def choose_render_dpi(page) -> int:
+    """Pick a render DPI from the resolution of the scanned image on the page."""
+    page_area = abs(page.rect)
+    scan_dpi = 0
+    with fitz_lock:
+        image_infos = page.get_image_info()
+    for info in image_infos:
+        bbox = fitz.Rect(info["bbox"])
+        if bbox.is_empty or page_area == 0 or abs(bbox) / page_area < SCAN_IMAGE_MIN_COVERAGE:
+            continue
+        # Geometric mean of both axes so rotated scans give the same answer
+        dpi = (info["width"] * info["height"] * 72 * 72 / (bbox.width * bbox.height)) ** 0.5
+        scan_dpi = max(scan_dpi, dpi)
+    if not scan_dpi:
+        return ADAPTIVE_MAX_DPI
+    # Rendering above the scan's own resolution adds pixels but no detail
+    return int(round(min(max(scan_dpi, ADAPTIVE_MIN_DPI), ADAPTIVE_MAX_DPI)))
+
+
+def render_page_gray(page, dpi: int):
+    """Render a page directly to an 8-bit grayscale pixmap."""
+    with fitz_lock:
+        return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+
+
+def render_band_gray(page, dpi: int, rotation: int, top: float, bottom: float):
+    """Render a full-width band of a page, turned `rotation` degrees clockwise, to grayscale.
+
+    `top` and `bottom` are fractions of the turned page's height.
+    """
+    matrix = fitz.Matrix(dpi / 72, dpi / 72).prerotate(rotation)
+    with fitz_lock:
+        full = page.rect * matrix
+        band = fitz.Rect(full.x0, full.y0 + top * full.height, full.x1, full.y0 + bottom * full.height)
+        return page.get_pixmap(matrix=matrix, clip=band * ~matrix, colorspace=fitz.csGRAY, alpha=False)
+
+
+def _parse_tesseract_config(config: str) -> tuple:
+    """Pull (oem, psm) out of a command-line style config such as '--oem 3 --psm 12'."""
+    oem = re.search(r'--oem\s+(\d+)', config)
+    psm = re.search(r'--psm\s+(\d+)', config)
+    return (int(oem.group(1)) if oem else 3), (int(psm.group(1)) if psm else 3)
+
+
+class OCREngine:
+    """Base class for OCR engines: one instance per process, with timing metrics.
+
+    `warm_up()` does the expensive one-off setup (loading the language model)
+    so the first page of the first upload doesn't pay for it; `metrics()`
+    separates that setup time from time spent recognizing pages.
+    """
+
+    name = None
+
+    def __init__(self):
+        self.init_seconds = 0.0
+        self.recognitions = 0
+        self.recognize_seconds = 0.0
+        self._warmed_up = False
+        self._metrics_lock = threading.Lock()
+
+    def warm_up(self):
+        """Initialize the engine once; later calls do nothing."""
+        if self._warmed_up:
+            return
+        start = time.perf_counter()
+        self._initialize()
+        self.init_seconds += time.perf_counter() - start
+        self._warmed_up = True
+        print(f"OCR engine {self.name} initialized in {self.init_seconds:.2f}s (pid {os.getpid()})")
+
+    def _initialize(self):
+        pass
+
+    def record_recognition(self, seconds: float):
+        with self._metrics_lock:
+            self.recognitions += 1
+            self.recognize_seconds += seconds
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            return {
+                "pid": os.getpid(),
+                "engine": self.name,
+                "init_seconds": round(self.init_seconds, 4),
+                "recognitions": self.recognitions,
+                "recognize_seconds": round(self.recognize_seconds, 4),
+                "avg_recognize_seconds": round(self.recognize_seconds / self.recognitions, 4)
+                if self.recognitions else 0.0,
+            }
+
+
+class PytesseractEngine(OCREngine):
+    """OCR through the tesseract command line (temp file + subprocess per call).
+
+    The command line engine reloads its language model on every call, so there
+    is nothing to keep alive between pages; warm-up only checks the binary.
+    """
+
+    name = "pytesseract"
+
+    def _initialize(self):
+        pytesseract.get_tesseract_version()
+
+    def recognize(self, image, config: str, timeout: float) -> tuple:
+        """Run Tesseract on a grayscale pixmap or PIL image; return (text, mean word confidence)."""
+        if isinstance(image, fitz.Pixmap):
+            image = Image.frombytes("L", [image.width, image.height], image.samples)
+        data = pytesseract.image_to_data(
+            image, config=config, timeout=timeout, output_type=pytesseract.Output.DICT
+        )
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            if not word.strip():
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+            conf = float(data["conf"][i])
+            if conf >= 0:
+                confidences.append(conf)
+
+        text_lines = []
+        previous_block = None
+        for (block, par, line), words in lines.items():
+            if previous_block is not None and block != previous_block:
+                text_lines.append("")
+            text_lines.append(" ".join(words))
+            previous_block = block
+        text = "\n".join(text_lines)
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return text, confidence
+
+
+class TesserocrEngine(OCREngine):
+    """In-process OCR through the Tesseract C API (tesserocr).
+
+    Pixmap buffers are handed to Tesseract directly, so there is no PNG
+    encoding, temp file or subprocess per page. One API handle is kept per
+    config for the life of the process, so the language model is loaded once
+    per worker rather than once per page.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self):
+        super().__init__()
+        self._apis = {}
+        # A TessBaseAPI handle must not be used from two threads at once
+        self._lock = threading.Lock()
+
+    def _api(self, config: str):
+        api = self._apis.get(config)
+        if api is None:
+            start = time.perf_counter()
+            oem, psm = _parse_tesseract_config(config)
+            kwargs = {"lang": "eng", "oem": oem, "psm": psm}
+            if TESSDATA_PATH:
+                kwargs["path"] = TESSDATA_PATH
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            self._apis[config] = api
+            self.init_seconds += time.perf_counter() - start
+        return api
+
+    def _initialize(self):
+        # Load the model for every config and run one tiny page through each, so
+        # Tesseract's lazily built state exists before real pages arrive
+        blank = Image.new("L", (64, 64), 255)
+        with self._lock:
+            for config in _engine_configs():
+                api = self._api(config)
+                api.SetImage(blank)
+                api.Recognize()
+                api.Clear()
+
+    def recognize(self, image, config: str, timeout: float) -> tuple:
+        """Run Tesseract on a grayscale pixmap or PIL image; return (text, mean word confidence)."""
+        with self._lock:
+            api = self._api(config)
+            if isinstance(image, fitz.Pixmap):
+                # tesserocr only takes bytes (a memoryview raises TypeError), so this is the
+                # pixmap's one copy; Tesseract reads it in place, so it must outlive Recognize
+                samples = bytes(image.samples_mv)
+                api.SetImageBytes(samples, image.width, image.height, image.n, image.stride)
+            else:
+                api.SetImage(image)
+            if not api.Recognize(timeout=int(timeout * 1000)):
+                raise RuntimeError("Tesseract recognition failed or timed out")
+            return api.GetUTF8Text(), float(api.MeanTextConf())
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine():
+    """Return this process's OCR engine, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            if OCR_ENGINE in ("auto", "tesserocr") and tesserocr is not None:
+                _engine = TesserocrEngine()
+            else:
+                if OCR_ENGINE == "tesserocr":
+                    print("tesserocr is not installed, falling back to pytesseract")
+                _engine = PytesseractEngine()
+            print(f"OCR engine: {_engine.name}")
+        return _engine
+
+
+def recognize(image, config: str, timeout: float) -> tuple:
+    """Run Tesseract on a grayscale pixmap or PIL image and return (text, mean word confidence)."""
+    engine = get_ocr_engine()
+    engine.warm_up()
+    start = time.perf_counter()
+    try:
+        return engine.recognize(image, config, timeout)
+    finally:
+        engine.record_recognition(time.perf_counter() - start)
+
+
+def _ocr_image(image, page_num: int, timeout: float, configs: list = None) -> tuple:
+    """Try OCR configs on a page image; return (best_text, best_score, confidence, best_config).
+
+    In cascade mode the remaining configs are skipped once one of them reads
+    the page with a mean word confidence of at least OCR_CASCADE_CONFIDENCE.
+    """
+    configs = configs or active_ocr_configs()
+    cascade = len(configs) > 1 and OCR_CONFIG_MODE == "cascade"
+    best_text = ""
+    best_score = 0
+    best_confidence = 0.0
+    best_config = configs[0]
+
+    for index, config in enumerate(configs):
+        try:
+            page_text, confidence = recognize(image, config, timeout)
+            score = score_ocr_text(page_text)
+
+            if score > best_score:
+                best_text = page_text
+                best_score = score
+                best_confidence = confidence
+                best_config = config
+                print(f"Page {page_num + 1}, Config: {config} - Score: {score}, "
+                      f"Words: {len(page_text.split())}, Confidence: {confidence:.0f}")
+
+            if cascade and index < len(configs) - 1:
+                if confidence >= OCR_CASCADE_CONFIDENCE and page_text.strip():
+                    print(f"Page {page_num + 1}: confidence {confidence:.0f} with {config}, "
+                          f"skipping {len(configs) - index - 1} remaining configs")
+                    break
+                print(f"Page {page_num + 1}: low confidence ({confidence:.0f}) with {config}, "
+                      f"trying {configs[index + 1]}")
+
+        except Exception as e:
+            print(f"Error with config {config} on page {page_num + 1}: {e}")
+            continue
+
+    return best_text, best_score, best_confidence, best_config
+
+
+def ocr_page(page, page_num: int, timeout: float = OCR_PAGE_TIMEOUT) -> str:
+    """Render a single PyMuPDF page and return the best OCR text for it."""
+    try:
+        if OCR_RENDER_MODE == "fixed":
+            return _ocr_page_fixed(page, page_num, timeout)
+
+        if OCR_LAYOUT == "regions":
+            try:
+                return _ocr_page_regions(page, page_num, timeout)
+            except Exception as e:
+                print(f"Region OCR failed on page {page_num + 1} ({str(e)}), OCR'ing the whole page")
+
+        dpi = choose_render_dpi(page)
+        pix = render_page_gray(page, dpi)
+        print(f"Page {page_num + 1} rendered at {dpi} DPI, image size: {(pix.width, pix.height)}")
+        best_text, best_score, confidence, best_config = _ocr_image(pix, page_num, timeout)
+
+        if confidence < OCR_RETRY_CONFIDENCE and dpi < OCR_RETRY_DPI:
+            print(f"Page {page_num + 1}: low confidence ({confidence:.0f}), retrying at {OCR_RETRY_DPI} DPI")
+            pix = render_page_gray(page, OCR_RETRY_DPI)
+            # Only the config that did best at the lower DPI, so a cascade isn't run twice
+            retry_text, retry_score, retry_confidence, _ = _ocr_image(pix, page_num, timeout, [best_config])
+            if retry_confidence > confidence and retry_text.strip():
+                best_text = retry_text
+
+        return best_text
+
+    except Exception as e:
+        print(f"Error processing page {page_num + 1}: {str(e)}")
+        print("Full traceback:")
+        print(traceback.format_exc())
+        return ""
+
+
+def _needs_flip(image, mask, page_num: int, timeout: float) -> bool:
+    """OCR a sample strip as it is and turned 180 degrees; True if upside down reads better."""
+    top, bottom = orientation_sample(mask)
+    sample = image.crop((0, round(top * image.height), image.width, round(bottom * image.height)))
+    _, confidence = recognize(sample, OCR_TABLE_CONFIG, timeout)
+    if confidence >= ORIENTATION_CONFIDENCE:
+        return False
+    _, flipped_confidence = recognize(sample.rotate(180), OCR_TABLE_CONFIG, timeout)
+    print(f"Page {page_num + 1} orientation check: confidence {confidence:.0f} as is, "
+          f"{flipped_confidence:.0f} turned 180")
+    return flipped_confidence > confidence
+
+
+def _ocr_page_regions(page, page_num: int, timeout: float) -> str:
+    """OCR a page region by region: tables at the render DPI, other text at a lower DPI."""
+    deadline = time.monotonic() + timeout
+    table_dpi = choose_render_dpi(page)
+    text_dpi = min(table_dpi, OCR_REGION_TEXT_DPI)
+    image = pixmap_to_image(render_page_gray(page, text_dpi))
+    mask = ink_mask(image, text_dpi)
+
+    # Clockwise degrees that turn the page upright (PIL rotates counter-clockwise)
+    rotation = 0
+    if is_sideways(mask):
+        rotation = 90
+        image = image.rotate(-rotation, expand=True)
+        mask = mask.rotate(-rotation, expand=True)
+    if not detect_regions(mask):
+        print(f"Page {page_num + 1} is blank")
+        return ""
+    if _needs_flip(image, mask, page_num, timeout):
+        rotation = (rotation + 180) % 360
+        image = image.rotate(180)
+        mask = mask.rotate(180)
+    regions = detect_regions(mask)
+
+    tables = sum(1 for kind, _, _ in regions if kind == "table")
+    print(f"Page {page_num + 1} layout: rotated {rotation}, {len(regions)} regions ({tables} tables)")
+    parts = []
+    pixels = 0
+    for kind, top, bottom in regions:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print(f"Page {page_num + 1} timed out after {len(parts)} of {len(regions)} regions")
+            break
+        if kind == "table":
+            if table_dpi > text_dpi:
+                region = pixmap_to_image(render_band_gray(page, table_dpi, rotation, top, bottom))
+            else:
+                region = image.crop((0, round(top * image.height), image.width, round(bottom * image.height)))
+            region_text, _, _, _ = _ocr_image(region, page_num, remaining, [OCR_TABLE_CONFIG])
+        else:
+            region = image.crop((0, round(top * image.height), image.width, round(bottom * image.height)))
+            region_text, _, _, _ = _ocr_image(region, page_num, remaining)
+        pixels += region.width * region.height
+        if region_text.strip():
+            parts.append(region_text.strip())
+
+    print(f"Page {page_num + 1}: OCR'd {pixels / 1e6:.1f} MP in {len(regions)} regions")
+    return "\n\n".join(parts)
+
+
+def _ocr_page_fixed(page, page_num: int, timeout: float) -> str:
+    """Original rendering: RGB at 4x zoom, converted to grayscale in PIL."""
+    # Get page as image with higher resolution
+    with fitz_lock:
+        pix = page.get_pixmap(matrix=fitz.Matrix(RENDER_ZOOM, RENDER_ZOOM))
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    print(f"Page {page_num + 1} image size: {img.size}")
+
+    # Enhanced image preprocessing
+    img = img.convert('L')  # Convert to grayscale
+
+    best_text = ""
+    best_score = 0
+
+    for config in OCR_CONFIGS:
+        try:
+            page_text = pytesseract.image_to_string(img, config=config, timeout=timeout)
+            score = score_ocr_text(page_text)
+
+            if score > best_score:
+                best_text = page_text
+                best_score = score
+                print(f"Page {page_num + 1}, Config: {config} - Score: {score}, Words: {len(page_text.split())}")
+
+        except Exception as e:
+            print(f"Error with config {config} on page {page_num + 1}: {e}")
+            continue
+
+    return best_text
+
+
+def _ocr_page_from_file(pdf_path: str, page_num: int, timeout: float) -> tuple:
+    """Worker entry point: open the PDF in this process and OCR one page.
+
+    Returns (text, engine metrics) so the parent can report per-worker timings.
+    """
+    with fitz.open(pdf_path) as doc:
+        page_text = ocr_page(doc[page_num], page_num, timeout)
+    return page_text, get_ocr_engine().metrics()
+
+
+def _init_ocr_worker():
+    """Pool initializer: create and warm this worker's OCR engine once."""
+    if not OCR_WARMUP:
+        return
+    try:
+        get_ocr_engine().warm_up()
+    except Exception as e:
+        print(f"OCR engine warm-up failed in worker {os.getpid()}: {str(e)}")
+
+
+def _ocr_worker_metrics() -> dict:
+    """Worker task used at warm-up: make sure the worker exists and report its metrics."""
+    return get_ocr_engine().metrics()
+
+
+def _record_worker_metrics(metrics: dict):
+    _worker_metrics[metrics["pid"]] = metrics
+
+
+def get_ocr_pool(workers: int = None) -> ProcessPoolExecutor:
+    """Return the shared OCR process pool, (re)creating it for the requested size."""
+    global _pool, _pool_workers
+    workers = workers or OCR_WORKERS
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            print(f"Starting OCR process pool with {workers} workers")
+            # Spawned, not forked: a worker started while an upload thread holds fitz_lock
+            # (after a BrokenProcessPool, or on demand without warm-up) would inherit it locked
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker,
+                                        mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+            _worker_metrics.clear()
+        return _pool
+
+
+def warm_up_ocr(workers: int = None):
+    """Load the OCR engine ahead of the first upload (called at server start).
+
+    With a process pool, one task is submitted per worker so every worker is
+    started and runs its initializer now; otherwise the in-process engine is
+    warmed.
+    """
+    workers = workers or OCR_WORKERS
+    start = time.perf_counter()
+    if workers <= 1:
+        get_ocr_engine().warm_up()
+    else:
+        pool = get_ocr_pool(workers)
+        for future in [pool.submit(_ocr_worker_metrics) for _ in range(workers)]:
+            _record_worker_metrics(future.result())
+    print(f"OCR warm-up finished in {time.perf_counter() - start:.2f}s")
+
+
+def ocr_metrics() -> dict:
+    """Engine init vs recognition time for this process and each pool worker."""
+    workers = sorted(_worker_metrics.values(), key=lambda m: m["pid"])
+    return {
+        "engine": _engine.name if _engine is not None else (workers[0]["engine"] if workers else None),
+        "in_process": _engine.metrics() if _engine is not None else None,
+        "workers": workers,
+        "init_seconds": round(sum(m["init_seconds"] for m in workers), 4),
+        "recognitions": sum(m["recognitions"] for m in workers),
+        "recognize_seconds": round(sum(m["recognize_seconds"] for m in workers), 4),
+    }
+
+
+def shutdown_ocr_pool():
+    """Stop the shared OCR process pool if it is running."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            _pool_workers = 0
+
+
+def _discard_ocr_pool(pool: ProcessPoolExecutor):
+    """Stop a pool with a stuck or dead worker; the next get_ocr_pool starts a new one.
+
+    shutdown() lets running tasks run on, so its workers are terminated as well.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _pool_workers = 0
+    processes = list((pool._processes or {}).values())  # shutdown() drops the executor's references
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def page_content_hash(doc, page) -> str:
+    """Hash what a page draws (content stream, forms and image data) plus the OCR settings."""
+    digest = hashlib.sha256(ocr_config_signature().encode("utf-8"))
+    digest.update(f"{tuple(page.rect)}|{page.rotation}".encode("utf-8"))
+    digest.update(page.read_contents())
+    for xobject in page.get_xobjects():
+        digest.update(doc.xref_stream_raw(xobject[0]) or b"")
+    for image in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(image[0]) or b"")
+    return digest.hexdigest()
+
+
+def ocr_pdf_pages(pdf, page_nums: list = None, workers: int = None, timeout: float = None,
+                  page_cache=None, stats: dict = None) -> list:
+    """OCR pages of a PDF (a PDFDocument or raw bytes) and return their texts in order.
+
+    `page_nums` selects the pages to OCR (default: every page). Pages already
+    in `page_cache` (a PageTextCache) are reused and only the remaining pages
+    are OCR'd; hit/miss counts are added to `stats` if given.
+    """
+    if isinstance(pdf, bytes):
+        with PDFDocument(pdf) as document:
+            return ocr_pdf_pages(document, page_nums, workers, timeout, page_cache, stats)
+
+    workers = workers or OCR_WORKERS
+    timeout = timeout or OCR_PAGE_TIMEOUT
+    if page_nums is None:
+        page_nums = list(range(len(pdf)))
+
+    print(f"OCR needed for {len(page_nums)} of {len(pdf)} pages")
+    page_keys = {}
+    if page_cache is not None:
+        with fitz_lock:
+            page_keys = {n: page_content_hash(pdf.doc, pdf.doc[n]) for n in page_nums}
+
+    page_texts = {}
+    if page_cache is not None:
+        try:
+            cached = page_cache.get_many(list(page_keys.values()))
+        except Exception as e:
+            print(f"Error reading page text cache: {str(e)}")
+            cached = {}
+        for page_num, key in page_keys.items():
+            if key in cached:
+                page_texts[page_num] = cached[key]
+
+    pending = [page_num for page_num in page_nums if page_num not in page_texts]
+    if page_cache is not None:
+        print(f"Page text cache: {len(page_nums) - len(pending)} hits, {len(pending)} misses")
+    if stats is not None:
+        stats["page_cache_hits"] = stats.get("page_cache_hits", 0) + len(page_nums) - len(pending)
+        stats["page_cache_misses"] = stats.get("page_cache_misses", 0) + len(pending)
+
+    if pending:
+        for page_num, page_text in zip(pending, _ocr_pages(pdf, pending, workers, timeout)):
+            page_texts[page_num] = page_text
+
+        if page_cache is not None:
+            # Empty text may be a timeout or error, so only cache pages that produced text
+            new_entries = {page_keys[n]: page_texts[n] for n in pending if page_texts[n].strip()}
+            try:
+                page_cache.put_many(new_entries)
+            except Exception as e:
+                print(f"Error writing page text cache: {str(e)}")
+
+    return [page_texts[page_num] for page_num in page_nums]
+
+
+def _ocr_pages(pdf: PDFDocument, page_nums: list, workers: int, timeout: float) -> list:
+    """OCR the given pages, on the shared process pool when more than one worker is configured.
+
+    A page that exceeds `timeout` seconds yields empty text. On the pool a
+    page's wait starts once the pages before it are done, so by then it is
+    already running; a page still running when the wait ends is stopped by
+    replacing the pool (a running task can't be cancelled), and the pages
+    that hadn't finished yet are OCR'd on the new pool.
+    """
+    if workers <= 1 or len(page_nums) <= 1:
+        return [ocr_page(pdf.page(page_num), page_num, timeout) for page_num in page_nums]
+
+    # Workers open the PDF from disk so no pixmaps or page objects are pickled
+    tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    try:
+        tmp.write(pdf.content)
+        tmp.close()
+
+        pool = get_ocr_pool(workers)
+        print(f"OCR'ing {len(page_nums)} pages across {workers} worker processes")
+        futures = [
+            pool.submit(_ocr_page_from_file, tmp.name, page_num, timeout)
+            for page_num in page_nums
+        ]
+
+        page_texts = []
+        for index, future in enumerate(futures):
+            page_num = page_nums[index]
+            try:
+                # Tesseract enforces the timeout per config (and per low-confidence
+                # retry) inside the worker; allow headroom here for rendering
+                page_text, metrics = future.result(timeout=timeout * (len(active_ocr_configs()) + 2))
+                _record_worker_metrics(metrics)
+                page_texts.append(page_text)
+            except FutureTimeoutError:
+                print(f"Timed out waiting for OCR of page {page_num + 1}, skipping it and restarting the OCR pool")
+                later = list(zip(page_nums[index + 1:], futures[index + 1:]))
+                finished = {
+                    later_page: later_future.result() for later_page, later_future in later
+                    if later_future.done() and not later_future.cancelled() and later_future.exception() is None
+                }
+                _discard_ocr_pool(pool)
+                redo = [later_page for later_page, _ in later if later_page not in finished]
+                redone = dict(zip(redo, _ocr_pages(pdf, redo, workers, timeout))) if redo else {}
+                page_texts.append("")
+                for later_page, _ in later:
+                    if later_page in finished:
+                        page_text, metrics = finished[later_page]
+                        _record_worker_metrics(metrics)
+                        page_texts.append(page_text)
+                    else:
+                        page_texts.append(redone[later_page])
+                break
+            except BrokenProcessPool:
+                print(f"OCR worker pool broke on page {page_num + 1}, finishing in process")
+                _discard_ocr_pool(pool)
+                for remaining in page_nums[index:]:
+                    page_texts.append(ocr_page(pdf.page(remaining), remaining, timeout))
+                break
+        return page_texts
+    finally:
+        try:
+            os.unlink(tmp.name)
+        except OSError:
+            pass
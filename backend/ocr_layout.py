@@ -0,0 +1,162 @@
+"""
+Page layout detection for region-based OCR.
+
+Works on a low-resolution ink mask of the rendered page using projection
+profiles (row and column ink counts, computed by PIL box-resizing so no
+per-pixel Python loops are needed):
+
+- orientation: text lines make the profile across them alternate sharply
+  between ink and gaps, so a page whose column profile is much "busier" than
+  its row profile was scanned sideways;
+- regions: rows with no ink split the page into blocks; full-width rules
+  separate blocks too. A block whose lines share a vertical whitespace gutter
+  is tabular (the key/value headers and wells tables of division orders);
+  runs of consecutive blocks of the same kind become one region.
+
+Regions are returned top to bottom as fractions of the page height, so they
+can be cropped from the low-DPI render or re-rendered at a higher DPI.
+"""
+
+from PIL import Image
+
+# Resolution the ink mask is analysed at
+LAYOUT_DPI = 50
+
+# Pixels darker than this count as ink
+INK_THRESHOLD = 128
+
+# Column profile this much busier than the row profile means the text runs vertically
+SIDEWAYS_RATIO = 1.5
+
+# Row ink fractions: at most BLANK_ROW is a gap, at least RULE_ROW is a ruling line
+BLANK_ROW = 0.004
+RULE_ROW = 0.5
+
+# A vertical gap at least this wide (inches) running through every line of a block is a column gutter
+GUTTER_MIN_WIDTH = 0.25
+
+# Gaps shorter than this (inches) don't split blocks (line spacing)
+BLOCK_MIN_GAP = 0.08
+
+# Padding (inches) added above and below each region before cropping
+REGION_PADDING = 0.05
+
+# Largest share of the page height used as the orientation check sample
+ORIENTATION_SAMPLE_MAX = 0.2
+
+
+def pixmap_to_image(pix) -> Image.Image:
+    """Wrap a grayscale PyMuPDF pixmap as a PIL image."""
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+
+def ink_mask(image: Image.Image, dpi: int) -> Image.Image:
+    """Downscale a grayscale page to LAYOUT_DPI with each pixel holding its ink coverage (0-255)."""
+    ink = image.point(lambda value: 255 if value < INK_THRESHOLD else 0)
+    scale = LAYOUT_DPI / dpi
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return ink.resize(size, Image.BOX)
+
+
+def _row_profile(mask: Image.Image) -> list:
+    """Ink fraction (0-1) of every row."""
+    return [value / 255 for value in mask.resize((1, mask.height), Image.BOX).getdata()]
+
+
+def _column_profile(mask: Image.Image) -> list:
+    """Ink fraction (0-1) of every column."""
+    return [value / 255 for value in mask.resize((mask.width, 1), Image.BOX).getdata()]
+
+
+def _profile_energy(profile: list) -> float:
+    """Mean absolute change between neighbouring bins; high when lines alternate with gaps."""
+    if len(profile) < 2:
+        return 0.0
+    return sum(abs(a - b) for a, b in zip(profile, profile[1:])) / (len(profile) - 1)
+
+
+def is_sideways(mask: Image.Image) -> bool:
+    """True when the page's text lines run vertically (a portrait page scanned landscape)."""
+    row_energy = _profile_energy(_row_profile(mask))
+    column_energy = _profile_energy(_column_profile(mask))
+    return column_energy > row_energy * SIDEWAYS_RATIO
+
+
+def _find_blocks(rows: list) -> list:
+    """Split the row profile into (top, bottom, ruled) blocks of ink separated by gaps or rules.
+
+    `ruled` is set for blocks that sit directly against a ruling line.
+    """
+    min_gap = max(1, round(BLOCK_MIN_GAP * LAYOUT_DPI))
+    blocks = []
+    start = None
+    last_ink = None
+    last_rule = None
+    ruled_above = False
+    for y, ink in enumerate(rows):
+        if ink >= RULE_ROW:
+            if start is not None:
+                blocks.append((start, last_ink + 1, True))
+                start = None
+            last_rule = y
+        elif ink > BLANK_ROW:
+            if start is not None and y - last_ink > min_gap:
+                blocks.append((start, last_ink + 1, ruled_above))
+                start = None
+            if start is None:
+                start = y
+                ruled_above = last_rule is not None and y - last_rule <= min_gap
+            last_ink = y
+    if start is not None:
+        blocks.append((start, last_ink + 1, ruled_above))
+    return blocks
+
+
+def _has_gutter(mask: Image.Image, top: int, bottom: int) -> bool:
+    """True when a wide blank column runs through the whole block between its first and last ink."""
+    columns = _column_profile(mask.crop((0, top, mask.width, bottom)))
+    inked = [x for x, ink in enumerate(columns) if ink > 0]
+    if not inked:
+        return False
+    min_width = max(1, round(GUTTER_MIN_WIDTH * LAYOUT_DPI))
+    run = 0
+    for ink in columns[inked[0]:inked[-1] + 1]:
+        if ink == 0:
+            run += 1
+            if run >= min_width:
+                return True
+        else:
+            run = 0
+    return False
+
+
+def detect_regions(mask: Image.Image) -> list:
+    """Return [(kind, top, bottom)] with kind "table" or "text" and top/bottom as page-height fractions."""
+    blocks = _find_blocks(_row_profile(mask))
+    regions = []
+    for top, bottom, ruled in blocks:
+        kind = "table" if ruled or _has_gutter(mask, top, bottom) else "text"
+        if regions and regions[-1][0] == kind:
+            regions[-1][2] = bottom
+        else:
+            regions.append([kind, top, bottom])
+
+    padding = REGION_PADDING * LAYOUT_DPI
+    height = mask.height
+    return [
+        (kind, max(0.0, (top - padding) / height), min(1.0, (bottom + padding) / height))
+        for kind, top, bottom in regions
+    ]
+
+
+def orientation_sample(mask: Image.Image) -> tuple:
+    """Pick a (top, bottom) strip, as page-height fractions, of text to test the orientation on.
+
+    Uses the tallest region, capped at ORIENTATION_SAMPLE_MAX of the page so
+    the check stays cheap.
+    """
+    regions = detect_regions(mask)
+    if not regions:
+        return 0.0, 1.0
+    _, top, bottom = max(regions, key=lambda region: region[2] - region[1])
+    return top, min(bottom, top + ORIENTATION_SAMPLE_MAX)
@@ -0,0 +1,58 @@
+"""
+OCR output quality scoring.
+
+Used to pick the best text when a page is OCR'd more than once (several
+Tesseract configs, or a retry at a higher DPI). The page text is lowercased
+once; a single regex finds garbage runs (any letter repeated 10 times, a
+typical Tesseract artefact on noise and borders) and the division order
+terms are looked up in that same copy, instead of lowercasing the page again
+for each of the 26 garbage patterns and 8 terms.
+"""
+
+import re
+
+# Common legal/division order terms
+LEGAL_TERMS = ['operator', 'entity', 'well', 'interest', 'county', 'state', 'effective', 'date']
+
+# Any lowercase letter repeated 10 times ("qqqqqqqqqq", "llllllllll", ...)
+GARBAGE_RUN = re.compile(r'([a-z])\1{9}')
+
+WORD_POINTS = 10
+# (length threshold, bonus) for longer text
+LENGTH_BONUSES = [(100, 100), (500, 200), (1000, 300)]
+GARBAGE_PENALTY = 500
+TERM_BONUS = 50
+
+
+def analyze_ocr_text(page_text: str) -> dict:
+    """Count words, letters with garbage runs and legal terms present in the text."""
+    lowered = page_text.lower()
+    return {
+        "words": len(page_text.split()),
+        "chars": len(page_text),
+        "garbage_letters": set(GARBAGE_RUN.findall(lowered)),
+        "terms": {term for term in LEGAL_TERMS if term in lowered},
+    }
+
+
+def score_analysis(analysis: dict) -> int:
+    """Turn analyze_ocr_text() counts into a score (higher is better)."""
+    score = analysis["words"] * WORD_POINTS  # Base score from word count
+
+    # Bonus for longer text
+    for threshold, bonus in LENGTH_BONUSES:
+        if analysis["chars"] > threshold:
+            score += bonus
+
+    # Penalty for each letter that appears as a 10-character run
+    score -= GARBAGE_PENALTY * len(analysis["garbage_letters"])
+
+    # Bonus for common legal/division order terms
+    score += TERM_BONUS * len(analysis["terms"])
+
+    return score
+
+
+def score_ocr_text(page_text: str) -> int:
+    """Score OCR output quality so the best config can be kept."""
+    return score_analysis(analyze_ocr_text(page_text))
@@ -0,0 +1,89 @@
+"""
+Single-parse PDF handling.
+
+A PDFDocument is built once per upload with PyMuPDF and answers everything the
+pipeline needs from the file: whether it looks scanned, the native text of each
+page, and page rendering for OCR. This replaces parsing the same bytes twice
+with PyPDF2 and a third time with PyMuPDF.
+"""
+
+import threading
+
+import fitz  # PyMuPDF
+
+# PyMuPDF is not thread-safe; uploads parse documents from worker threads, so
+# every in-process MuPDF call goes through this lock (OCR worker processes
+# each have their own copy and never contend on it)
+fitz_lock = threading.RLock()
+
+
+class PDFDocument:
+    """A PDF parsed once with PyMuPDF, shared by the scan check, text extraction and OCR."""
+
+    def __init__(self, pdf_content: bytes):
+        self.content = pdf_content
+        with fitz_lock:
+            self.doc = fitz.open(stream=pdf_content, filetype="pdf")
+        self._page_texts = None
+
+    def __len__(self):
+        return len(self.doc)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with fitz_lock:
+            self.doc.close()
+
+    def page(self, page_num: int):
+        with fitz_lock:
+            return self.doc[page_num]
+
+    def page_texts(self) -> list:
+        """Native (embedded) text of every page, extracted once and reused."""
+        if self._page_texts is None:
+            texts = []
+            with fitz_lock:
+                for page_num, page in enumerate(self.doc):
+                    try:
+                        texts.append(page.get_text())
+                    except Exception as e:
+                        print(f"Error in direct text extraction on page {page_num + 1}: {str(e)}")
+                        texts.append("")
+            self._page_texts = texts
+        return self._page_texts
+
+    def native_text(self) -> str:
+        """All native page text joined in page order."""
+        return "".join(text + "\n" for text in self.page_texts() if text)
+
+    def page_has_images(self, page_num: int) -> bool:
+        with fitz_lock:
+            return bool(self.doc[page_num].get_images())
+
+    def is_scanned(self) -> bool:
+        """Check if the PDF is scanned (image-based) or text-based."""
+        if len(self) == 0:
+            print("PDF has no pages")
+            return True
+
+        # Try to extract text from first page
+        text = self.page_texts()[0]
+        print(f"Initial text extraction length: {len(text.strip())} characters")
+
+        # If we get very little text, it's likely scanned
+        if len(text.strip()) < 100:
+            print("PDF appears to be scanned (little text extracted)")
+            return True
+
+        # Additional check: look for images in the PDF
+        if self.page_has_images(0):
+            print("PDF contains images, likely scanned")
+            return True
+
+        print("PDF appears to be text-based")
+        return False
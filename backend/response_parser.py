@@ -0,0 +1,131 @@
+"""
+Parsing of Claude's extraction responses.
+
+parse_extraction_response finds the extraction object with json's raw
+decoder, starting only at braces that open an object with one of the
+extraction keys, instead of a greedy regex over the whole response (which
+backtracks on long outputs and swallows any text after the JSON). When the
+response was cut off (max_tokens), the header fields and every complete
+entry of "wells" are salvaged and reported rather than losing the whole
+document.
+
+WellStreamParser reads a response while it is still being generated and
+hands out every entry of the "wells" array as soon as its closing brace has
+arrived, so a streaming upload can show the first wells long before the
+whole JSON object is complete.
+"""
+
+import json
+import re
+
+# Start of the wells array in the response JSON
+_WELLS_ARRAY = re.compile(r'"wells"\s*:\s*\[')
+
+HEADER_FIELDS = ("operator", "entity", "state", "effectiveDate")
+
+# An object opening with one of the extraction keys (wells themselves open with propertyName)
+_EXTRACTION_OBJECT = re.compile(r'\{\s*"(?:operator|entity|state|effectiveDate|wells)"')
+
+# "field": "string value" for the header fields of a truncated response
+_HEADER_FIELD = re.compile(r'"(operator|entity|state|effectiveDate)"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+# Separators between array elements
+_SEPARATORS = ' \t\r\n,'
+
+
+class WellStreamParser:
+    """Incrementally decode complete elements of the "wells" array from streamed response text."""
+
+    def __init__(self):
+        self.text = ""
+        self.wells_found = 0
+        self._decoder = json.JSONDecoder()
+        self._next = None  # Position of the next well once the array has started
+        self._scan_from = 0  # Where the start of the array can still be found
+        self._finished = False
+
+    def feed(self, delta: str) -> list:
+        """Add the next piece of response text; return the wells completed by it."""
+        self.text += delta
+        if self._finished:
+            return []
+        if self._next is None:
+            match = _WELLS_ARRAY.search(self.text, self._scan_from)
+            if not match:
+                # Only the last "wells" key (or one still arriving) can be followed by the array
+                key = self.text.rfind('"wells"', self._scan_from)
+                self._scan_from = key if key >= 0 else max(self._scan_from, len(self.text) - len('"wells"'))
+                return []
+            self._next = match.end()
+        elif '}' not in delta:
+            # Nothing can have been completed without a closing brace
+            return []
+
+        wells = []
+        while True:
+            position = self._next
+            while position < len(self.text) and self.text[position] in _SEPARATORS:
+                position += 1
+            if position >= len(self.text):
+                break
+            if self.text[position] == ']':
+                self._finished = True
+                break
+            try:
+                well, end = self._decoder.raw_decode(self.text, position)
+            except json.JSONDecodeError:
+                break  # Element not complete yet
+            self._next = end
+            if isinstance(well, dict):
+                wells.append(well)
+        self.wells_found += len(wells)
+        return wells
+
+
+def _salvage(response_text: str, start: int) -> tuple:
+    """Header fields and complete wells of a truncated extraction object starting at `start`."""
+    data = {field: "" for field in HEADER_FIELDS}
+    wells_start = _WELLS_ARRAY.search(response_text, start)
+    header_end = wells_start.start() if wells_start else len(response_text)
+    found = []
+    for match in _HEADER_FIELD.finditer(response_text, start, header_end):
+        data[match.group(1)] = json.loads(match.group(2))
+        found.append(match.group(1))
+    parser = WellStreamParser()
+    data["wells"] = parser.feed(response_text[start:])
+    report = {
+        "truncated": True,
+        "header_fields": found,
+        "wells_recovered": len(data["wells"]),
+        "recovered_wells": [well.get("propertyName", "") for well in data["wells"]],
+    }
+    return data, report
+
+
+def parse_extraction_response(response_text: str) -> tuple:
+    """Return (data, report) for a Claude extraction response.
+
+    `report` is None when the response held a complete extraction object.
+    For a truncated response it lists what was recovered: the header fields
+    found, and the count and property names of the complete wells kept.
+    Raises ValueError when there is nothing to recover.
+    """
+    decoder = json.JSONDecoder()
+    candidates = [match.start() for match in _EXTRACTION_OBJECT.finditer(response_text)]
+    if not candidates and '{' in response_text:
+        candidates = [response_text.index('{')]
+    for start in candidates:
+        try:
+            data, _ = decoder.raw_decode(response_text, start)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(data, dict):
+            return data, None
+
+    # Nothing complete: salvage what the first candidate object holds
+    if not candidates:
+        raise ValueError("No JSON object found in Claude's response")
+    data, report = _salvage(response_text, candidates[0])
+    if not data["wells"] and not report["header_fields"]:
+        raise ValueError("No JSON object found in Claude's response")
+    return data, report
@@ -0,0 +1,149 @@
+"""
+Backfill test against the fake Message Batches endpoints in fake_anthropic.py.
+
+Generates a few text PDFs and runs backfill.py over them. Two runs stop
+while submitting, before and after the batch is created. Later runs must
+not adopt another client's batch of the same size, must not resubmit while
+the created batch is still running (it can't be checked yet), and must
+adopt it once its results show the same documents, then collect and deploy
+them. The last run must find nothing left to do. A
+truncated response fails the document instead of deploying its partial
+wells. Everything is written to a temporary directory, not to the real
+dashboard or caches.
+
+    python test_backfill.py
+"""
+
+import asyncio
+import os
+import pathlib
+import tempfile
+import time
+from unittest.mock import patch
+
+import fitz
+from anthropic import AsyncAnthropic
+from anthropic.resources.messages.batches import AsyncBatches
+from sqlalchemy.orm import sessionmaker
+
+from extraction_cache import ExtractionCache, PageTextCache
+from fake_anthropic import start_fake_anthropic, fake_base_url, ERROR_MARKER, TRUNCATE_MARKER
+
+DOCUMENTS = {
+    "alpha.pdf": ["ALPHA 1H  Reeves  0.00125000", "ALPHA 2H  Reeves  0.00250000"],
+    "bravo.pdf": ["BRAVO 1H  Upton  0.01000000", "BRAVO 2H  Upton  0.02000000", "BRAVO 3H  Upton  0.03000000"],
+    "broken.pdf": [f"{ERROR_MARKER}  0.05000000"],
+    "truncated.pdf": [TRUNCATE_MARKER] + [f"CHARLIE {i}H  Loving  0.0{i}500000" for i in range(1, 5)],
+}
+
+
+def write_pdf(path: pathlib.Path, lines: list):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "DIVISION ORDER\nOperator: TEST OPERATING LLC\n" + "\n".join(lines))
+    doc.save(path)
+    doc.close()
+
+
+def run_until_stopped(run):
+    try:
+        asyncio.run(run)
+    except RuntimeError as e:
+        assert str(e) == "Stopped", e
+    else:
+        raise AssertionError("Expected the run to stop")
+
+
+async def other_batch(client, count: int):
+    await client.messages.batches.create(requests=[
+        {"custom_id": f"other-{i}", "params": {"model": "test", "max_tokens": 100,
+                                               "messages": [{"role": "user", "content": "0.00100000"}]}}
+        for i in range(count)
+    ])
+
+
+def test_backfill():
+    work_dir = pathlib.Path(tempfile.mkdtemp(prefix="backfill_test_"))
+    pdf_dir = work_dir / "pdfs"
+    pdf_dir.mkdir()
+    for name, lines in DOCUMENTS.items():
+        write_pdf(pdf_dir / name, lines)
+
+    server = start_fake_anthropic(seconds_per_well=0, batch_seconds=0.5)
+    # If this is the first import of main, it mustn't open the real caches and dashboard
+    with patch.dict(os.environ, ANTHROPIC_API_KEY="test", EXTRACTION_CACHE_PATH=str(work_dir / "extraction_cache.db"),
+                    DATABASE_URL=f"sqlite:///{work_dir / 'dashboard.db'}"):
+        import backfill
+        import dashboard_store
+        from database import make_engine
+    # main may have been imported before: its client, caches and dashboard database are replaced for the test
+    dashboard_engine = make_engine(f"sqlite:///{work_dir / 'dashboard.db'}")
+    test_main = patch.multiple(
+        backfill.main,
+        claude=AsyncAnthropic(api_key="test", base_url=fake_base_url(server)),
+        LOCAL_EXTRACTION=False,
+        extraction_cache=ExtractionCache(work_dir / "extraction_cache.db"),
+        page_text_cache=PageTextCache(work_dir / "extraction_cache.db"),
+    )
+    test_dashboard = patch.multiple(
+        dashboard_store, engine=dashboard_engine,
+        SessionLocal=sessionmaker(autocommit=False, autoflush=False, bind=dashboard_engine),
+    )
+
+    state_path = work_dir / "backfill_state.db"
+    try:
+        test_main.start()
+        test_dashboard.start()
+        dashboard_store.init_store()
+        # Stopped before the batch was created: nothing to find, the documents are submitted again
+        with patch.object(AsyncBatches, "create", side_effect=RuntimeError("Stopped")):
+            run_until_stopped(backfill.run_backfill(pdf_dir, state_path))
+        assert backfill.BackfillState(state_path).summary() == {"submitting": 4}
+        # Another client's batch of as many requests, created meanwhile, is not adopted
+        asyncio.run(other_batch(backfill.main.claude, 4))
+        time.sleep(0.6)
+        # Stopped after the batch was created but before it was recorded
+        with patch.object(backfill.BackfillState, "mark_submitted", side_effect=RuntimeError("Stopped")):
+            run_until_stopped(backfill.run_backfill(pdf_dir, state_path))
+        assert len(server.batches) == 2
+
+        # Interrupted run: the batch can't be checked until it has ended, so it isn't resubmitted either
+        summary = asyncio.run(backfill.run_backfill(pdf_dir, state_path, wait=False))
+        assert summary == {"submitting": 4}, summary
+        assert len(server.batches) == 2
+        assert dashboard_store.list_records() == []
+
+        # Resumed run: adopts the ended batch once its results are these documents, and collects it
+        time.sleep(0.6)
+        summary = asyncio.run(backfill.run_backfill(pdf_dir, state_path, poll_seconds=0.2))
+        assert summary == {"deployed": 2, "failed": 2}, summary
+        assert len(server.batches) == 2
+        records = dashboard_store.list_records()
+        assert sorted(record["decimalInterest"] for record in records) == [
+            "0.00125000", "0.00250000", "0.01000000", "0.02000000", "0.03000000"
+        ], records
+        assert all(record["state"] == "TX" and record["operator"] == "OPERATOR" for record in records)
+        [truncated] = [d for d in backfill.BackfillState(state_path).documents(backfill.FAILED) if d["data"]]
+        assert truncated["path"].endswith("truncated.pdf") and truncated["data"]["recovery"], truncated
+        assert backfill.main.extraction_cache.get(truncated["cache_key"]) is None
+
+        # Nothing left to do: no new batch, no duplicate records
+        summary = asyncio.run(backfill.run_backfill(pdf_dir, state_path, poll_seconds=0.2))
+        assert summary == {"deployed": 2, "failed": 2}, summary
+        assert len(server.batches) == 2
+        assert len(dashboard_store.list_records()) == 5
+
+        # Failed documents are resubmitted on request
+        summary = asyncio.run(backfill.run_backfill(pdf_dir, state_path, poll_seconds=0.2, retry_failed=True))
+        assert summary == {"deployed": 2, "failed": 2}, summary
+        assert len(server.batches) == 3
+        print("Backfill test passed")
+    finally:
+        patch.stopall()
+        dashboard_engine.dispose()
+        backfill.main.shutdown_ocr_pool()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_backfill()
@@ -0,0 +1,106 @@
+"""
+Test of chunked Claude extraction (chunked_extraction.py).
+
+Checks where split_text cuts a long document, how merge_results combines
+header fields, wells and recovery reports of the parts, and runs
+extract_in_chunks against fake_anthropic.py: every well comes back once, in
+document order, with no more parts in flight than the concurrency allows.
+
+    python test_chunked_extraction.py
+"""
+
+import asyncio
+import json
+
+from anthropic import AsyncAnthropic
+
+from chunked_extraction import extract_in_chunks, merge_results, split_text
+from fake_anthropic import start_fake_anthropic, fake_base_url
+
+HEADER = "DIVISION ORDER\nOperator: TEST OPERATING LLC\nOwner Name: BLUE SKY MINERALS LP\n"
+
+
+def well_rows(count: int) -> list:
+    # Name and description on their own lines, the interest ending the row
+    return [f"WELL {i:03d}H\nSEC {i}, BLK 36\nReeves  0.{i:08d}" for i in range(1, count + 1)]
+
+
+def test_split_text():
+    assert split_text("short", 100) == ["short"]
+
+    text = HEADER + "\n".join(well_rows(60)) + "\nSigned by the owner"
+    parts = split_text(text, 300)
+    assert "".join(parts) == text
+    assert all(len(part) <= 300 for part in parts)
+    # Every part but the last ends after a decimal interest line, so no well is split
+    for part in parts[:-1]:
+        assert part.endswith("\n") and part.rstrip("\n").rsplit("\n", 1)[-1].startswith("Reeves"), part
+
+    # No well row in range: cut at the last line break, or mid-line for a single long line
+    assert split_text("Payment terms\n" * 10, 50) == ["Payment terms\n" * 3] * 3 + ["Payment terms\n"]
+    assert split_text("x" * 120, 50) == ["x" * 50, "x" * 50, "x" * 20]
+
+
+def test_merge_results():
+    merged = merge_results([
+        {"operator": "", "entity": "BLUE SKY", "wells": [{"decimalInterest": "0.1"}]},
+        {"operator": "TEST OPERATING", "entity": "OTHER", "state": "TX", "wells": [{"decimalInterest": "0.2"}]},
+        {"operator": "", "wells": None},
+        {"effectiveDate": "3/1/2025", "wells": [{"decimalInterest": "0.3"}]},
+    ])
+    assert merged == {
+        "operator": "TEST OPERATING", "entity": "BLUE SKY", "state": "TX", "effectiveDate": "3/1/2025",
+        "wells": [{"decimalInterest": "0.1"}, {"decimalInterest": "0.2"}, {"decimalInterest": "0.3"}],
+    }, merged
+
+    # Truncated parts keep their recovered wells and are reported with their part numbers
+    merged = merge_results([
+        {"wells": [{"decimalInterest": "0.1"}], "recovery": {"truncated": True, "wells_recovered": 1}},
+        {"wells": [{"decimalInterest": "0.2"}]},
+        {"wells": [{"decimalInterest": "0.3"}, {"decimalInterest": "0.4"}],
+         "recovery": {"truncated": True, "wells_recovered": 2}},
+    ])
+    assert len(merged["wells"]) == 4
+    assert merged["recovery"] == {
+        "truncated": True, "wells_recovered": 3,
+        "parts": [{"part": 1, "truncated": True, "wells_recovered": 1},
+                  {"part": 3, "truncated": True, "wells_recovered": 2}],
+    }, merged["recovery"]
+    print("Split and merge: OK")
+
+
+async def extract(server, text: str, max_chars: int, concurrency: int) -> dict:
+    client = AsyncAnthropic(api_key="test", base_url=fake_base_url(server))
+
+    async def send_message(content: str) -> str:
+        message = await client.messages.create(
+            model="test", max_tokens=15000, temperature=0,
+            messages=[{"role": "user", "content": content}],
+        )
+        return message.content[0].text
+
+    _, merged = await extract_in_chunks(text, send_message, json.loads, max_chars, concurrency)
+    return merged
+
+
+def test_extract_in_chunks():
+    server = start_fake_anthropic(seconds_per_well=0.01)
+    text = HEADER + "\n".join(well_rows(60))
+    parts = split_text(text, 400)
+    try:
+        merged = asyncio.run(extract(server, text, 400, concurrency=3))
+    finally:
+        server.shutdown()
+    assert len(parts) > 3
+    assert server.requests == len(parts)
+    assert 1 < server.max_in_flight <= 3, server.max_in_flight
+    assert [well["decimalInterest"] for well in merged["wells"]] == [f"0.{i:08d}" for i in range(1, 61)]
+    assert merged["operator"] == "OPERATOR" and "recovery" not in merged
+    print(f"Chunked extraction: OK ({len(parts)} parts, {server.max_in_flight} in flight at most)")
+
+
+if __name__ == "__main__":
+    test_split_text()
+    test_merge_results()
+    test_extract_in_chunks()
+    print("Chunked extraction test passed")
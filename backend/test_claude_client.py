@@ -0,0 +1,181 @@
+"""
+Resilience test for claude_client.ExtractionClient against fake_anthropic.py.
+
+Checks that overload (529) and rate limit (429) answers are retried, that the
+circuit breaker opens after repeated failures, fails fast while open and
+closes again after a successful trial, that the request deadline is enforced,
+also on a stream that stalls before its first event, and that concurrent
+requests stay within the configured limit. Also checks that
+strip_boilerplate removes provisions without taking any field lines.
+
+    python test_claude_client.py
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+from anthropic import AsyncAnthropic
+
+import claude_client
+from claude_client import ExtractionClient, CircuitBreaker, ClaudeUnavailableError, strip_boilerplate
+from fake_anthropic import start_fake_anthropic, fake_base_url
+
+MESSAGE = "WELL A 0.00125000\nWELL B 0.00250000"
+
+
+def new_client(server) -> ExtractionClient:
+    anthropic_client = AsyncAnthropic(api_key="test", base_url=fake_base_url(server))
+    return ExtractionClient(anthropic_client, "test-model", "Extract the wells.")
+
+
+async def check_retries(server):
+    client = new_client(server)
+    server.fail_next = [529, 429]
+    text = await client.send(MESSAGE)
+    assert "0.00250000" in text
+    assert client.totals["retries"] == 2, client.totals
+
+    server.fail_next = [529]
+    streamed = "".join([delta async for delta in client.stream(MESSAGE)])
+    assert "0.00125000" in streamed
+    assert client.totals["retries"] == 3, client.totals
+    print("Retries: OK")
+
+
+async def check_circuit_breaker(server):
+    client = new_client(server)
+    client.breaker = CircuitBreaker(threshold=2, cooldown=0.5)
+    server.fail_next = [529] * 10
+    try:
+        await client.send(MESSAGE)
+        raise AssertionError("Expected the breaker to open")
+    except ClaudeUnavailableError:
+        pass
+    assert client.breaker.state == "open"
+
+    # Open: fails without calling the API
+    requests = server.requests
+    try:
+        await client.send(MESSAGE)
+        raise AssertionError("Expected a fast failure while open")
+    except ClaudeUnavailableError:
+        pass
+    assert server.requests == requests
+
+    # After the cooldown a successful trial closes it again
+    server.fail_next = []
+    await asyncio.sleep(0.6)
+    await client.send(MESSAGE)
+    assert client.breaker.state == "closed"
+    print("Circuit breaker: OK")
+
+
+async def check_deadline(server):
+    client = new_client(server)
+    server.seconds_per_well = 1  # Two wells: 2s, past the 1s deadline
+    start = time.perf_counter()
+    try:
+        await client.send(MESSAGE)
+        raise AssertionError("Expected the deadline to be exceeded")
+    except TimeoutError:
+        pass
+    finally:
+        server.seconds_per_well = 0
+    assert time.perf_counter() - start < 1.5
+    print("Deadline: OK")
+
+
+async def check_stream_deadline(server):
+    client = new_client(server)
+    server.first_byte_delay = 2  # Nothing at all arrives before the 1s deadline
+    start = time.perf_counter()
+    try:
+        async for _ in client.stream(MESSAGE):
+            pass
+        raise AssertionError("Expected the deadline to be exceeded before the stream started")
+    except TimeoutError:
+        pass
+    finally:
+        server.first_byte_delay = 0
+    assert time.perf_counter() - start < 1.5
+    print("Stream deadline: OK")
+
+
+async def check_concurrency(server):
+    client = new_client(server)
+    while server.in_flight:  # The fake may still be answering the timed out request
+        await asyncio.sleep(0.1)
+    server.seconds_per_well = 0.05
+    server.max_in_flight = 0
+    try:
+        await asyncio.gather(*(client.send(MESSAGE) for _ in range(6)))
+    finally:
+        server.seconds_per_well = 0
+    assert server.max_in_flight == 2, server.max_in_flight
+    print("Concurrency limit: OK")
+
+
+def test_strip_boilerplate():
+    # A provision whose last OCR'd line lost its period: the fields after it stay
+    text = "\n".join([
+        "DIVISION ORDER",
+        "Payment: Payor shall pay all parties at the price agreed to by the operator for",
+        "oil to be paid for by Payor",
+        "Property Name: FISCHER-COULSON 1H",
+        "Property Description: SEC 10, BLK 36",
+        "Owner Name: BLUE SKY MINERALS LP",
+        "Effective Date: 3/1/2025",
+        "Royalty Int 0.02500000",
+    ])
+    assert strip_boilerplate(text).split("\n") == [
+        "DIVISION ORDER",
+        "Property Name: FISCHER-COULSON 1H",
+        "Property Description: SEC 10, BLK 36",
+        "Owner Name: BLUE SKY MINERALS LP",
+        "Effective Date: 3/1/2025",
+        "Royalty Int 0.02500000",
+    ]
+
+    # A complete provision ends at its period; a decimal line always ends one
+    text = "\n".join([
+        "Indemnity: The owner agrees to indemnify and hold payor harmless from all",
+        "liability resulting from payments made to the owner.",
+        "FISCHER-COULSON 1H",
+        "Termination: Termination of this agreement is effective on the first day",
+        "WELL 2H 0.00125000",
+    ])
+    assert strip_boilerplate(text).split("\n") == ["FISCHER-COULSON 1H", "WELL 2H 0.00125000"]
+
+    # Without a sentence end the paragraph is cut off after a few lines
+    lines = ["Notices: Payor shall notify the owner of any change"] + [f"unpunctuated line {i}" for i in range(10)]
+    assert strip_boilerplate("\n".join(lines)).split("\n") == lines[6:]
+
+    # Exhibit headers once, page numbers never
+    text = "Exhibit 'A'\nALPHA 1H\nPage 1 of 2\nExhibit 'A'\nBRAVO 1H\nPage 2 of 2"
+    assert strip_boilerplate(text).split("\n") == ["Exhibit 'A'", "ALPHA 1H", "BRAVO 1H"]
+    print("Boilerplate stripping: OK")
+
+
+# Small limits so the test runs quickly
+LIMITS = {"MAX_RETRIES": 2, "BACKOFF_BASE": 0.01, "BACKOFF_MAX": 0.05, "REQUEST_DEADLINE": 1,
+          "MAX_CONCURRENT_REQUESTS": 2}
+
+
+def test_claude_client():
+    server = start_fake_anthropic(seconds_per_well=0)
+    try:
+        with patch.multiple(claude_client, **LIMITS):
+            asyncio.run(check_retries(server))
+            asyncio.run(check_circuit_breaker(server))
+            asyncio.run(check_deadline(server))
+            asyncio.run(check_stream_deadline(server))
+            asyncio.run(check_concurrency(server))
+    finally:
+        server.shutdown()
+    print("Claude client test passed")
+
+
+if __name__ == "__main__":
+    test_strip_boilerplate()
+    test_claude_client()
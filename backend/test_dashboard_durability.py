@@ -0,0 +1,82 @@
+"""
+Crash test of the SQLite dashboard database (dashboard_store.py).
+
+A child process deploys a first batch (committed, still only in the
+write-ahead log) and is killed (SIGKILL, TerminateProcess on Windows) in
+the middle of a large second deploy. The database must open cleanly with exactly the first batch: the
+committed deploy replayed from the log, nothing of the interrupted one.
+A new process, like a restarted server, checks that and then that a
+checkpoint empties the log into the database file.
+
+    python test_dashboard_durability.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """
+import sys
+import dashboard_store
+
+def batch(prefix, count):
+    return [{"propertyName": f"{prefix} {i}H", "operator": "TEST OPERATING LLC", "entity": "BLUE SKY MINERALS LP",
+             "decimalInterest": "0.00125000", "state": "TX", "effectiveDate": "3/1/25"} for i in range(count)]
+
+dashboard_store.init_store()
+dashboard_store.deploy_records(batch("COMMITTED", 200))
+print("committed", flush=True)
+dashboard_store.deploy_records(batch("INTERRUPTED", 500000))
+print("finished", flush=True)
+"""
+
+# Run in a new process, like a server started after the crash
+CHECK = """
+import os
+import dashboard_store
+from database import engine
+
+db_path = engine.url.database
+with engine.connect() as connection:
+    assert connection.exec_driver_sql("PRAGMA integrity_check").scalar() == "ok"
+records = dashboard_store.list_records()
+assert len(records) == 200, len(records)
+assert all(record["propertyName"].startswith("COMMITTED") for record in records)
+print("Interrupted deploy: OK")
+
+dashboard_store.deploy_records([{"propertyName": "AFTER CRASH 1H", "effectiveDate": "4/1/25"}])
+dashboard_store.checkpoint()
+assert os.path.getsize(db_path + "-wal") == 0
+assert len(dashboard_store.list_records()) == 201
+print("Checkpoint: OK")
+"""
+
+
+def test_dashboard_durability():
+    work_dir = tempfile.mkdtemp(prefix="dashboard_crash_")
+    db_path = os.path.join(work_dir, "dashboard.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", DASHBOARD_CHECKPOINT_ROWS="1000000")
+    child = subprocess.Popen([sys.executable, "-c", CHILD], env=env, stdout=subprocess.PIPE, text=True, cwd=BACKEND_DIR)
+    assert child.stdout.readline().strip() == "committed"
+    # Kill it once the uncommitted second deploy is spilling into the log
+    committed_size = os.path.getsize(db_path + "-wal")
+    deadline = time.time() + 60
+    while os.path.getsize(db_path + "-wal") < committed_size + 4_000_000:
+        assert child.poll() is None and time.time() < deadline, "Second deploy ended before it could be killed"
+        time.sleep(0.01)
+    child.kill()  # SIGKILL, or TerminateProcess on Windows
+    child.wait()
+    assert os.path.getsize(db_path + "-wal") > 0, "Expected the first deploy to still be in the log"
+
+    check = subprocess.run([sys.executable, "-c", CHECK], env=env, capture_output=True, text=True, cwd=BACKEND_DIR)
+    print(check.stdout, end="")
+    assert check.returncode == 0, check.stderr
+    print("Dashboard durability test passed")
+
+
+if __name__ == "__main__":
+    test_dashboard_durability()
@@ -0,0 +1,184 @@
+"""
+Test of the database-backed dashboard (dashboard_store.py) on a temporary SQLite file.
+
+Deploys records twice (the second time with duplicates) and the same
+records from two threads at once, edits and deletes by record ID, and pages
+through a larger dashboard with filters, search and cursors. Checks that
+every change bumps the dashboard version and drops the pages cached by
+dashboard_view.DashboardView.
+
+    python test_dashboard_store.py
+"""
+
+import contextlib
+import tempfile
+import threading
+from unittest.mock import patch
+
+from sqlalchemy.orm import sessionmaker
+
+import dashboard_store
+from dashboard_view import DashboardView
+from database import make_engine
+
+
+@contextlib.contextmanager
+def temporary_dashboard():
+    """Point dashboard_store at a new SQLite file, whatever DATABASE_URL the process started with."""
+    engine = make_engine(f"sqlite:///{tempfile.mkdtemp(prefix='dashboard_test_')}/dashboard.db")
+    try:
+        with patch.multiple(dashboard_store, engine=engine,
+                            SessionLocal=sessionmaker(autocommit=False, autoflush=False, bind=engine)):
+            dashboard_store.init_store()
+            yield
+    finally:
+        engine.dispose()
+
+
+def record(name: str, effective_date: str, **fields) -> dict:
+    return {
+        "propertyName": name, "operator": "TEST OPERATING LLC", "entity": "BLUE SKY MINERALS LP",
+        "propertyDescription": "SEC 10, BLK 36", "decimalInterest": "0.00125000", "county": "Reeves",
+        "state": "TX", "effectiveDate": effective_date, **fields,
+    }
+
+
+def check_pages():
+    dates = ["February 28, 2025", "3/1/25", "FIRST SALES", "4/1/2025", "01072025"]
+    dashboard_store.deploy_records([
+        record(f"WELL {i:03d}", dates[i % len(dates)], operator=f"OPERATOR {i % 3}", status="Executed" if i % 2 else "")
+        for i in range(100)
+    ])
+    expected = dashboard_store.list_records()
+    assert [r["effectiveDate"] for r in expected[:1]] == ["4/1/2025"]
+    # Not dates: after every dated record
+    assert all(r["effectiveDate"] == "FIRST SALES" for r in expected[-20:])
+
+    # Walking the cursors gives the full list once, in order
+    seen, cursor = [], None
+    while True:
+        page = dashboard_store.page_records(7, cursor)
+        assert page["total"] == len(expected)
+        seen.extend(page["records"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+    # A delete between pages neither skips nor repeats a record
+    first = dashboard_store.page_records(10)
+    dashboard_store.delete_record(first["records"][0]["id"])
+    second = dashboard_store.page_records(10, first["next_cursor"])
+    assert second["records"] == expected[10:20]
+
+    # Filters and another sort order
+    page = dashboard_store.page_records(50, sort="propertyName", descending=False,
+                                        filters={"operator": "OPERATOR 1", "status": "Executed"})
+    names = [r["propertyName"] for r in page["records"]]
+    assert names == sorted(f"WELL {i:03d}" for i in range(100) if i % 3 == 1 and i % 2), names
+    assert page["total"] == len(names) and page["next_cursor"] is None
+
+    # Search: every word in some field, ignoring case; % and _ are not wildcards
+    page = dashboard_store.page_records(50, sort="propertyName", descending=False, search="EXECUTED  well 04")
+    assert [r["propertyName"] for r in page["records"]] == ["WELL 041", "WELL 043", "WELL 045", "WELL 047", "WELL 049"]
+    assert page["total"] == 5
+    assert dashboard_store.page_records(50, search="0.00125%")["total"] == 0
+    try:
+        dashboard_store.page_records(10, first["next_cursor"], sort="operator")
+        raise AssertionError("Expected a cursor of another sort order to be rejected")
+    except ValueError:
+        pass
+
+
+def check_concurrent_deploys():
+    before = dashboard_store.list_records()
+    batch = [record(f"RACE {i:04d}", "6/1/25") for i in range(2000)]
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(dashboard_store.deploy_records(batch)))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(result["new_records_added"] for result in results) == 2000, results
+    assert sum(result["duplicates_skipped"] for result in results) == 2000, results
+    assert len(dashboard_store.list_records()) == len(before) + 2000
+
+
+def check_view():
+    view = DashboardView(max_pages=2)
+    version = dashboard_store.current_version()
+    query = (10, None, "effectiveDate", "desc", ())
+    assert view.get(version, query) is None
+    view.put(version, query, b"page")
+    assert view.get(dashboard_store.current_version(), query) == b"page"
+
+    # A deploy of nothing new, or a deduplicate with nothing to remove, isn't a change
+    dashboard_store.deploy_records([record("ALPHA 1H", "1/1/24")])
+    dashboard_store.deduplicate_records()
+    assert dashboard_store.current_version() == version
+
+    [record_id] = dashboard_store.deploy_records([record("DELTA 1H", "5/1/25")])["record_ids"]
+    dashboard_store.update_record(record_id, {"notes": "x"})
+    dashboard_store.delete_record(record_id)
+    assert dashboard_store.current_version() == version + 3
+    assert view.get(dashboard_store.current_version(), query) is None
+
+    # A page built while the dashboard changed is not kept
+    view.put(version, query, b"stale")
+    assert view.get(version + 3, query) is None
+
+    for limit in (1, 2, 3):
+        view.put(version + 3, (limit,), b"page")
+    assert view.metrics()["pages_cached"] == 2
+
+
+def check_records():
+    result = dashboard_store.deploy_records([record("ALPHA 1H", "1/1/24"), record("BRAVO 1H", "3/1/25")])
+    alpha_id, bravo_id = result.pop("record_ids")
+    assert result == {"records_count": 2, "duplicates_skipped": 0, "new_records_added": 2}, result
+
+    # Duplicates ignore case and surrounding spaces, also within one deploy
+    result = dashboard_store.deploy_records([
+        record(" alpha 1h ", "1/1/24"), record("CHARLIE 1H", "2/1/25"), record("CHARLIE 1H", "2/1/25"),
+    ])
+    [charlie_id] = result.pop("record_ids")
+    assert result == {"records_count": 3, "duplicates_skipped": 2, "new_records_added": 1}, result
+
+    records = dashboard_store.list_records()
+    assert [(r["id"], r["propertyName"]) for r in records] == [
+        (bravo_id, "BRAVO 1H"), (charlie_id, "CHARLIE 1H"), (alpha_id, "ALPHA 1H")
+    ]
+    assert records[0]["decimalInterest"] == "0.00125000"
+
+    # Deleting a record doesn't retarget edits of the others
+    assert dashboard_store.delete_record(bravo_id)["propertyName"] == "BRAVO 1H"
+    assert dashboard_store.delete_record(bravo_id) is None
+    charlie = dashboard_store.update_record(charlie_id, {"notes": "Called operator", "status": "Curative"})
+    assert (charlie["propertyName"], charlie["notes"], charlie["status"]) == ("CHARLIE 1H", "Called operator", "Curative")
+    assert dashboard_store.update_record(bravo_id, {"notes": "x"}) is None
+    assert [r["propertyName"] for r in dashboard_store.list_records()] == ["CHARLIE 1H", "ALPHA 1H"]
+
+    # A key change that would duplicate another record is refused
+    try:
+        dashboard_store.update_record(charlie_id, {"effectiveDate": "1/1/24", "propertyName": "ALPHA 1H"})
+        raise AssertionError("Expected the duplicate key to be refused")
+    except ValueError:
+        pass
+    assert dashboard_store.update_record(charlie_id, {"effectiveDate": "2/1/25"})["effectiveDate"] == "2/1/25"
+    dashboard_store.delete_record(charlie_id)
+    dashboard_store.update_record(alpha_id, {"notes": "Called operator"})
+    assert dashboard_store.deduplicate_records() == {"duplicates_removed": 0, "records_remaining": 1}
+
+
+def test_dashboard_store():
+    with temporary_dashboard():
+        check_records()
+        check_pages()
+        check_view()
+        check_concurrent_deploys()
+    print("Dashboard store test passed")
+
+
+if __name__ == "__main__":
+    test_dashboard_store()
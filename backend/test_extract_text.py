@@ -0,0 +1,83 @@
+"""
+Test of the per-page choice between native text and OCR in
+main.extract_text_from_pdf.
+
+A text PDF followed by a blank page, a "Page N of M" page and a page holding
+only an image: the short imageless pages keep their native text and only
+the image page is sent to OCR (ocr_pdf_pages is replaced by a stub). The
+local parser reads the text unless a page was OCR'd.
+
+    python test_extract_text.py
+"""
+
+import os
+import tempfile
+from unittest.mock import patch
+
+import fitz
+
+TEXT = """DIVISION ORDER
+Operator: TEST OPERATING LLC
+Owner Name: BLUE SKY MINERALS LP
+Effective Date: 3/1/2025
+Property Name: FISCHER-COULSON 1H
+Property Description: SEC 10, BLK 36, T2S
+County and State: MIDLAND COUNTY, TX
+Royalty Int 0.02500000"""
+
+
+def text_pdf(image_page: bool) -> bytes:
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), TEXT)
+    doc.new_page()
+    doc.new_page().insert_text((72, 72), "Page 3 of 3")
+    if image_page:
+        pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 20, 20))
+        pixmap.clear_with(200)
+        doc.new_page().insert_image(fitz.Rect(72, 72, 300, 300), pixmap=pixmap)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def extract(content: bytes) -> tuple:
+    # main opens the dashboard database and caches on import: keep them out of the real ones
+    work_dir = tempfile.mkdtemp(prefix="extract_text_test_")
+    with patch.dict(os.environ, EXTRACTION_CACHE_PATH=os.path.join(work_dir, "extraction_cache.db"),
+                    DATABASE_URL=f"sqlite:///{os.path.join(work_dir, 'dashboard.db')}"):
+        import main
+    ocr_calls = []
+
+    def ocr_pdf_pages(pdf, page_nums, page_cache=None, stats=None):
+        ocr_calls.append(list(page_nums))
+        return ["Exhibit A scanned text" for _ in page_nums]
+
+    stats = {}
+    with patch.object(main, "ocr_pdf_pages", ocr_pdf_pages), patch.object(main, "LOCAL_EXTRACTION", True):
+        text = main.extract_text_from_pdf(content, stats)
+        local = main.local_extraction(text, stats)
+    return text, stats, ocr_calls, local
+
+
+def test_blank_pages_are_not_ocrd():
+    text, stats, ocr_calls, local = extract(text_pdf(image_page=False))
+    assert ocr_calls == []
+    assert (stats["native_pages"], stats["ocr_pages"]) == (3, 0), stats
+    assert text.startswith("DIVISION ORDER") and "Page 3 of 3" in text
+    # All native text: parsed locally, without Claude
+    assert [well["decimalInterest"] for well in local["wells"]] == ["0.02500000"], local
+
+
+def test_image_page_is_ocrd():
+    text, stats, ocr_calls, local = extract(text_pdf(image_page=True))
+    assert ocr_calls == [[3]]
+    assert (stats["native_pages"], stats["ocr_pages"], stats["ocr_text_pages"]) == (3, 1, 1), stats
+    assert text.endswith("Exhibit A scanned text")
+    # OCR'd text goes to Claude
+    assert local is None
+
+
+if __name__ == "__main__":
+    test_blank_pages_are_not_ocrd()
+    test_image_page_is_ocrd()
+    print("Extract text test passed")
@@ -0,0 +1,71 @@
+"""
+Test of response_parser.WellStreamParser on responses split into arbitrary chunks.
+
+Every well must come out once, in order, and as soon as its closing brace
+has arrived, however the response is cut, including when the "wells" key
+and its "[" are far apart.
+
+    python test_response_parser.py
+"""
+
+import json
+import random
+
+from response_parser import WellStreamParser, parse_extraction_response
+
+WELLS = [
+    {"propertyName": f"FISCHER-COULSON {i}H", "propertyDescription": "SEC 10, BLK 36 {A} [B]",
+     "decimalInterest": f"0.{i:08d}", "county": "Midland"}
+    for i in range(1, 13)
+]
+
+
+def response(wells_key: str = '"wells": [') -> str:
+    header = json.dumps({"operator": "TEST OPERATING LLC", "entity": "BLUE SKY MINERALS LP",
+                         "state": "Texas", "effectiveDate": "3/1/2025"}, indent=2)[:-2]
+    body = ",\n    ".join(json.dumps(well) for well in WELLS)
+    return f"Here is the extraction:\n```json\n{header},\n  {wells_key}\n    {body}\n  ]\n}}\n```\nDone."
+
+
+def stream(text: str, sizes) -> list:
+    """Feed `text` in chunks; check every well is handed out once its closing brace is in."""
+    parser = WellStreamParser()
+    wells, position = [], 0
+    for size in sizes:
+        chunk = text[position:position + size]
+        if not chunk:
+            break
+        position += len(chunk)
+        wells.extend(parser.feed(chunk))
+        complete = sum(1 for well in WELLS if text.find(json.dumps(well)) + len(json.dumps(well)) <= position)
+        assert len(wells) == complete, (position, len(wells), complete)
+    assert position == len(text)
+    assert parser.wells_found == len(wells)
+    return wells
+
+
+def test_random_chunks():
+    rng = random.Random(7)
+    for wells_key in ('"wells": [', '"wells"   :    \n  [', '"wells"\n\n\n\n\n\n\n\n:\n\n\n\n\n\n\n\n\n\n['):
+        text = response(wells_key)
+        assert parse_extraction_response(text)[0]["wells"] == WELLS
+        for _ in range(50):
+            assert stream(text, iter(lambda: rng.randint(1, 40), None)) == WELLS
+        # One character at a time, and all at once
+        assert stream(text, [1] * len(text)) == WELLS
+        assert stream(text, [len(text)]) == WELLS
+
+
+def test_wells_key_split_across_chunks():
+    text = response('"wells"   :    \n  [')
+    key = text.index('"wells"')
+    # Cut inside the key, and between the key and the bracket
+    for cut in (key + 3, key + len('"wells"') + 2, key + len('"wells"   :    \n')):
+        assert stream(text, [cut, len(text)]) == WELLS
+        assert stream(text, [cut] + [5] * len(text)) == WELLS
+
+
+if __name__ == "__main__":
+    test_random_chunks()
+    test_wells_key_split_across_chunks()
+    print("Response parser test passed")
@@ -0,0 +1,110 @@
+"""
+Test of the rule-based division order parser (well_parser.py).
+
+Covers the labelled form layout, the one-cell-per-line exhibit table, a
+property block holding two interests (one well entry each), and a form
+missing a header field (confidence below 1, so Claude is used).
+
+    python test_well_parser.py
+"""
+
+from well_parser import extract_division_order
+
+HEADER = """DIVISION ORDER
+Operator: PIONEER NATURAL RESOURCES USA, INC.
+Owner Name: BLUE SKY MINERALS LP
+Effective Date: 3/1/2025
+"""
+
+FORM = HEADER + """Property Name: FISCHER-COULSON 1H
+Property Description: SEC 10, BLK 36, T2S
+County and State: MIDLAND COUNTY, TX
+Royalty Int 0.02500000
+Property Name: FISCHER-COULSON 2H
+Property Description: SEC 11, BLK 36, T2S
+County and State: UPTON COUNTY, TX
+Royalty Int 0.00822752
+"""
+
+TWO_INTERESTS = HEADER + """Property Name: FISCHER-COULSON 1H
+Property Description: SEC 10, BLK 36, T2S
+Royalty Int 0.02500000
+Working Int 0.01500000
+County and State: MIDLAND COUNTY, TX
+"""
+
+TABLE = HEADER + """Property No
+Property Name
+Legal Description
+State
+County
+Int Type
+Decimal Interest
+301-HT122D
+ALPHA 1H
+SEC 1 BLK 2 H&GN RR CO
+Texas
+Reeves
+RI
+0.00125000
+301-HT123D
+BRAVO 2H
+SEC 3 BLK 2 H&GN RR CO
+Texas
+Loving Parish
+RI
+0.00250000
+"""
+
+
+def wells(data: dict) -> list:
+    return [(w["propertyName"], w["propertyDescription"], w["decimalInterest"], w["county"]) for w in data["wells"]]
+
+
+def check_header(data: dict):
+    assert (data["operator"], data["entity"], data["state"], data["effectiveDate"]) == (
+        "PIONEER NATURAL RESOURCES USA, INC.", "BLUE SKY MINERALS LP", "TX", "3/1/2025"
+    ), data
+
+
+def test_form_layout():
+    data, confidence = extract_division_order(FORM)
+    check_header(data)
+    assert wells(data) == [
+        ("FISCHER-COULSON 1H", "SEC 10, BLK 36, T2S", "0.02500000", "MIDLAND"),
+        ("FISCHER-COULSON 2H", "SEC 11, BLK 36, T2S", "0.00822752", "UPTON"),
+    ], wells(data)
+    assert confidence == 1.0
+
+
+def test_exhibit_table():
+    data, confidence = extract_division_order(TABLE)
+    check_header(data)
+    assert wells(data) == [
+        ("ALPHA 1H", "SEC 1 BLK 2 H&GN RR CO", "0.00125000", "Reeves"),
+        ("BRAVO 2H", "SEC 3 BLK 2 H&GN RR CO", "0.00250000", "Loving"),
+    ], wells(data)
+    assert confidence == 1.0
+
+
+def test_two_interests_in_one_block():
+    data, confidence = extract_division_order(TWO_INTERESTS)
+    assert wells(data) == [
+        ("FISCHER-COULSON 1H", "SEC 10, BLK 36, T2S", "0.02500000", "MIDLAND"),
+        ("FISCHER-COULSON 1H", "SEC 10, BLK 36, T2S", "0.01500000", "MIDLAND"),
+    ], wells(data)
+    assert confidence == 1.0
+
+
+def test_missing_header_field():
+    data, confidence = extract_division_order(FORM.replace("Effective Date: 3/1/2025\n", ""))
+    assert data["effectiveDate"] == ""
+    assert confidence < 1.0
+
+
+if __name__ == "__main__":
+    test_form_layout()
+    test_exhibit_table()
+    test_two_interests_in_one_block()
+    test_missing_header_field()
+    print("Well parser test passed")
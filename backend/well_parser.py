@@ -0,0 +1,383 @@
+"""
+Rule-based extraction for division orders with recognized layouts.
+
+Text-based division orders from many operators follow one of two layouts
+that can be read without an LLM:
+
+- form: labelled fields ("Operator:", "Owner Name", "Property Name",
+  "County and State", "Royalty Int 0.00822752", ...) with the value on the
+  same line or on the following lines, one block per property;
+- exhibit table: a wells table extracted one cell per line, where each row
+  ends with State, County, interest type/tier codes and the decimal interest.
+
+extract_division_order() returns the same JSON shape as the Claude prompt
+plus a confidence between 0 and 1; callers fall back to Claude when the
+confidence is low.
+
+The parser reads native text line by line and doesn't use
+main.group_well_lines: that only runs on OCR'd pages, which aren't parsed
+here, and on native text it would only strip lines and drop the blank ones,
+which end a description's continuation lines.
+"""
+
+import re
+
+# Bump when parsing rules change so cached local extractions are not reused
+LOCAL_PARSER_VERSION = "2"
+
+# US state name to abbreviation mapping
+STATE_ABBREVIATIONS = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'florida': 'FL', 'georgia': 'GA',
+    'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA',
+    'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD',
+    'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO',
+    'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ',
+    'new mexico': 'NM', 'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH',
+    'oklahoma': 'OK', 'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC',
+    'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT',
+    'virginia': 'VA', 'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+    'district of columbia': 'DC', 'dc': 'DC',
+}
+STATE_NAMES = set(STATE_ABBREVIATIONS)
+for abbr in list(STATE_ABBREVIATIONS.values()):
+    STATE_ABBREVIATIONS[abbr.lower()] = abbr
+
+
+def normalize_state(state):
+    if not state:
+        return state
+    s = str(state).strip().lower()
+    return STATE_ABBREVIATIONS.get(s, state)
+
+
+# Field labels, mapped to the field they introduce. Column headers and labels
+# that must not be mistaken for a field (e.g. "From Owner Name" on a transfer)
+# map to None so they are recognised, and skipped, as labels.
+FIELD_LABELS = {
+    'operator': 'operator',
+    'to owner name': 'entity',
+    'owner name': 'entity',
+    'interest owner': 'entity',
+    'from owner name': None,
+    'owner number': None,
+    'owner no': None,
+    'owner sub': None,
+    'to owner no': None,
+    'to owner sub': None,
+    'from owner no': None,
+    'from owner sub': None,
+    'property name': 'propertyName',
+    'well name': 'propertyName',
+    'property number': None,
+    'property no': None,
+    'property description': 'propertyDescription',
+    'legal description': 'propertyDescription',
+    'county and state': 'countyState',
+    'county / state': 'countyState',
+    'county/state': 'countyState',
+    'county': 'county',
+    'state': 'state',
+    'effective date': 'effectiveDate',
+    'decimal interest': 'decimalInterest',
+    'royalty int': 'decimalInterest',
+    'royalty interest': 'decimalInterest',
+    'working int': 'decimalInterest',
+    'working interest': 'decimalInterest',
+    'owner interest': 'decimalInterest',
+    'interest': 'decimalInterest',
+    'nri': 'decimalInterest',
+    'date prepared': None,
+    'int type': None,
+    'interest type': None,
+}
+
+# A label starts a line, or is followed by a colon anywhere in a line
+_LABEL_PATTERN = re.compile(
+    r'(?:^|(?<=\s))(' + '|'.join(
+        re.escape(label).replace(r'\ ', r'\s*') for label in sorted(FIELD_LABELS, key=len, reverse=True)
+    ) + r')\b\s*(?:\.?\s*:|#)?',
+    re.IGNORECASE,
+)
+
+DECIMAL_PATTERN = re.compile(r'(?<![\d.])(0?\.\d{4,}|1\.0{4,})(?![\d.])')
+DECIMAL_LINE = re.compile(r'^\s*(0?\.\d{4,}|1\.0{4,})\s*$')
+DATE_PATTERN = re.compile(
+    r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'
+    r'|\d{1,2}-[A-Za-z]{3}-\d{2,4}'
+    r'|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}'
+    r'|first\s+(?:sales|production|purchase))\b',
+    re.IGNORECASE,
+)
+SEE_EXHIBIT = re.compile(r'\bsee\b.*\bexhibit\b|\bexhibit\b', re.IGNORECASE)
+PAGE_FURNITURE = re.compile(r'^(exhibit\b|attached and made|page\s+\d+\s+of\s+\d+)', re.IGNORECASE)
+COUNTY_SUFFIX = re.compile(r'\s+(county|parish|co\.?)$', re.IGNORECASE)
+
+# How many following lines may hold a label's value when its own line doesn't
+VALUE_LOOKAHEAD = 6
+
+# Exhibit tables: lines between County and the decimal interest (interest type, tier, ...)
+MAX_CODES_BEFORE_DECIMAL = 4
+
+# Column headers that appear on every page of an exhibit table
+TABLE_HEADERS = {
+    'property no', 'property name', 'int', 'type', 'int type', 'do maj', 'prod', 'legal description',
+    'state', 'county', 'physical file no', 'tier', 'nri', 'decimal interest', 'transferred percentage',
+}
+
+
+def _label_matches(line: str) -> list:
+    """[(field, label_start, value_start)] for every field label on a line."""
+    matches = []
+    for match in _LABEL_PATTERN.finditer(line):
+        field = FIELD_LABELS.get(re.sub(r'\s+', ' ', match.group(1).lower()))
+        at_line_start = not line[:match.start()].strip()
+        if at_line_start or match.group(0).rstrip().endswith((':', '#')):
+            matches.append((field, match.start(), match.end()))
+    return matches
+
+
+def _valid_value(field: str, value: str) -> bool:
+    value = value.strip(' :\t"\'')
+    if not value or SEE_EXHIBIT.search(value):
+        return False
+    if field == 'decimalInterest':
+        return bool(DECIMAL_PATTERN.search(value))
+    if field == 'effectiveDate':
+        return bool(DATE_PATTERN.search(value))
+    if field in ('operator', 'entity', 'propertyName'):
+        return bool(re.search(r'[A-Za-z]{2}', value)) and len(value) <= 80
+    if field == 'countyState':
+        return ',' in value or bool(re.search(r'[A-Za-z]{2}', value))
+    return bool(re.search(r'[A-Za-z0-9]', value))
+
+
+def _clean_value(field: str, value: str) -> str:
+    value = value.strip(' :\t"\'')
+    if field == 'decimalInterest':
+        return DECIMAL_PATTERN.search(value).group(1)
+    if field == 'effectiveDate':
+        return DATE_PATTERN.search(value).group(1)
+    return re.sub(r'\s+', ' ', value)
+
+
+def _find_fields(lines: list) -> list:
+    """Return [(line_index, field, value)] for every labelled value found in the text."""
+    found = []
+    for index, line in enumerate(lines):
+        matches = _label_matches(line)
+        for position, (field, _, value_start) in enumerate(matches):
+            if field is None:
+                continue
+            value_end = matches[position + 1][1] if position + 1 < len(matches) else len(line)
+            value = line[value_start:value_end]
+            if _valid_value(field, value):
+                found.append((index, field, _clean_value(field, value)))
+                continue
+            if value.strip() or position + 1 < len(matches):
+                continue
+            # Value on a following line (PyMuPDF often emits a label and its value separately)
+            for offset in range(1, VALUE_LOOKAHEAD + 1):
+                if index + offset >= len(lines):
+                    break
+                candidate = lines[index + offset]
+                if _label_matches(candidate):
+                    # Transfer exhibits list several owner column headers before the values
+                    if field != 'entity':
+                        break
+                    continue
+                if candidate.strip().lower() in TABLE_HEADERS:
+                    continue
+                if _valid_value(field, candidate):
+                    found.append((index + offset, field, _clean_value(field, candidate)))
+                    break
+    return found
+
+
+def _description_with_continuation(lines: list, index: int, value: str) -> str:
+    """Append short all-caps continuation lines (e.g. "SPACING UNIT 640") to a description."""
+    parts = [value]
+    for line in lines[index + 1:index + 3]:
+        line = line.strip()
+        if (not line or ':' in line or _label_matches(line) or len(line) > 40
+                or line != line.upper() or DECIMAL_PATTERN.search(line)):
+            break
+        parts.append(line)
+    return ' '.join(parts)
+
+
+def _split_county_state(value: str) -> tuple:
+    """Split "BLAINE COUNTY, OK" / "Upton, Texas" into (county, state abbreviation)."""
+    parts = [part.strip() for part in re.split(r',|\s{2,}', value) if part.strip()]
+    state = None
+    county_parts = []
+    for part in parts:
+        abbr = STATE_ABBREVIATIONS.get(part.lower())
+        if abbr and state is None:
+            state = abbr
+        else:
+            county_parts.append(part)
+    county = COUNTY_SUFFIX.sub('', ' '.join(county_parts)).strip() or None
+    return county, state
+
+
+def _parse_forms(lines: list) -> tuple:
+    """Parse labelled form fields; return (header fields, wells).
+
+    Each property block gives one well per decimal interest: a block with a
+    royalty and a working interest gives two entries sharing the property
+    name, description and county.
+    """
+    header = {}
+    wells = []
+    current = None
+    block = []  # Entries of the current property block
+    for index, field, value in _find_fields(lines):
+        if field in ('operator', 'entity', 'effectiveDate', 'state'):
+            if field == 'state':
+                value = normalize_state(value)
+                if value not in STATE_ABBREVIATIONS.values():
+                    continue
+            header.setdefault(field, value)
+            continue
+        if field == 'propertyName':
+            current = {'propertyName': value}
+            wells.append(current)
+            block = [current]
+            continue
+        if field == 'countyState':
+            county, state = _split_county_state(value)
+            if state:
+                header.setdefault('state', state)
+            if county:
+                for entry in block:
+                    entry.setdefault('county', county)
+            continue
+        if current is None:
+            continue
+        if field == 'decimalInterest':
+            if 'decimalInterest' in current:
+                # Another interest in the same block: its own entry
+                current = {key: item for key, item in current.items() if key != 'decimalInterest'}
+                wells.append(current)
+                block.append(current)
+            current['decimalInterest'] = value
+            continue
+        if field == 'propertyDescription':
+            value = _description_with_continuation(lines, index, value)
+        elif field == 'county':
+            value = COUNTY_SUFFIX.sub('', value)
+        for entry in block:
+            entry.setdefault(field, value)
+    return header, wells
+
+
+def _is_code(line: str) -> bool:
+    """Property numbers, file numbers and short codes ("301-HT122D", "1950115590", "ALL")."""
+    return ' ' not in line or (len(line) <= 4 and line.isupper())
+
+
+def _parse_exhibit_table(lines: list) -> tuple:
+    """Parse a one-cell-per-line wells table; return (wells, number of decimal interest cells seen)."""
+    wells = []
+    buffer = []
+    decimal_cells = 0
+    index = 0
+    while index < len(lines):
+        line = lines[index].strip()
+        is_state = line.lower() in STATE_NAMES and index + 1 < len(lines)
+        if is_state:
+            county = lines[index + 1].strip()
+            decimal_index = None
+            for offset in range(2, MAX_CODES_BEFORE_DECIMAL + 3):
+                if index + offset < len(lines) and DECIMAL_LINE.match(lines[index + offset]):
+                    decimal_index = index + offset
+                    break
+            cells = [cell for cell in buffer if not _is_code(cell)]
+            if decimal_index is not None and cells and re.search(r'[A-Za-z]', county):
+                wells.append({
+                    'propertyName': cells[0],
+                    'propertyDescription': ' '.join(cells[1:]),
+                    'decimalInterest': DECIMAL_LINE.match(lines[decimal_index]).group(1),
+                    'county': COUNTY_SUFFIX.sub('', county),
+                    'state': STATE_ABBREVIATIONS[line.lower()],
+                })
+                decimal_cells += 1
+                buffer = []
+                index = decimal_index + 1
+                continue
+        if DECIMAL_LINE.match(line):
+            decimal_cells += 1
+            buffer = []
+        elif line.lower() in TABLE_HEADERS:
+            # Column headers start the table on every page; anything before them isn't a row
+            buffer = []
+        elif line and not PAGE_FURNITURE.match(line):
+            buffer.append(line)
+        index += 1
+    return wells, decimal_cells
+
+
+def _dedupe_wells(wells: list) -> list:
+    """Drop exact repeats (e.g. the "return" and "keep" copies of the same division order)."""
+    seen = set()
+    unique = []
+    for well in wells:
+        # Ignore whitespace: the two copies may wrap the description differently
+        description = re.sub(r'\s+', '', well.get('propertyDescription', ''))
+        key = (well.get('propertyName'), description, well.get('decimalInterest'))
+        if key not in seen:
+            seen.add(key)
+            unique.append(well)
+    return unique
+
+
+def extract_division_order(text: str) -> tuple:
+    """Parse division order text with the layout rules; return (data, confidence).
+
+    `data` has the same shape as Claude's JSON (operator, entity, state,
+    effectiveDate, wells[]). Confidence is 1.0 only when every header field
+    was found and every well row has a name, county and a valid decimal
+    interest; exhibit tables also need one parsed well per decimal interest
+    cell in the table.
+    """
+    lines = [line.rstrip() for line in text.split('\n')]
+    header, form_wells = _parse_forms(lines)
+    table_wells, decimal_cells = _parse_exhibit_table(lines)
+
+    if table_wells:
+        wells = table_wells
+        coverage = len(table_wells) / decimal_cells if decimal_cells else 0.0
+        states = [well['state'] for well in table_wells]
+        header.setdefault('state', max(set(states), key=states.count))
+    else:
+        wells = [well for well in form_wells if len(well) > 1]
+        coverage = 1.0
+
+    wells = _dedupe_wells(wells)
+    complete = [
+        well for well in wells
+        if _valid_value('propertyName', well.get('propertyName', '')) and well.get('county')
+        and 0 < float(well.get('decimalInterest') or 0) <= 1
+    ]
+    header_fields = ('operator', 'entity', 'state', 'effectiveDate')
+    header_score = sum(1 for field in header_fields if header.get(field)) / len(header_fields)
+    well_score = len(complete) / len(wells) if wells else 0.0
+    confidence = round(min(header_score, well_score * min(coverage, 1.0)), 3)
+
+    data = {
+        'operator': header.get('operator', ''),
+        'entity': header.get('entity', ''),
+        'state': header.get('state', ''),
+        'effectiveDate': header.get('effectiveDate', ''),
+        'wells': [
+            {
+                'propertyName': well.get('propertyName', ''),
+                'propertyDescription': well.get('propertyDescription', ''),
+                'decimalInterest': well.get('decimalInterest', ''),
+                'county': well.get('county', ''),
+            }
+            for well in wells
+        ],
+    }
+    return data, confidence